@@ -0,0 +1,139 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    __main__.py
+
+    Command line entry point: python -m tysig <command>
+
+        bench   run the benchmark suite, emitting JSON results; with
+                --compare, flag regressions against a baseline run; with
+                --threads, measure the throughput of decorated calls made
+                by increasing numbers of threads
+        export  generate a module of the validators of the signature
+                decorated functions and type aliases of modules
+"""
+
+from typing import List, Optional
+import argparse
+import json
+import sys
+from tysig import tybench, tyexport
+
+
+def _write_json(result: dict, output: Optional[str]):
+    """
+    :param result: JSON serializable results
+    :param output: file to write them to, default stdout
+    """
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if output is None:
+        print(text)
+    else:
+        with open(output, "w") as fp:
+            fp.write(text + "\n")
+
+
+def bench(args: argparse.Namespace) -> int:
+    """
+    runs the benchmark suite, or compares runs
+
+    :param args: parsed command line args
+    :return: exit code, 1 if a regression was flagged
+    """
+    if args.threads is not None:
+        _write_json(tybench.thread_scaling(args.threads, args.calls,
+                                           args.repeat, args.select),
+                    args.output)
+        return 0
+    if args.current is not None:
+        with open(args.current) as fp:
+            current = json.load(fp)
+    else:
+        current = tybench.run(args.sizes, args.repeat, args.min_time,
+                              args.select)
+        _write_json(current, args.output)
+
+    if args.compare is None:
+        return 0
+    with open(args.compare) as fp:
+        baseline = json.load(fp)
+    rows = tybench.compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{row['name']:<40} {row['baseline']:>14.1f} "
+              f"{row['current']:>14.1f} {row['ratio']:>7.2f}x  {flag}",
+              file=sys.stderr)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """
+    exports the validators of the modules
+
+    :param args: parsed command line args
+    :return: exit code
+    """
+    source = tyexport.export(args.modules)
+    if args.output is None:
+        sys.stdout.write(source)
+    else:
+        with open(args.output, "w") as fp:
+            fp.write(source)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    :param argv: command line args, default sys.argv[1:]
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m tysig")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = commands.add_parser(
+        "bench", help="run the benchmark suite, emitting JSON results")
+    bench_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=tybench.DEFAULT_SIZES,
+        help="sizes of the values checked by the is_type cases")
+    bench_parser.add_argument(
+        "--repeat", type=int, default=tybench.DEFAULT_REPEAT,
+        help="timed loops per case, the fastest is reported")
+    bench_parser.add_argument(
+        "--min-time", type=float, default=tybench.DEFAULT_MIN_TIME,
+        help="minimum duration in seconds of a timed loop")
+    bench_parser.add_argument(
+        "--select", help="only run the cases whose name contains SELECT")
+    bench_parser.add_argument(
+        "--output", "-o", help="file to write the JSON results to")
+    bench_parser.add_argument(
+        "--compare", metavar="BASELINE",
+        help="JSON results of a baseline run to compare against")
+    bench_parser.add_argument(
+        "--current", metavar="RESULTS",
+        help="JSON results to compare instead of running the suite")
+    bench_parser.add_argument(
+        "--threshold", type=float, default=tybench.DEFAULT_THRESHOLD,
+        help="relative slowdown flagged as a regression (default 0.1)")
+    bench_parser.add_argument(
+        "--threads", type=int, nargs="+", metavar="N",
+        help="measure the throughput of the signature cases called by N "
+             "threads at once instead, e.g. --threads 1 2 4 8")
+    bench_parser.add_argument(
+        "--calls", type=int, default=tybench.DEFAULT_CALLS,
+        help="calls per thread of the --threads runs")
+    bench_parser.set_defaults(run=bench)
+
+    export_parser = commands.add_parser(
+        "export", help="generate a module of validators of modules")
+    export_parser.add_argument(
+        "modules", nargs="+", help="modules to export e.g. pkg.module")
+    export_parser.add_argument(
+        "--output", "-o", help="file to write the generated module to")
+    export_parser.set_defaults(run=export)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
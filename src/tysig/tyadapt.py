@@ -0,0 +1,343 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyadapt.py
+
+    Adaptive validators: profile guided specialization of compiled plans.
+    An adaptive plan records the concrete classes of the values it passes
+    during a warm-up period, then switches to a fast path guarded by a
+    cheap check of those classes, e.g. "every element is exactly str" for
+    List[Union[str, float]], or "the value is exactly int" for
+    Optional[int]. Values failing the guard take the general path, and a
+    guard failing too often is dropped (deoptimized). The decisions are
+    reported by AdaptiveCache.report.
+"""
+
+from typing import Callable, Optional
+from collections import Counter
+from itertools import islice
+import threading
+from tysig.tycompile import Plan, PlanCache, compile_plan, accepts_class, \
+    rejects_class, K_UNION, K_LIST, K_DICT, K_SET, K_SEQUENCE, \
+    K_MAPPING, K_VARTUPLE, PLAN_CACHE_SIZE
+from tysig.typolicy import CheckPolicy, FULL_POLICY
+
+# passing values observed before specializing
+ADAPTIVE_WARMUP = 1000
+
+# share of the observed classes the fast path must cover to be taken
+ADAPTIVE_COVERAGE = 0.95
+
+# elements of a collection observed per value during the warm-up
+OBSERVED_ELEMENTS = 64
+
+# guard checks after which a guard failing more often than
+# DEOPT_RATIO is dropped
+DEOPT_CHECKS = 1000
+DEOPT_RATIO = 0.5
+
+# states of an adaptive plan
+S_WARMUP = "warmup"
+S_SPECIALIZED = "specialized"
+S_GENERAL = "general"
+S_DEOPTIMIZED = "deoptimized"
+
+# kinds of the plans of collections whose elements are all of one type
+_ELEMENT_KINDS = (K_LIST, K_SEQUENCE, K_VARTUPLE, K_SET)
+_ADAPTIVE_KINDS = _ELEMENT_KINDS + (K_DICT, K_MAPPING, K_UNION)
+
+# held while deciding a fast path, so a plan is specialized once when
+# threads end its warm-up concurrently
+_SPECIALIZE_LOCK = threading.Lock()
+
+
+def _names(classes) -> list:
+    return sorted(x.__qualname__ for x in classes)
+
+
+class Adaptation(object):
+    """
+    profile and specialization decision of an adaptive plan. Its counters
+    are plain ints, approximate when values are checked concurrently, as
+    they only steer the specialization and deoptimization
+    """
+
+    __slots__ = ('plan', 'warmup', 'coverage', 'observed', 'tops', 'elems',
+                 'keys', 'state', 'guard', 'guard_hits', 'guard_misses',
+                 'check')
+
+    def __init__(self, plan: Plan, warmup: int, coverage: float):
+        """
+        :param plan: general compiled plan
+        :param warmup: passing values observed before specializing
+        :param coverage: share of the observed classes the fast path must
+                         cover
+        """
+        self.plan = plan
+        self.warmup = warmup
+        self.coverage = coverage
+        self.observed = 0
+        self.tops: Counter = Counter()   # classes of the values
+        self.elems: Counter = Counter()  # classes of the elements / values
+        self.keys: Counter = Counter()   # classes of the dict keys
+        self.state = S_WARMUP
+        self.guard: Optional[tuple] = None
+        self.guard_hits = 0
+        self.guard_misses = 0
+        self.check: Callable[[object], bool] = self._observe
+
+    def _observe(self, var) -> bool:
+        """
+        general check, recording the classes of the values passing it
+        """
+        if not self.plan.check(var):
+            return False
+        self.tops[type(var)] += 1
+        kind = self.plan.kind
+        if kind in _ELEMENT_KINDS:
+            self.elems.update(map(type, islice(var, OBSERVED_ELEMENTS)))
+        elif kind != K_UNION:
+            self.keys.update(map(type, islice(var.keys(),
+                                              OBSERVED_ELEMENTS)))
+            self.elems.update(map(type, islice(var.values(),
+                                               OBSERVED_ELEMENTS)))
+        self.observed += 1
+        if self.observed >= self.warmup:
+            self.specialize()
+        return True
+
+    def _dominant(self, counts: Counter, accepts) -> Optional[frozenset]:
+        """
+        :param counts: observed classes
+        :param accepts: plan whose passing values are decided by class
+        :return: classes accepted by accepts covering the observations, or
+                 None if they do not cover enough of them
+        """
+        total = sum(counts.values())
+        if not total:
+            return None
+        classes = frozenset(x for x in counts if accepts_class(accepts, x))
+        if sum(counts[x] for x in classes) < self.coverage * total:
+            return None
+        return classes
+
+    def specialize(self):
+        """
+        decides the fast path from the observations made
+        """
+        with _SPECIALIZE_LOCK:
+            if self.check == self._observe:
+                self._specialize()
+
+    def _specialize(self):
+        # the counters are copied (atomically, as dicts) and replaced, as
+        # other threads may still be observing values
+        tops, elems, keys = (Counter(dict(x)) for x in
+                             (self.tops, self.elems, self.keys))
+        self.tops, self.elems, self.keys = Counter(), Counter(), Counter()
+        plan = self.plan
+        kind = plan.kind
+        general = plan.check
+        fast = None
+        if kind == K_UNION:
+            fast = self._union_path(tops)
+        else:
+            top_set = frozenset(x for x in tops
+                                if not rejects_class(plan, x))
+            if kind in _ELEMENT_KINDS:
+                elem_set = self._dominant(elems, plan.args[0])
+                if elem_set and top_set:
+                    self.guard = (_names(top_set), _names(elem_set))
+                    fast = self._collection_path(top_set, elem_set)
+            else:
+                key_set = self._dominant(keys, plan.args[0])
+                elem_set = self._dominant(elems, plan.args[1])
+                if key_set and elem_set and top_set:
+                    self.guard = (_names(top_set), _names(key_set),
+                                  _names(elem_set))
+                    fast = self._dict_path(top_set, key_set, elem_set)
+        if fast is None:
+            self.state, self.check = S_GENERAL, general
+        else:
+            self.state, self.check = S_SPECIALIZED, fast
+
+    def _union_path(self, tops: Counter
+                    ) -> Optional[Callable[[object], bool]]:
+        """
+        :param tops: observed classes of the values
+        :return: check of the Union dispatching the dominant class of the
+                 values first, or None if no class dominates
+        """
+        total = sum(tops.values())
+        if not total:
+            return None
+        cls, count = tops.most_common(1)[0]
+        if count < self.coverage * total:
+            return None
+        plan = self.plan
+        self.guard = (_names((cls,)),)
+        if accepts_class(plan, cls):
+            member_check = None
+        else:
+            members = [x for x in plan.args if not rejects_class(x, cls)]
+            if len(members) != 1:
+                return None
+            member_check = members[0].check
+        general = plan.check
+
+        def check(var) -> bool:
+            if type(var) is cls:
+                self.guard_hits += 1
+                return True if member_check is None else member_check(var)
+            self._missed()
+            return general(var)
+        return check
+
+    def _collection_path(self, tops: frozenset, elems: frozenset
+                         ) -> Callable[[object], bool]:
+        general = self.plan.check
+        is_elem = elems.__contains__
+
+        def check(var) -> bool:
+            # guard: the collection and each of its elements are of an
+            # observed class accepted by the plan
+            if type(var) in tops and all(map(is_elem, map(type, var))):
+                self.guard_hits += 1
+                return True
+            self._missed()
+            return general(var)
+        return check
+
+    def _dict_path(self, tops: frozenset, keys: frozenset,
+                   elems: frozenset) -> Callable[[object], bool]:
+        general = self.plan.check
+        is_key, is_elem = keys.__contains__, elems.__contains__
+
+        def check(var) -> bool:
+            if type(var) in tops and \
+                    all(map(is_key, map(type, var.keys()))) and \
+                    all(map(is_elem, map(type, var.values()))):
+                self.guard_hits += 1
+                return True
+            self._missed()
+            return general(var)
+        return check
+
+    def _missed(self):
+        """
+        counts a guard failure, dropping the fast path if it fails too
+        often
+        """
+        self.guard_misses += 1
+        checks = self.guard_hits + self.guard_misses
+        if checks >= DEOPT_CHECKS and \
+                self.guard_misses > DEOPT_RATIO * checks:
+            self.state, self.check = S_DEOPTIMIZED, self.plan.check
+
+    def reset(self):
+        """
+        drops the fast path and starts a new warm-up
+        """
+        self.observed = self.guard_hits = self.guard_misses = 0
+        self.guard = None
+        self.state, self.check = S_WARMUP, self._observe
+
+    def as_dict(self) -> dict:
+        """
+        :return: dict of the type, state, guard (names of the classes of
+                 the value, and of the dict keys / elements) and counters
+        """
+        return {"type": self.plan.check_type, "state": self.state,
+                "observed": self.observed, "guard": self.guard,
+                "guard_hits": self.guard_hits,
+                "guard_misses": self.guard_misses}
+
+
+class AdaptiveCache(PlanCache):
+    """
+    plan cache of adaptive plans: the Union, List, Set, Sequence, Tuple[T,
+    ...] and Dict plans compiled through it, including the nested ones, are
+    specialized once warmed up
+    """
+
+    def __init__(self, warmup: int = ADAPTIVE_WARMUP,
+                 coverage: float = ADAPTIVE_COVERAGE,
+                 maxsize: int = PLAN_CACHE_SIZE):
+        """
+        :param warmup: passing values observed before specializing
+        :param coverage: share of the observed classes the fast path must
+                         cover
+        :param maxsize: maximum number of plans kept in the cache
+        """
+        super().__init__(maxsize)
+        self.warmup = warmup
+        self.coverage = coverage
+        self.adaptations: dict = dict()
+
+    def get(self, check_type, policy: CheckPolicy = FULL_POLICY) -> Plan:
+        """
+        gets the adaptive plan of check_type, compiling it on a miss
+
+        :param check_type: type to get the plan of
+        :param policy: check policy applied to List / Dict elements, only
+                       Union plans are specialized under other policies
+        :return: adaptive Plan
+        """
+        key = check_type if policy == FULL_POLICY else (check_type, policy)
+        try:
+            return self._plans[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable, e.g. Literal of a list
+            return compile_plan(check_type, self, policy)
+        plan = self._compile(check_type, policy)
+        with self._lock:
+            published = self._plans.get(key)
+            if published is not None:
+                return published
+            plan = self.adapt(plan)
+            self._store(key, plan)
+        return plan
+
+    def adapt(self, plan: Plan) -> Plan:
+        """
+        :param plan: compiled plan
+        :return: adaptive plan of the same type and kind, or plan if it
+                 cannot be specialized
+        """
+        if plan.kind not in _ADAPTIVE_KINDS or \
+                plan.kind != K_UNION and not plan.policy.is_full:
+            return plan
+        adaptation = Adaptation(plan, self.warmup, self.coverage)
+        self.adaptations[(plan.check_type, plan.policy)] = adaptation
+
+        def check(var) -> bool:
+            return adaptation.check(var)
+        return Plan(plan.check_type, plan.kind, plan.args, check,
+                    plan.policy)
+
+    def report(self) -> list:
+        """
+        :return: list of the decisions of the adaptive plans, see
+                 Adaptation.as_dict
+        """
+        with self._lock:
+            adaptations = list(self.adaptations.values())
+        return [x.as_dict() for x in adaptations]
+
+    def reset(self):
+        """
+        drops the fast paths and starts new warm-ups
+        """
+        with self._lock:
+            adaptations = list(self.adaptations.values())
+        for adaptation in adaptations:
+            adaptation.reset()
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self.adaptations.clear()
+
+
+ADAPTIVE = AdaptiveCache()
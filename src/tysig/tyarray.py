@@ -0,0 +1,246 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyarray.py
+
+    Array-like fast paths for List, Tuple[T, ...] and Sequence[T] types
+    (see CheckPolicy arrays). NumPy arrays and buffer-protocol
+    objects (array.array, memoryview, ...) are validated in O(1) from their
+    dtype or buffer format instead of element by element. Element types
+    carrying constraints e.g. Annotated[float, Finite()] are checked with
+    vectorized operations (NumPy when available).
+
+    NumPy is optional: it is never imported here, arrays are recognised by
+    their dtype and the numpy module is only used once an array is seen.
+"""
+
+from typing import Callable, Optional
+from abc import ABC, abstractmethod
+import math
+import sys
+from tysig.tycompile import Plan, K_ANY, K_ANYSTR, K_INSTANCE, K_UNION, \
+    K_LIST, K_ANNOTATED, ANYSTR_TYPES, ARRAY_KINDS
+
+# element kinds (NumPy dtype kind codes) accepted by each python type
+PY_KINDS = {
+    bool: "b",
+    int: "biu",
+    float: "f",
+    complex: "c",
+    str: "U",
+    bytes: "S",
+    object: "biufcUS",
+}
+
+# buffer format codes mapped to NumPy dtype kind codes
+FORMAT_KINDS = dict(
+    [(x, "i") for x in "bBhHiIlLqQnN"] +
+    [(x, "f") for x in "efd"] +
+    [("?", "b"), ("c", "S"), ("u", "U"), ("w", "U"), ("Zf", "c"),
+     ("Zd", "c")]
+)
+
+
+class Constraint(ABC):
+    """
+    constraint on the values of an element type, given as metadata of an
+    Annotated type e.g. Annotated[float, Finite()]. Checked on scalars,
+    and vectorized on arrays
+    """
+
+    @abstractmethod
+    def check(self, var) -> bool:
+        """
+        :param var: scalar value
+        :return: True if var satisfies the constraint, else False
+        """
+
+    @abstractmethod
+    def check_array(self, data) -> bool:
+        """
+        :param data: NumPy array, or flat sequence of values of a buffer
+        :return: True if all values satisfy the constraint, else False
+        """
+
+
+class Finite(Constraint):
+    """
+    values must be finite i.e. not NaN or +/- infinity
+    """
+
+    def check(self, var) -> bool:
+        try:
+            return math.isfinite(var)
+        except TypeError:
+            return False
+
+    def check_array(self, data) -> bool:
+        np = _numpy_of(data)
+        if np is not None:
+            return bool(np.isfinite(data).all())
+        return all(map(math.isfinite, data))
+
+    def __repr__(self) -> str:
+        return "Finite()"
+
+
+class Range(Constraint):
+    """
+    values must be within [lo, hi], either bound being optional
+    """
+
+    def __init__(self, lo=None, hi=None):
+        """
+        :param lo: lowest value allowed, None for no lower bound
+        :param hi: highest value allowed, None for no upper bound
+        """
+        self.lo = lo
+        self.hi = hi
+
+    def check(self, var) -> bool:
+        try:
+            return (self.lo is None or var >= self.lo) and \
+                   (self.hi is None or var <= self.hi)
+        except TypeError:
+            return False
+
+    def check_array(self, data) -> bool:
+        if len(data) == 0:
+            return True
+        np = _numpy_of(data)
+        if np is not None:
+            return (self.lo is None or bool((data >= self.lo).all())) and \
+                   (self.hi is None or bool((data <= self.hi).all()))
+        return (self.lo is None or min(data) >= self.lo) and \
+               (self.hi is None or max(data) <= self.hi)
+
+    def __repr__(self) -> str:
+        return f"Range({self.lo!r}, {self.hi!r})"
+
+
+def _numpy_of(var):
+    """
+    :param var: any value
+    :return: numpy module if var is a NumPy array, else None
+    """
+    if type(var).__module__ == "numpy":
+        return sys.modules.get("numpy")
+    return None
+
+
+def _is_numpy(var) -> bool:
+    return hasattr(var, "dtype") and hasattr(var, "ndim") and \
+        _numpy_of(var) is not None
+
+
+def is_array_like(var) -> bool:
+    """
+    :param var: any value
+    :return: True if var is a NumPy array or supports the buffer protocol,
+             str / bytes / bytearray excepted
+    """
+    if isinstance(var, ANYSTR_TYPES):
+        return False
+    if _is_numpy(var):
+        return True
+    try:
+        memoryview(var)
+    except TypeError:
+        return False
+    return True
+
+
+def _flat_buffer(view: memoryview, fmt: str):
+    """
+    :param view: memoryview of a buffer
+    :param fmt: buffer format without byte order prefix
+    :return: flat sequence of the values of the buffer
+    """
+    if view.ndim <= 1:
+        return view
+    try:
+        return view.cast("B").cast(fmt)
+    except (TypeError, ValueError):  # e.g. not contiguous
+        def flatten(x):
+            for y in x:
+                if isinstance(y, list):
+                    yield from flatten(y)
+                else:
+                    yield y
+        return list(flatten(view.tolist()))
+
+
+def _accepts(plan: Plan, kind: str, data, flat) -> bool:
+    """
+    check if array elements of dtype kind code satisfy plan
+
+    :param plan: compiled plan of the element type
+    :param kind: NumPy dtype kind code of the elements
+    :param data: array or buffer holding the elements
+    :param flat: function returning the elements as a flat sequence
+    :return: True if all elements satisfy plan, else False
+    """
+    if plan.kind == K_ANY:
+        return True
+    elif plan.kind == K_ANYSTR:
+        return kind in "US"
+    elif plan.kind == K_INSTANCE:
+        return kind in PY_KINDS.get(plan.check_type, "")
+    elif plan.kind == K_UNION:
+        return any(_accepts(x, kind, data, flat) for x in plan.args)
+    elif plan.kind == K_ANNOTATED:
+        if not _accepts(plan.args[0], kind, data, flat):
+            return False
+        constraints = [x for x in plan.check_type.__metadata__
+                       if isinstance(x, Constraint)]
+        if not constraints:
+            return True
+        values = flat()
+        return all(x.check_array(values) for x in constraints)
+    return False
+
+
+def array_check(plan: Plan) -> Callable[[object], bool]:
+    """
+    builds the array-like check of a List, Tuple[T, ...] or Sequence[T]
+    plan
+
+    :param plan: compiled plan of a List, Tuple[T, ...] or Sequence[T]
+                 type
+    :return: function returning True if an array-like value satisfies plan
+    """
+    def leaf_of(ndim: int) -> Optional[Plan]:
+        leaf = plan
+        for _ in range(ndim):
+            if leaf.kind == K_ANY:
+                return leaf
+            if leaf.kind not in ARRAY_KINDS:
+                return None
+            leaf = leaf.args[0]
+        return leaf
+
+    def check(var) -> bool:
+        if isinstance(var, ANYSTR_TYPES):
+            return False
+        if _is_numpy(var):
+            leaf = leaf_of(var.ndim)
+            if leaf is None or var.ndim == 0:
+                return False
+            if var.dtype.kind == "O":  # objects are checked one by one
+                if plan.kind == K_LIST:
+                    return plan.check(var.tolist())
+                elem_check = plan.args[0].check
+                return all(map(elem_check, var))
+            return _accepts(leaf, var.dtype.kind, var, lambda: var)
+        try:
+            view = memoryview(var)
+        except TypeError:
+            return False
+        fmt = view.format.lstrip("@=<>!")
+        kind = FORMAT_KINDS.get(fmt)
+        leaf = leaf_of(view.ndim)
+        if kind is None or leaf is None or view.ndim == 0:
+            return False
+        return _accepts(leaf, kind, view, lambda: _flat_buffer(view, fmt))
+
+    return check
@@ -0,0 +1,295 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tybench.py
+
+    Benchmark suite of is_type and the signature decorator: flat, nested and
+    wide types at increasing sizes, decorator overhead against undecorated
+    functions, Union heavy signatures and failure paths. Results are JSON
+    serializable so runs can be saved and compared, flagging the cases that
+    regressed beyond a threshold. Run as: python -m tysig bench
+
+    thread_scaling measures the throughput of signature decorated calls made
+    by 1 to N threads at once. Run as: python -m tysig bench --threads 1 2 4
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from time import perf_counter_ns
+from itertools import chain
+import platform
+import threading
+import sys
+import gc
+
+DEFAULT_SIZES = (10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6)
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.05
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_THREADS = (1, 2, 4, 8)
+DEFAULT_CALLS = 10 ** 4
+
+HISTORY = Dict[str, Tuple[List[Dict[int, List[Union[str, float]]]],
+                          float, Optional[int]]]
+WIDE = List[Tuple[int, str, float, bool, bytes, Optional[int],
+                  Union[int, str], List[int], Dict[str, int],
+                  Tuple[int, int], Optional[str], float]]
+UNION = Union[int, float, complex, bytes, bytearray, Tuple[int, int],
+              List[int], str]
+
+
+def time_ns(fun: Callable[[], object], repeat: int = DEFAULT_REPEAT,
+            min_time: float = DEFAULT_MIN_TIME) -> float:
+    """
+    times fun, calling it in loops long enough to be measured. The garbage
+    collector is disabled while timing, as in timeit
+
+    :param fun: function to time, called without args
+    :param repeat: number of timed loops, the fastest is reported
+    :param min_time: minimum duration in seconds of a timed loop
+    :return: nanoseconds per call of fun, of the fastest loop
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:  # calibrate the loop length
+            start = perf_counter_ns()
+            for _ in range(number):
+                fun()
+            elapsed = perf_counter_ns() - start
+            if elapsed >= min_time * 1e9:
+                break
+            number *= 10 if elapsed < min_time * 1e8 else 2
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            start = perf_counter_ns()
+            for _ in range(number):
+                fun()
+            best = min(best, (perf_counter_ns() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def flat_data(size: int) -> list:
+    """
+    :param size: number of elements
+    :return: List[int] value
+    """
+    return list(range(size))
+
+
+def nested_data(size: int) -> dict:
+    """
+    :param size: number of leaf elements (approximately)
+    :return: value of the fn2 / fn4 history type HISTORY
+    """
+    leaves = ["dzf", 1., "jh", 98.8, "kj", 2.3, 989., "x"]
+    return {str(i): ([{1: list(leaves)}], 98.98, None if i % 2 else i)
+            for i in range(max(1, size // len(leaves)))}
+
+
+def wide_data(size: int) -> list:
+    """
+    :param size: number of leaf elements (approximately)
+    :return: WIDE value
+    """
+    row = (1, "a", 1., True, b"b", None, "c", [1, 2], {"d": 1}, (1, 2),
+           "e", 2.)
+    return [row] * max(1, size // 16)
+
+
+def is_type_cases(size: int) -> Dict[str, Callable]:
+    """
+    :param size: size of the values checked
+    :return: dict of case name -> function timed
+    """
+    from tysig.tysig import TySig
+
+    flat, nested, wide = flat_data(size), nested_data(size), wide_data(size)
+    bad_flat = flat + ["x"]
+    bad_nested = dict(nested)
+    bad_nested["bad"] = ([{1: ["a", 1]}], 1., None)
+    return {
+        f"is_type.flat.{size}":
+            lambda: TySig.is_type(flat, List[int]),
+        f"is_type.nested.{size}":
+            lambda: TySig.is_type(nested, HISTORY),
+        f"is_type.wide.{size}":
+            lambda: TySig.is_type(wide, WIDE),
+        f"is_type.flat_fail.{size}":
+            lambda: TySig.is_type(bad_flat, List[int]),
+        f"is_type.nested_fail.{size}":
+            lambda: TySig.is_type(bad_nested, HISTORY),
+    }
+
+
+def signature_cases() -> Dict[str, Callable]:
+    """
+    :return: dict of case name -> function timed, each decorated case
+             having an undecorated baseline case
+    """
+    from tysig.tysig import TySig
+
+    def plain(a, b, c=2.):
+        return a
+
+    @TySig.signature(a=int, b=str, c=(2., float))
+    def simple(a, b, c) -> int:
+        return a
+
+    def plain_union(a, b, c):
+        return a
+
+    @TySig.signature(a=UNION, b=UNION, c=UNION)
+    def union(a, b, c) -> UNION:
+        return a
+
+    history = nested_data(100)
+
+    def plain_history(idx=0, name=None, dob=None, history=None,
+                      ranking=None):
+        return idx
+
+    @TySig.signature(idx=(0, int), name=Optional[str],
+                     dob=Union[Tuple[int, int, int], str], history=HISTORY,
+                     ranking=float)
+    def nested(idx, name, dob, history, ranking):
+        return idx
+
+    def failing():
+        try:
+            simple("x", "y")
+        except TypeError:
+            pass
+
+    return {
+        "signature.simple.baseline": lambda: plain(1, "b"),
+        "signature.simple": lambda: simple(1, "b"),
+        "signature.union.baseline": lambda: plain_union("a", "b", "c"),
+        "signature.union": lambda: union("a", "b", "c"),
+        "signature.nested.baseline":
+            lambda: plain_history(0, None, (2000, 1, 1), history, 2.3),
+        "signature.nested":
+            lambda: nested(None, (2000, 1, 1), history, 2.3),
+        "signature.fail": failing,
+    }
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT,
+        min_time: float = DEFAULT_MIN_TIME,
+        select: Optional[str] = None) -> dict:
+    """
+    runs the benchmark suite
+
+    :param sizes: sizes of the values checked by the is_type cases
+    :param repeat: number of timed loops per case, the fastest is reported
+    :param min_time: minimum duration in seconds of a timed loop
+    :param select: only run the cases whose name contains select
+    :return: JSON serializable dict of the environment and of the results,
+             nanoseconds per call of each case
+    """
+    results = dict()
+    # the values of each size are built, timed and released in turn
+    for cases in chain(map(is_type_cases, sizes), (signature_cases(),)):
+        results.update({name: time_ns(fun, repeat, min_time)
+                        for name, fun in cases.items()
+                        if select is None or select in name})
+    # decorator overhead: ratio of decorated to undecorated calls
+    overhead = {name: results[name] / results[f"{name}.baseline"]
+                for name in results if f"{name}.baseline" in results}
+    return dict(_environment(), results=results, overhead=overhead)
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": sys.platform,
+    }
+
+
+def time_threads(fun: Callable[[], object], threads: int, calls: int,
+                 repeat: int = DEFAULT_REPEAT) -> float:
+    """
+    times threads calling fun concurrently, each calls times. The threads
+    are started together by a barrier
+
+    :param fun: function to time, called without args
+    :param threads: number of threads
+    :param calls: calls of fun per thread
+    :param repeat: number of timed runs, the fastest is reported
+    :return: calls of fun per second over all the threads, of the fastest
+             run
+    """
+    def loop():
+        barrier.wait()
+        for _ in range(calls):
+            fun()
+
+    best = None
+    for _ in range(repeat):
+        barrier = threading.Barrier(threads + 1)
+        workers = [threading.Thread(target=loop) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = perf_counter_ns()
+        for worker in workers:
+            worker.join()
+        elapsed = perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return threads * calls * 1e9 / max(best, 1)
+
+
+def thread_scaling(threads: Sequence[int] = DEFAULT_THREADS,
+                   calls: int = DEFAULT_CALLS, repeat: int = DEFAULT_REPEAT,
+                   select: Optional[str] = None) -> dict:
+    """
+    measures the throughput of the signature cases (see signature_cases)
+    called by increasing numbers of threads sharing the decorated functions,
+    their plan caches, binders and counters
+
+    :param threads: numbers of threads to run each case with
+    :param calls: calls per thread
+    :param repeat: number of timed runs, the fastest is reported
+    :param select: only run the cases whose name contains select
+    :return: JSON serializable dict of the environment, of the throughput
+             (calls per second) of each case by number of threads, and of
+             the scaling: throughput relative to the fewest threads
+    """
+    throughput: Dict[str, Dict[str, float]] = dict()
+    for name, fun in signature_cases().items():
+        if select is None or select in name:
+            throughput[name] = {str(n): time_threads(fun, n, calls, repeat)
+                                for n in threads}
+    scaling = {name: {n: rate / rates[str(min(threads))]
+                      for n, rate in rates.items()}
+               for name, rates in throughput.items()}
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return dict(_environment(), gil=gil, calls=calls,
+                throughput=throughput, scaling=scaling)
+
+
+def compare(baseline: dict, current: dict,
+            threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    compares the results of two runs
+
+    :param baseline: results of the baseline run (see run)
+    :param current: results of the current run
+    :param threshold: relative slowdown flagged as a regression e.g. 0.1
+                      for cases more than 10% slower than the baseline
+    :return: list of dicts of name, baseline, current, ratio and regression
+             of the cases in both runs
+    """
+    rows = []
+    for name, base_ns in baseline["results"].items():
+        cur_ns = current["results"].get(name)
+        if cur_ns is None:
+            continue
+        ratio = cur_ns / base_ns if base_ns else float("inf")
+        rows.append({"name": name, "baseline": base_ns, "current": cur_ns,
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
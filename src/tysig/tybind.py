@@ -0,0 +1,191 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tybind.py
+
+    Binding engine used by TySig.signature. Binds positional and keyword
+    arguments to the signature params, caching a binding plan per call
+    shape so repeat calls only re-run the compiled checks of the args.
+"""
+
+from tysig.tyerrors import ARGS_ERROR, UNEXP_ERROR, UNEXP_KW_ERROR
+from tysig.tycompile import rejects_class
+from tysig.tyexplain import with_path
+
+SHAPE_CACHE_SIZE = 64
+
+# _NO_DEF represents no default value
+_NO_DEF = "__NO_DEF__"
+
+
+class Binder(object):
+    """
+    binds call arguments to signature params.
+
+    Positional args are matched against the params (not given as kwargs)
+    in order: an arg matching the param type is assigned to it, otherwise
+    the param default is used and the arg is tried against the next param.
+    The outcome of that search is cached per call shape, i.e. the keyword
+    names (in call order) and the concrete type() of each positional arg.
+    A repeat call with the same shape replays the cached binding, only
+    re-running the checks whose outcome is not decided by the shape, and
+    falls back to the search if any of them changed.
+    """
+
+    __slots__ = ('params', 'kw_plans', 'defaults', 'shapes', 'maxshapes')
+
+    def __init__(self, params: tuple, maxshapes: int = SHAPE_CACHE_SIZE):
+        """
+        :param params: tuple of (name, default, type, plan) of each param,
+                       default being _NO_DEF when there is none
+        :param maxshapes: maximum number of call shapes cached
+        """
+        self.params = params
+        self.kw_plans = {vname: (vtype, plan)
+                         for vname, _, vtype, plan in params}
+        self.defaults = tuple((vname, vdef) for vname, vdef, _, _ in params
+                              if vdef is not _NO_DEF)
+        self.shapes: dict = dict()
+        self.maxshapes = maxshapes
+
+    def bind(self, in_args: tuple, in_kwargs: dict) -> dict:
+        """
+        checks and binds in_args and in_kwargs to the signature params,
+        applying default values
+
+        :param in_args: positional arguments
+        :param in_kwargs: keyword arguments
+        :return: kwargs to call the function with
+        """
+        # check types in kwargs
+        kw_plans = self.kw_plans
+        for kw_name, kw_val in in_kwargs.items():
+            kw_plan = kw_plans.get(kw_name)
+            if kw_plan is None:
+                raise TypeError(UNEXP_KW_ERROR.format(kw_name))
+            if not kw_plan[1].check(kw_val):
+                raise TypeError(with_path(
+                    ARGS_ERROR.format(kw_name, kw_plan[0], type(kw_val)),
+                    kw_plan[1], kw_val, kw_name))
+
+        shape = self.shape(in_args, in_kwargs)
+        steps = self.shapes.get(shape)
+        kwargs = None if steps is None else self._replay(steps, in_args)
+        if kwargs is None:
+            kwargs, steps = self._search(in_args, in_kwargs)
+            # shared by threads without a lock: a shape bound concurrently
+            # is stored once per thread with the same steps, and the size
+            # may exceed maxshapes by the number of threads
+            if len(self.shapes) < self.maxshapes:
+                self.shapes[shape] = steps
+        return self._finalize(kwargs, in_kwargs)
+
+    def bind_unchecked(self, in_args: tuple, in_kwargs: dict) -> dict:
+        """
+        binds in_args and in_kwargs to the signature params without
+        checking their types, applying default values. Positional args are
+        bound using the cached binding of the call shape; a call shape not
+        seen before is bound (and so checked) by bind
+
+        :param in_args: positional arguments
+        :param in_kwargs: keyword arguments
+        :return: kwargs to call the function with
+        """
+        kw_plans = self.kw_plans
+        for kw_name in in_kwargs:
+            if kw_name not in kw_plans:
+                raise TypeError(UNEXP_KW_ERROR.format(kw_name))
+
+        steps = self.shapes.get(self.shape(in_args, in_kwargs))
+        if steps is None:
+            return self.bind(in_args, in_kwargs)
+        kwargs = dict()
+        for vname, idx, vdef, _, bound in steps:
+            kwargs[vname] = in_args[idx] if bound else vdef
+        return self._finalize(kwargs, in_kwargs)
+
+    @staticmethod
+    def shape(in_args: tuple, in_kwargs: dict) -> tuple:
+        """
+        :param in_args: positional arguments
+        :param in_kwargs: keyword arguments
+        :return: call shape, i.e. keyword names in call order and the
+                 concrete type() of each positional arg
+        """
+        return tuple(in_kwargs), tuple(map(type, in_args))
+
+    def _finalize(self, kwargs: dict, in_kwargs: dict) -> dict:
+        """
+        finalize kwargs, apply defaults
+
+        :param kwargs: kwargs bound from the positional args
+        :param in_kwargs: keyword arguments
+        :return: kwargs to call the function with
+        """
+        kwargs.update(in_kwargs)
+        for vname, vdef in self.defaults:
+            if kwargs.get(vname) is None:
+                kwargs[vname] = vdef
+        return kwargs
+
+    @staticmethod
+    def _replay(steps: tuple, in_args: tuple):
+        """
+        replays a cached binding
+
+        :param steps: cached binding steps of the call shape
+        :param in_args: positional arguments
+        :return: bound kwargs, or None if the binding no longer holds
+        """
+        kwargs = dict()
+        for vname, idx, vdef, check, bound in steps:
+            if bound:
+                arg = in_args[idx]
+                if not check(arg):
+                    return None
+                kwargs[vname] = arg
+            else:
+                if check is not None and check(in_args[idx]):
+                    return None
+                kwargs[vname] = vdef
+        return kwargs
+
+    def _search(self, in_args: tuple, in_kwargs: dict) -> tuple:
+        """
+        binds in_args to the params by checking each param type against
+        the next arg, recording the steps taken
+
+        :param in_args: positional arguments
+        :param in_kwargs: keyword arguments
+        :return: tuple of bound kwargs and binding steps
+        """
+        kwargs = dict()
+        steps = []
+        nargs = len(in_args)
+        idx = 0
+        for vname, vdef, vtype, plan in self.params:
+            if idx >= nargs:
+                break
+            if vname in in_kwargs:
+                continue
+            arg = in_args[idx]
+            # type matches, assign value in kwargs
+            if plan.check(arg):
+                kwargs[vname] = arg
+                steps.append((vname, idx, None, plan.check, True))
+                idx += 1
+            elif vdef is _NO_DEF:
+                raise TypeError(with_path(
+                    ARGS_ERROR.format(vname, vtype, type(arg)),
+                    plan, arg, vname))
+            else:  # assign default
+                kwargs[vname] = vdef
+                # re-check on replay unless the class of arg decides it
+                check = None if rejects_class(plan, type(arg)) \
+                    else plan.check
+                steps.append((vname, idx, vdef, check, False))
+
+        # final check to see if there are any remaining args
+        if idx < nargs:
+            raise TypeError(UNEXP_ERROR.format(list(in_args[idx:])))
+        return kwargs, tuple(steps)
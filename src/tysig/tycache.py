@@ -0,0 +1,284 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tycache.py
+
+    Validation result cache for deeply immutable values (tuples and
+    frozensets of str, bytes, numbers, None, ...). Results are keyed by
+    (object identity, compiled plan), so re-checking the same object
+    against the same type is an O(1) lookup instead of an O(size) walk.
+
+    Memo cache of the return values of signature decorated functions,
+    keyed by their bound and validated args (see signature cache=N).
+
+    Both caches are shared by threads without a lock: entries are read and
+    written with single (atomic) OrderedDict operations, an entry evicted
+    by another thread meanwhile is a miss, and the counters are per thread
+    (see ThreadCounters).
+"""
+
+from typing import Callable, Optional
+from collections import OrderedDict
+from time import monotonic
+from tysig.tycompile import Plan
+from tysig.tystats import ThreadCounters
+
+RESULT_CACHE_SIZE = 1024
+
+IMMUTABLE_SCALARS = frozenset((str, bytes, int, float, complex, bool,
+                               type(None)))
+IMMUTABLE_CONTAINERS = frozenset((tuple, frozenset))
+
+
+def is_deep_immutable(var) -> bool:
+    """
+    check if var is deeply immutable, i.e. a tuple or frozenset whose
+    elements are (recursively) immutable builtin scalars or containers.
+    Only exact builtin types are accepted, subclasses may be mutable
+
+    :param var: value to check
+    :return: True if var is deeply immutable, else False
+    """
+    stack = [var]
+    while stack:
+        x = stack.pop()
+        x_type = type(x)
+        if x_type in IMMUTABLE_CONTAINERS:
+            stack.extend(x)
+        elif x_type not in IMMUTABLE_SCALARS:
+            return False
+    return True
+
+
+class ResultCache(object):
+    """
+    LRU cache of validation results of deeply immutable values.
+
+    Builtin immutable types do not support weak references, so an entry
+    holds a reference to its value. The value is kept alive while cached,
+    so its id() cannot be reused by another object and the (id, plan) key
+    stays valid until the entry is evicted. maxsize bounds both the number
+    of entries and the number of values kept alive.
+
+    Tuples holding mutable values are never cached. They stay so, as a
+    tuple holds the same objects for its lifetime, so they are remembered
+    by id the same way (up to maxsize of them): checking them again skips
+    the immutability walk, and is counted neither as a hit nor a miss.
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE):
+        """
+        :param maxsize: maximum number of cached results
+        """
+        self.maxsize = maxsize
+        # hits, misses, evictions
+        self.counters = ThreadCounters(3)
+        self._results: OrderedDict = OrderedDict()
+        # id -> tuple / frozenset found not deeply immutable
+        self._mutable: OrderedDict = OrderedDict()
+        self._plans: dict = dict()
+
+    def check(self, plan: Plan, var) -> bool:
+        """
+        checks var against plan, using the cached result when var has been
+        checked against plan before
+
+        :param plan: compiled plan
+        :param var: value to check
+        :return: True if var is of the type of plan, else False
+        """
+        if type(var) not in IMMUTABLE_CONTAINERS:
+            return plan.check(var)
+        key = (id(var), plan)
+        counts = self.counters.local()
+        entry = self._results.get(key)
+        if entry is not None and entry[0] is var:
+            counts[0] += 1
+            try:
+                self._results.move_to_end(key)
+            except KeyError:  # evicted meanwhile
+                pass
+            return entry[1]
+        if self._mutable.get(key[0]) is var:
+            try:
+                self._mutable.move_to_end(key[0])
+            except KeyError:  # evicted meanwhile
+                pass
+            return plan.check(var)
+
+        result = plan.check(var)
+        if is_deep_immutable(var):
+            counts[1] += 1
+            self._results[key] = (var, result)
+            if len(self._results) > self.maxsize:
+                try:
+                    self._results.popitem(last=False)
+                    counts[2] += 1
+                except KeyError:  # emptied meanwhile
+                    pass
+        else:
+            self._mutable[key[0]] = var
+            if len(self._mutable) > self.maxsize:
+                try:
+                    self._mutable.popitem(last=False)
+                except KeyError:  # emptied meanwhile
+                    pass
+        return result
+
+    def cached(self, plan: Plan) -> Plan:
+        """
+        gets a plan checking values through this cache
+
+        :param plan: compiled plan
+        :return: plan with the same type and kind, whose check uses the
+                 cached results
+        """
+        cached_plan = self._plans.get(plan)
+        if cached_plan is None:
+            cached_plan = self._plans.setdefault(
+                plan, Plan(plan.check_type, plan.kind, plan.args,
+                           self._check_of(plan), plan.policy))
+        return cached_plan
+
+    def _check_of(self, plan: Plan) -> Callable[[object], bool]:
+        def check(var) -> bool:
+            return self.check(plan, var)
+        return check
+
+    def stats(self) -> dict:
+        """
+        :return: dict of hits, misses, evictions and size of the cache
+        """
+        hits, misses, evictions = self.counters.totals()
+        return {"hits": hits, "misses": misses, "evictions": evictions,
+                "size": len(self._results)}
+
+    def clear(self):
+        """
+        removes all cached results and resets the counters
+        """
+        self._results.clear()
+        self._mutable.clear()
+        self.counters.reset()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+RESULTS = ResultCache()
+
+
+# returned by MemoCache.get when there is no cached return value
+MEMO_MISS = object()
+
+
+class MemoCache(object):
+    """
+    LRU cache of the return values of a signature decorated function,
+    keyed by its bound args (defaults applied), the self object of methods
+    included. As in functools.lru_cache(typed=True), args of different
+    types are cached separately, e.g. 1, 1.0 and True. Entries expire ttl
+    seconds after they are stored. Calls whose key is unhashable (e.g. a
+    list arg) are not cached
+    """
+
+    def __init__(self, maxsize: int, names: tuple,
+                 ttl: Optional[float] = None,
+                 key: Optional[Callable[[dict], object]] = None):
+        """
+        :param maxsize: maximum number of cached return values
+        :param names: names of the params, in signature order
+        :param ttl: seconds a return value stays cached, default forever
+        :param key: function of the bound args (dict of param name to
+                    value) returning the hashable key of a call, default
+                    the tuple of the args and of their types
+        """
+        if maxsize < 1 or ttl is not None and ttl <= 0:
+            raise ValueError("Memo cache size and ttl must be > 0")
+        self.maxsize = maxsize
+        self.names = names
+        self.ttl = ttl
+        self.key = key
+        # hits, misses, evictions, expirations, uncached
+        self.counters = ThreadCounters(5)
+        self._results: OrderedDict = OrderedDict()
+
+    def key_of(self, kwargs: dict, obj=MEMO_MISS):
+        """
+        :param kwargs: bound args of a call
+        :param obj: self object of a method call
+        :return: key of the call
+        """
+        if self.key is not None:
+            key = self.key(kwargs)
+        else:
+            args = tuple(map(kwargs.get, self.names))
+            key = args + tuple(map(type, args))
+        return key if obj is MEMO_MISS else (obj, key)
+
+    def get(self, key):
+        """
+        :param key: key of a call, see key_of
+        :return: cached return value, or MEMO_MISS
+        """
+        counts = self.counters.local()
+        try:
+            entry = self._results.get(key)
+        except TypeError:  # unhashable arg
+            counts[4] += 1
+            return MEMO_MISS
+        if entry is None:
+            counts[1] += 1
+            return MEMO_MISS
+        if entry[1] is not None and entry[1] <= monotonic():
+            self._results.pop(key, None)
+            counts[3] += 1
+            counts[1] += 1
+            return MEMO_MISS
+        counts[0] += 1
+        try:
+            self._results.move_to_end(key)
+        except KeyError:  # evicted meanwhile
+            pass
+        return entry[0]
+
+    def put(self, key, value):
+        """
+        caches the return value of a call, evicting the least recently
+        used one when full
+
+        :param key: key of the call, see key_of
+        :param value: return value
+        """
+        expires = None if self.ttl is None else monotonic() + self.ttl
+        try:
+            self._results[key] = (value, expires)
+        except TypeError:  # unhashable arg
+            return
+        if len(self._results) > self.maxsize:
+            try:
+                self._results.popitem(last=False)
+                self.counters.local()[2] += 1
+            except KeyError:  # emptied meanwhile
+                pass
+
+    def stats(self) -> dict:
+        """
+        :return: dict of hits, misses, evictions, expirations, calls not
+                 cached (unhashable args) and size of the cache
+        """
+        hits, misses, evictions, expirations, uncached = \
+            self.counters.totals()
+        return {"hits": hits, "misses": misses, "evictions": evictions,
+                "expirations": expirations, "uncached": uncached,
+                "size": len(self._results)}
+
+    def clear(self):
+        """
+        removes all cached return values and resets the counters
+        """
+        self._results.clear()
+        self.counters.reset()
+
+    def __len__(self) -> int:
+        return len(self._results)
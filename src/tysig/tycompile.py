@@ -0,0 +1,865 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tycompile.py
+
+    Compiles types (including typing types) into validator plans. All of
+    the inspection of a type is done once at compile time, so checking a
+    value is a walk over pre-built closures. Plans are memoized in a
+    bounded cache keyed by the type object.
+"""
+
+from typing import Union, Callable, Optional, Dict
+from itertools import islice
+import collections.abc
+import threading
+import types
+import typing
+import weakref
+from tysig.typolicy import CheckPolicy, FULL_POLICY, FIRST, SAMPLE
+
+PLAN_CACHE_SIZE = 1024
+
+# plan kinds
+K_ANY = "any"
+K_ANYSTR = "anystr"
+K_INSTANCE = "instance"
+K_UNION = "union"
+K_LIST = "list"
+K_TUPLE = "tuple"
+K_DICT = "dict"
+K_ANNOTATED = "annotated"
+K_ITERATOR = "iterator"
+K_ITERABLE = "iterable"
+K_GENERATOR = "generator"
+K_ASYNC_ITERATOR = "async_iterator"
+K_ASYNC_ITERABLE = "async_iterable"
+K_ASYNC_GENERATOR = "async_generator"
+K_NEVER = "never"
+K_LITERAL = "literal"
+K_SET = "set"
+K_SEQUENCE = "sequence"
+K_MAPPING = "mapping"
+K_VARTUPLE = "vartuple"
+K_CUSTOM = "custom"
+K_EXPORTED = "exported"
+
+# cost hints of checks, ordering the members of a Union cheapest first
+COST_CONSTANT = 1  # e.g. isinstance, decided without walking the value
+COST_LINEAR = 1000  # e.g. List[int], walking the elements of the value
+
+# kinds of the plans of collections, whose values are instances of the
+# origin of their type e.g. set for Set[int]
+COLLECTION_KINDS = frozenset((K_LIST, K_TUPLE, K_DICT, K_SET, K_SEQUENCE,
+                              K_MAPPING, K_VARTUPLE))
+
+ANYSTR_TYPES = (str, bytes, bytearray)
+
+# kinds accepting array-like values under CheckPolicy(arrays=True)
+ARRAY_KINDS = frozenset((K_LIST, K_VARTUPLE, K_SEQUENCE))
+
+# origins of Union[int, str] and of int | str (python 3.10+)
+UNION_ORIGINS = (Union, getattr(types, 'UnionType', Union))
+
+# streams, only checked to be streams by the plan, their items are checked
+# lazily as they are consumed (see tylazy)
+LAZY_KINDS = {
+    collections.abc.Iterator: K_ITERATOR,
+    collections.abc.Iterable: K_ITERABLE,
+    collections.abc.Generator: K_GENERATOR,
+    collections.abc.AsyncIterator: K_ASYNC_ITERATOR,
+    collections.abc.AsyncIterable: K_ASYNC_ITERABLE,
+    collections.abc.AsyncGenerator: K_ASYNC_GENERATOR,
+}
+
+
+class Plan(object):
+    """
+    compiled validator for a single type. Calling the plan with a value
+    returns True if the value is of the compiled type, else False
+    """
+
+    __slots__ = ('check_type', 'kind', 'args', 'check', 'policy')
+
+    def __init__(self, check_type, kind: str, args: tuple,
+                 check: Callable[[object], bool],
+                 policy: CheckPolicy = FULL_POLICY):
+        """
+        :param check_type: type the plan was compiled from
+        :param kind: kind of check e.g. K_LIST, K_UNION
+        :param args: compiled plans of the sub argument types
+        :param check: function taking a value and returning True / False
+        :param policy: check policy the plan was compiled with
+        """
+        self.check_type = check_type
+        self.kind = kind
+        self.args = args
+        self.check = check
+        self.policy = policy
+
+    def __call__(self, var) -> bool:
+        return self.check(var)
+
+    def __repr__(self) -> str:
+        if self.policy.is_full:
+            return f"Plan({self.check_type!r}, kind='{self.kind}')"
+        return f"Plan({self.check_type!r}, kind='{self.kind}', " \
+               f"policy={self.policy!r})"
+
+
+def _check_any(var) -> bool:
+    return True
+
+
+def _check_anystr(var) -> bool:
+    return isinstance(var, ANYSTR_TYPES)
+
+
+def _check_never(var) -> bool:
+    return False
+
+
+def _instance_check(check_type) -> Callable[[object], bool]:
+    def check(var) -> bool:
+        return isinstance(var, check_type)
+    return check
+
+
+def _union_check(args: tuple) -> Callable[[object], bool]:
+    checks = tuple(x.check for x in args)
+
+    def check(var) -> bool:
+        for sub_check in checks:
+            if sub_check(var):
+                return True
+        return False
+    return check
+
+
+def _typed_as(var, check_type) -> bool:
+    """
+    check if var is a checked container (see tytyped) of type check_type,
+    i.e. whose elements were checked as they were stored
+
+    :param var: list / dict value, not of the exact builtin type
+    :param check_type: List / Dict type
+    :return: True if var is a checked container of check_type, else False
+    """
+    return getattr(var, 'typed_as', None) == check_type
+
+
+def _sample(var, size: int, rng) -> list:
+    """
+    draws size elements of var at random without copying var: sequences
+    are indexed, other collections are walked once up to the last drawn
+    position
+
+    :param var: sized collection e.g. list, set, dict items view
+    :param size: number of elements drawn, at most len(var)
+    :param rng: random.Random drawing the positions
+    :return: drawn elements
+    """
+    if isinstance(var, collections.abc.Sequence):
+        return [var[i] for i in rng.sample(range(len(var)), size)]
+    elems, it, pos = [], iter(var), 0
+    for i in sorted(rng.sample(range(len(var)), size)):
+        elems.append(next(islice(it, i - pos, None)))
+        pos = i + 1
+    return elems
+
+
+def _list_check(check_type, args: tuple,
+                policy: CheckPolicy) -> Callable[[object], bool]:
+    elem = args[0]
+    if elem.kind == K_ANY:
+        return _instance_check(list)
+    elem_check = elem.check
+
+    if policy.mode == FIRST:
+        limit = policy.n
+
+        def check(var) -> bool:
+            if not isinstance(var, list):
+                return False
+            if type(var) is not list and _typed_as(var, check_type):
+                return True
+            for x in islice(var, limit):
+                if not elem_check(x):
+                    return False
+            return True
+    elif policy.mode == SAMPLE:
+        size, rng = policy.n, policy.rng
+
+        def check(var) -> bool:
+            if not isinstance(var, list):
+                return False
+            if type(var) is not list and _typed_as(var, check_type):
+                return True
+            if len(var) > size:
+                var = _sample(var, size, rng)
+            for x in var:
+                if not elem_check(x):
+                    return False
+            return True
+    else:
+        def check(var) -> bool:
+            if not isinstance(var, list):
+                return False
+            if type(var) is not list and _typed_as(var, check_type):
+                return True
+            for x in var:
+                if not elem_check(x):
+                    return False
+            return True
+    return check
+
+
+def _tuple_check(args: tuple) -> Callable[[object], bool]:
+    checks = tuple(x.check for x in args)
+    size = len(checks)
+
+    def check(var) -> bool:
+        if not isinstance(var, tuple) or len(var) != size:
+            return False
+        for sub_check, x in zip(checks, var):
+            if not sub_check(x):
+                return False
+        return True
+    return check
+
+
+def _dict_check(check_type, args: tuple, policy: CheckPolicy,
+                top=dict) -> Callable[[object], bool]:
+    if args[0].kind == K_ANY and args[1].kind == K_ANY:
+        return _instance_check(top)
+    key_check = args[0].check
+    val_check = args[1].check
+
+    if policy.mode == FIRST:
+        limit = policy.n
+
+        def check(var) -> bool:
+            if not isinstance(var, top):
+                return False
+            if type(var) is not dict and _typed_as(var, check_type):
+                return True
+            for x in islice(var.keys(), limit):
+                if not key_check(x):
+                    return False
+            for x in islice(var.values(), limit):
+                if not val_check(x):
+                    return False
+            return True
+    elif policy.mode == SAMPLE:
+        size, rng = policy.n, policy.rng
+
+        def check(var) -> bool:
+            if not isinstance(var, top):
+                return False
+            if type(var) is not dict and _typed_as(var, check_type):
+                return True
+            if len(var) > size:
+                items = _sample(var.items(), size, rng)
+            else:
+                items = var.items()
+            for x, y in items:
+                if not key_check(x) or not val_check(y):
+                    return False
+            return True
+    else:
+        def check(var) -> bool:
+            if not isinstance(var, top):
+                return False
+            if type(var) is not dict and _typed_as(var, check_type):
+                return True
+            for x in var.keys():
+                if not key_check(x):
+                    return False
+            for x in var.values():
+                if not val_check(x):
+                    return False
+            return True
+    return check
+
+
+def _annotated_check(args: tuple,
+                     constraints: tuple) -> Callable[[object], bool]:
+    base_check = args[0].check
+
+    def check(var) -> bool:
+        if not base_check(var):
+            return False
+        for constraint in constraints:
+            if not constraint.check(var):
+                return False
+        return True
+    return check
+
+
+def _with_arrays(check: Callable[[object], bool],
+                 plan: Plan) -> Callable[[object], bool]:
+    from tysig.tyarray import array_check, is_array_like
+    arr_check = array_check(plan)
+
+    if plan.kind == K_LIST:
+        def with_arrays(var) -> bool:
+            if isinstance(var, list):
+                return check(var)
+            return arr_check(var)
+    else:  # Tuple[T, ...] / Sequence[T]: other values are checked as usual
+        def with_arrays(var) -> bool:
+            if isinstance(var, (tuple, list)) or not is_array_like(var):
+                return check(var)
+            return arr_check(var)
+    return with_arrays
+
+
+def _is_instance_type(check_type) -> bool:
+    """
+    check if check_type can be used directly with isinstance
+
+    :param check_type: type to probe
+    :return: True if isinstance accepts check_type, else False
+    """
+    try:
+        isinstance(None, check_type)
+    except TypeError:
+        return False
+    return True
+
+
+def _collection_check(top, args: tuple,
+                      policy: CheckPolicy) -> Callable[[object], bool]:
+    """
+    check of the collections whose elements are all of the same type e.g.
+    Set[int], Sequence[str] or Tuple[int, ...]
+
+    :param top: class of the collection e.g. set, collections.abc.Sequence
+    :param args: compiled plan of the elements
+    :param policy: check policy applied to the elements
+    :return: check function
+    """
+    elem = args[0]
+    if elem.kind == K_ANY:
+        return _instance_check(top)
+    elem_check = elem.check
+    limit = policy.n if policy.mode == FIRST else None
+    size = policy.n if policy.mode == SAMPLE else None
+
+    def check(var) -> bool:
+        if not isinstance(var, top):
+            return False
+        if size is not None and len(var) > size:
+            elems = _sample(var, size, policy.rng)
+        else:
+            elems = islice(var, limit)
+        for x in elems:
+            if not elem_check(x):
+                return False
+        return True
+    return check
+
+
+def _literal_check(values: tuple) -> Callable[[object], bool]:
+    # Literal[1] does not accept True or 1.0: types are compared as well
+    pairs = tuple((type(x), x) for x in values)
+
+    def check(var) -> bool:
+        var_type = type(var)
+        for value_type, value in pairs:
+            if var_type is value_type and var == value:
+                return True
+        return False
+    return check
+
+
+# builders of the plans of subscripted types, keyed by the origin of the
+# type (typing.get_origin) e.g. list for both List[int] and list[int].
+# Each builder takes (check_type, origin, type args, cache, policy)
+BUILDERS: Dict[object, Callable[..., Plan]] = dict()
+
+
+def _builder(*origins):
+    def register(build: Callable[..., Plan]) -> Callable[..., Plan]:
+        for origin in origins:
+            BUILDERS[origin] = build
+        return build
+    return register
+
+
+@_builder(*UNION_ORIGINS)
+def _build_union(check_type, origin, type_args: tuple, cache, policy):
+    # members are tried cheapest first, in declared order on equal cost
+    args = tuple(sorted(_sub_plans(type_args, cache, policy), key=plan_cost))
+    return Plan(check_type, K_UNION, args, _union_check(args), policy)
+
+
+@_builder(typing.Annotated)
+def _build_annotated(check_type, origin, type_args: tuple, cache, policy):
+    from tysig.tyarray import Constraint
+    args = _sub_plans(type_args[:1], cache, policy)
+    constraints = tuple(x for x in check_type.__metadata__
+                        if isinstance(x, Constraint))
+    return Plan(check_type, K_ANNOTATED, args,
+                _annotated_check(args, constraints), policy)
+
+
+@_builder(typing.Literal)
+def _build_literal(check_type, origin, type_args: tuple, cache, policy):
+    return Plan(check_type, K_LITERAL, (), _literal_check(type_args), policy)
+
+
+@_builder(list)
+def _build_list(check_type, origin, type_args: tuple, cache, policy):
+    if len(type_args) != 1:
+        return _build_never(check_type, origin, type_args, cache, policy)
+    args = _sub_plans(type_args, cache, policy.sub())
+    plan = Plan(check_type, K_LIST, args,
+                _list_check(check_type, args, policy), policy)
+    if policy.arrays:
+        plan.check = _with_arrays(plan.check, plan)
+    return plan
+
+
+@_builder(tuple)
+def _build_tuple(check_type, origin, type_args: tuple, cache, policy):
+    if type_args == ((),):  # Tuple[()] before python 3.11
+        type_args = ()
+    if len(type_args) == 2 and type_args[1] is Ellipsis:  # Tuple[int, ...]
+        args = _sub_plans(type_args[:1], cache, policy.sub())
+        plan = Plan(check_type, K_VARTUPLE, args,
+                    _collection_check(tuple, args, policy), policy)
+        if policy.arrays:
+            plan.check = _with_arrays(plan.check, plan)
+        return plan
+    args = _sub_plans(type_args, cache, policy.sub())
+    return Plan(check_type, K_TUPLE, args, _tuple_check(args), policy)
+
+
+@_builder(dict)
+def _build_dict(check_type, origin, type_args: tuple, cache, policy):
+    if len(type_args) != 2:
+        return _build_never(check_type, origin, type_args, cache, policy)
+    args = _sub_plans(type_args, cache, policy.sub())
+    return Plan(check_type, K_DICT, args,
+                _dict_check(check_type, args, policy), policy)
+
+
+@_builder(collections.abc.Mapping, collections.abc.MutableMapping)
+def _build_mapping(check_type, origin, type_args: tuple, cache, policy):
+    if len(type_args) != 2:
+        return _build_never(check_type, origin, type_args, cache, policy)
+    args = _sub_plans(type_args, cache, policy.sub())
+    return Plan(check_type, K_MAPPING, args,
+                _dict_check(check_type, args, policy, origin), policy)
+
+
+@_builder(set, frozenset, collections.abc.Set, collections.abc.MutableSet)
+def _build_set(check_type, origin, type_args: tuple, cache, policy):
+    args = _sub_plans(type_args[:1], cache, policy.sub())
+    return Plan(check_type, K_SET, args,
+                _collection_check(origin, args, policy), policy)
+
+
+@_builder(collections.abc.Sequence, collections.abc.MutableSequence)
+def _build_sequence(check_type, origin, type_args: tuple, cache, policy):
+    args = _sub_plans(type_args[:1], cache, policy.sub())
+    plan = Plan(check_type, K_SEQUENCE, args,
+                _collection_check(origin, args, policy), policy)
+    if policy.arrays:
+        plan.check = _with_arrays(plan.check, plan)
+    return plan
+
+
+@_builder(*LAZY_KINDS)
+def _build_lazy(check_type, origin, type_args: tuple, cache, policy):
+    args = _sub_plans(type_args, cache, policy.sub())
+    return Plan(check_type, LAZY_KINDS[origin], args,
+                _instance_check(origin), policy)
+
+
+def _build_never(check_type, origin, type_args: tuple, cache, policy):
+    return Plan(check_type, K_NEVER, (), _check_never, policy)
+
+
+# user checkers (see register_checker): type or origin -> (fn, cost hint)
+CHECKERS: Dict[object, tuple] = dict()
+
+
+def _checker_of(key) -> Optional[tuple]:
+    """
+    :param key: type, or origin of a subscripted type
+    :return: (fn, cost hint) registered for key, or None
+    """
+    if not CHECKERS:
+        return None
+    try:
+        return CHECKERS.get(key)
+    except TypeError:  # unhashable
+        return None
+
+
+def _custom_check(fn: Callable[[object, object], bool],
+                  check_type) -> Callable[[object], bool]:
+    def check(var) -> bool:
+        return bool(fn(var, check_type))
+    return check
+
+
+def register_checker(type_or_origin, fn: Callable[[object, object], bool],
+                     cost_hint: int = COST_LINEAR):
+    """
+    registers the check of a type, or of the types subscripted from an
+    origin, replacing the isinstance / builtin check of the type. Plans
+    compiled before are dropped from every plan cache (PLANS, the adaptive
+    plans of tyadapt.ADAPTIVE, ...), but validators
+    already compiled (e.g. of decorated functions) keep their checks, so
+    checkers are best registered on import, before decorating
+
+    :param type_or_origin: class e.g. RecordBatch, or generic origin
+    :param fn: check taking the value and the type checked against e.g.
+               RecordBatch[Schema], returning True / False
+    :param cost_hint: relative cost of fn e.g. COST_CONSTANT for checks
+                      decided from the value's own metadata; members of a
+                      Union are checked cheapest first
+    """
+    CHECKERS[type_or_origin] = (fn, cost_hint)
+    _clear_caches()
+
+
+def unregister_checker(type_or_origin):
+    """
+    removes the check registered for a type or origin
+
+    :param type_or_origin: class or generic origin
+    """
+    CHECKERS.pop(type_or_origin, None)
+    _clear_caches()
+
+
+def plan_cost(plan: Plan) -> int:
+    """
+    estimates the relative cost of checking a value against plan
+
+    :param plan: compiled plan
+    :return: cost estimate, see COST_CONSTANT and COST_LINEAR
+    """
+    kind = plan.kind
+    if kind == K_CUSTOM:
+        origin = typing.get_origin(plan.check_type)
+        checker = _checker_of(plan.check_type if origin is None else origin)
+        return COST_LINEAR if checker is None else checker[1]
+    if kind in (K_UNION, K_TUPLE, K_ANNOTATED):
+        return COST_CONSTANT + sum(plan_cost(x) for x in plan.args)
+    if kind in COLLECTION_KINDS or kind == K_EXPORTED:
+        return COST_LINEAR
+    return COST_CONSTANT
+
+
+def _nested_types(check_type) -> tuple:
+    """
+    :param check_type: type
+    :return: types nested in check_type compiled to its sub plans, e.g.
+             not the values of a Literal or the metadata of an Annotated
+    """
+    origin = typing.get_origin(check_type)
+    if origin is None or origin is typing.Literal:
+        return ()
+    type_args = typing.get_args(check_type)
+    if origin is typing.Annotated:
+        return type_args[:1]
+    return tuple(x for x in type_args
+                 if x is not Ellipsis and not isinstance(x, (list, tuple)))
+
+
+def compile_plan(check_type, cache: Optional['PlanCache'] = None,
+                 policy: CheckPolicy = FULL_POLICY) -> Plan:
+    """
+    compiles check_type into a Plan. Sub argument types are compiled
+    through cache (when given) so nested plans are shared between types.
+
+    Subscripted types are compiled by the builder registered for their
+    origin (see BUILDERS), so List[int] and list[int], Union[int, None]
+    and int | None, Set / FrozenSet / Sequence / Mapping and their builtin
+    and collections.abc counterparts are all handled alike
+
+    :param check_type: type to compile
+    :param cache: plan cache used for the sub argument types
+    :param policy: check policy applied to List / Dict elements
+    :return: compiled Plan
+    """
+    type_origin = typing.get_origin(check_type)
+    checker = _checker_of(check_type if type_origin is None else type_origin)
+    if checker is not None:
+        return Plan(check_type, K_CUSTOM, (),
+                    _custom_check(checker[0], check_type), policy)
+
+    # a Union of classes also works with isinstance (python 3.10+), but is
+    # compiled per member so the plan has the same structure on all versions
+    if type_origin not in UNION_ORIGINS and _is_instance_type(check_type):
+        return Plan(check_type, K_INSTANCE, (), _instance_check(check_type),
+                    policy)
+
+    if type_origin is None:
+        if check_type is typing.Any:
+            return Plan(check_type, K_ANY, (), _check_any, policy)
+        elif check_type is typing.AnyStr:
+            return Plan(check_type, K_ANYSTR, (), _check_anystr, policy)
+        elif check_type is None:
+            return Plan(check_type, K_INSTANCE, (),
+                        _instance_check(type(None)), policy)
+        else:  # otherwise
+            return Plan(check_type, K_NEVER, (), _check_never, policy)
+
+    build = BUILDERS.get(type_origin)
+    if build is None:  # e.g. Callable[..., int], user generics
+        if isinstance(type_origin, type):
+            return Plan(check_type, K_INSTANCE, (),
+                        _instance_check(type_origin), policy)
+        build = _build_never
+    return build(check_type, type_origin, typing.get_args(check_type),
+                 cache, policy)
+
+
+def _sub_plans(type_args: tuple, cache: Optional['PlanCache'],
+               policy: Optional[CheckPolicy]) -> tuple:
+    """
+    compiles the sub argument types of a type
+
+    :param type_args: sub argument types
+    :param cache: plan cache to compile through, if any
+    :param policy: check policy of the sub arguments, None when they are
+                   beyond the maximum depth and are not checked
+    :return: tuple of compiled plans
+    """
+    if policy is None:
+        return tuple(ANY_PLAN for _ in type_args)
+    if cache is None:
+        return tuple(compile_plan(x, None, policy) for x in type_args)
+    return tuple(cache.get(x, policy) for x in type_args)
+
+
+def _plain_class(cls) -> bool:
+    """
+    check if isinstance on instances of cls depends on cls alone, i.e. no
+    class in its mro overrides __class__ (e.g. proxies and mocks)
+
+    :param cls: class of a value
+    :return: True if instances of cls report cls as their class
+    """
+    return all('__class__' not in vars(x) for x in cls.__mro__[:-1])
+
+
+def rejects_class(plan: Plan, cls) -> bool:
+    """
+    check if plan rejects every value whose type() is cls, i.e. whether a
+    failing check is decided by the top-level class of the value alone
+
+    :param plan: compiled plan
+    :param cls: concrete class of a value
+    :return: True if every value of class cls fails plan, else False
+    """
+    if plan.kind == K_NEVER:
+        return True
+    if plan.kind == K_ANY or not _plain_class(cls):
+        return False
+    if plan.kind == K_UNION:
+        return all(rejects_class(x, cls) for x in plan.args)
+    if plan.kind == K_ANNOTATED:
+        return rejects_class(plan.args[0], cls)
+    if plan.kind in ARRAY_KINDS and plan.policy.arrays:
+        # array-like values of any class may pass, str values of Sequence
+        return plan.kind != K_SEQUENCE and issubclass(cls, ANYSTR_TYPES)
+    if plan.kind == K_INSTANCE:
+        if type(plan.check_type) is not type:  # e.g. ABCMeta, Union
+            return False
+        return not issubclass(cls, plan.check_type)
+    if plan.kind == K_ANYSTR:
+        return not issubclass(cls, ANYSTR_TYPES)
+    if plan.kind == K_LITERAL:
+        return all(type(x) is not cls
+                   for x in typing.get_args(plan.check_type))
+    if plan.kind in COLLECTION_KINDS:
+        return not issubclass(cls, typing.get_origin(plan.check_type))
+    return False
+
+
+def accepts_class(plan: Plan, cls) -> bool:
+    """
+    check if plan accepts every value whose type() is cls, i.e. whether a
+    passing check is decided by the top-level class of the value alone
+
+    :param plan: compiled plan
+    :param cls: concrete class of a value
+    :return: True if every value of class cls passes plan, else False
+    """
+    if plan.kind == K_ANY:
+        return True
+    if not _plain_class(cls):
+        return False
+    if plan.kind == K_UNION:
+        return any(accepts_class(x, cls) for x in plan.args)
+    if plan.kind == K_ANYSTR:
+        return issubclass(cls, ANYSTR_TYPES)
+    if plan.kind == K_INSTANCE and type(plan.check_type) is type:
+        return issubclass(cls, plan.check_type)
+    return False
+
+
+# every plan cache, cleared when the checkers change
+_CACHES: weakref.WeakSet = weakref.WeakSet()
+
+
+def _clear_caches():
+    """
+    drops the plans compiled by every plan cache, e.g. compiled with the
+    checkers registered before
+    """
+    for cache in list(_CACHES):
+        cache.clear()
+
+
+class PlanCache(object):
+    """
+    bounded cache of compiled plans keyed by the type object. When full,
+    the oldest plan is evicted. Unhashable types are compiled uncached.
+
+    Hits are lock free dict lookups. On a miss the plan is compiled without
+    holding the lock, then published once under it: threads compiling the
+    same type concurrently all get the plan published first
+    """
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        """
+        :param maxsize: maximum number of plans kept in the cache
+        """
+        self.maxsize = maxsize
+        self._plans: dict = dict()
+        self._lock = threading.Lock()
+        _CACHES.add(self)
+
+    def get(self, check_type, policy: CheckPolicy = FULL_POLICY) -> Plan:
+        """
+        gets the compiled plan of check_type, compiling it on a miss
+
+        :param check_type: type to get the plan of
+        :param policy: check policy applied to List / Dict elements
+        :return: compiled Plan
+        """
+        if policy is FULL_POLICY or policy == FULL_POLICY:
+            key, policy = check_type, FULL_POLICY
+        else:
+            key = (check_type, policy)
+        try:
+            return self._plans[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable, e.g. Literal of a list
+            return compile_plan(check_type, self, policy)
+
+        return self._publish(key, self._compile(check_type, policy))
+
+    def _compile(self, check_type, policy: CheckPolicy) -> Plan:
+        """
+        compiles check_type on a miss. Its nested types not cached yet are
+        compiled first, innermost first, so the builders only find cached
+        sub plans and the python recursion depth of compiling does not grow
+        with the nesting of check_type
+
+        :param check_type: type to compile
+        :param policy: check policy applied to List / Dict elements
+        :return: compiled Plan
+        """
+        if policy.sub() is policy:  # sub types are cached under policy
+            for sub_type in reversed(self._uncached(check_type, policy)):
+                self.get(sub_type, policy)
+        return compile_plan(check_type, self, policy)
+
+    def _uncached(self, check_type, policy: CheckPolicy) -> list:
+        """
+        :param check_type: type to compile
+        :param policy: check policy the sub types are compiled under
+        :return: nested types of check_type without a cached plan, each
+                 listed before its own nested types
+        """
+        found, stack = [], list(_nested_types(check_type))
+        while stack:
+            sub_type = stack.pop()
+            key = sub_type if policy is FULL_POLICY else (sub_type, policy)
+            try:
+                if key in self._plans:
+                    continue
+            except TypeError:  # unhashable, compiled uncached
+                continue
+            found.append(sub_type)
+            stack.extend(_nested_types(sub_type))
+        return found
+
+    def get_compiled(self, check_type,
+                     policy: CheckPolicy = FULL_POLICY) -> Plan:
+        """
+        gets the plan of check_type with its sub plans, compiling the types
+        of installed (exported) plans, which keep only their check
+
+        :param check_type: type to get the plan of
+        :param policy: check policy applied to List / Dict elements
+        :return: compiled Plan
+        """
+        plan = self.get(check_type, policy)
+        if plan.kind == K_EXPORTED:
+            plan = compile_plan(check_type, self, policy)
+        return plan
+
+    def install(self, plan: Plan):
+        """
+        installs a plan built elsewhere (e.g. exported, see tyexport) as
+        the plan of its type under the full check policy
+
+        :param plan: plan to install
+        """
+        with self._lock:
+            self._store(plan.check_type, plan)
+
+    def _publish(self, key, plan: Plan) -> Plan:
+        """
+        :param key: cache key of plan
+        :param plan: plan compiled on a miss
+        :return: plan of key, the one published by another thread if it
+                 was compiled concurrently
+        """
+        with self._lock:
+            published = self._plans.get(key)
+            if published is not None:
+                return published
+            self._store(key, plan)
+        return plan
+
+    def _store(self, key, plan: Plan):
+        # called with the lock held
+        if key not in self._plans and len(self._plans) >= self.maxsize:
+            try:
+                del self._plans[next(iter(self._plans))]
+            except (KeyError, StopIteration):
+                pass
+        self._plans[key] = plan
+
+    def clear(self):
+        """
+        removes all compiled plans from the cache
+        """
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __contains__(self, check_type) -> bool:
+        try:
+            return check_type in self._plans
+        except TypeError:
+            return False
+
+
+ANY_PLAN = Plan(typing.Any, K_ANY, (), _check_any)
+
+PLANS = PlanCache()
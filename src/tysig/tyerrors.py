@@ -17,4 +17,39 @@ ARGS_ERROR = "'{}' type should be '{}' instead found '{}'. If "\
 
 UNEXP_ERROR = "Found unexpected extra arguments: {}"
 
+UNEXP_KW_ERROR = "Unexpected variable found: '{}'"
+
 RET_TYPE_ERROR = "Return object type does not match signature return type {}"
+
+ITEM_ERROR = "'{}' item {} type should be '{}' instead found '{}'"
+
+SEND_ERROR = "'{}' sent value type should be '{}' instead found '{}'"
+
+GEN_RET_ERROR = "'{}' generator return value type should be '{}' instead "\
+                "found '{}'"
+
+PATH_ERROR = "{}: expected {}, got {}"
+
+FAILED_AT_ERROR = "{}. Failed at {}"
+
+TYPED_ERROR = "'{}' {} type should be '{}' instead found '{}'"
+
+TYPED_TYPE_ERROR = "Expected a List or Dict type for a checked container "\
+                   "instead found '{}'"
+
+RECORD_FIELD_ERROR = "'{}' is a reserved name and cannot be a record field"
+
+RECORD_DEFAULT_ERROR = "Record field '{}' without a default value follows "\
+                       "field '{}' with a default value"
+
+MISSING_ERROR = "'{}' field is missing and has no default value"
+
+ROW_ERROR = "Expected a {} as row"
+
+STREAM_FORMAT_ERROR = "Expected stream format 'jsonl' or 'csv' instead "\
+                      "found '{}'"
+
+JSON_TYPE_ERROR = "'{}' JSON value should be of type '{}'"
+
+MEMO_ERROR = "Cannot memoize '{}': generators and Iterator / Iterable args "\
+             "and return values are consumed once"
@@ -0,0 +1,156 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyexplain.py
+
+    Explains failed checks. The compiled checks are plain boolean walks
+    with no bookkeeping; only once a check has failed is the value walked
+    again, here, tracking the path to the element that failed e.g.
+    history['1'][0][0][1][2]: expected Union[str, float], got int
+"""
+
+from typing import Optional, Tuple, get_origin
+from itertools import islice
+from tysig.tyerrors import PATH_ERROR, FAILED_AT_ERROR
+from tysig.tycompile import Plan, K_UNION, K_LIST, K_TUPLE, K_DICT, \
+    K_ANNOTATED, K_SET, K_SEQUENCE, K_MAPPING, K_VARTUPLE, K_EXPORTED, \
+    PlanCache, compile_plan, rejects_class
+from tysig.typolicy import FIRST
+
+
+def type_name(check_type) -> str:
+    """
+    :param check_type: type
+    :return: short name of check_type e.g. int, List[Union[str, float]]
+    """
+    if isinstance(check_type, type):
+        return check_type.__name__
+    return repr(check_type).replace("typing.", "")
+
+
+# kinds of the plans of collections whose elements are all of one type
+_ELEMENT_KINDS = (K_LIST, K_SEQUENCE, K_VARTUPLE, K_SET)
+
+
+def _items(plan: Plan, pairs):
+    """
+    :param plan: compiled collection / Dict plan
+    :param pairs: (index / key, element) pairs of the value
+    :return: pairs checked by plan. Sampled elements cannot be replayed,
+             so every element is walked
+    """
+    if plan.policy.mode == FIRST:
+        return islice(pairs, plan.policy.n)
+    return pairs
+
+
+def find_failure(plan: Plan, var, name: str) -> Optional[Tuple[str, Plan,
+                                                                object]]:
+    """
+    finds the innermost element of var failing plan
+
+    A failing Union is explained by its only member accepting the class of
+    the value, if there is one, otherwise the Union itself is reported
+
+    :param plan: compiled plan var failed
+    :param var: value that failed plan
+    :param name: name of var, the root of the path
+    :return: tuple of path, plan and value of the failing element, or None
+             if var passes plan
+    """
+    path = name
+    while True:
+        if plan.check(var):
+            return None
+        if plan.kind == K_EXPORTED:
+            # exported validators keep no sub plans, compile them to explain
+            plan = compile_plan(plan.check_type, PlanCache())
+            continue
+        kind = plan.kind
+
+        if kind == K_UNION:
+            candidates = [x for x in plan.args
+                          if not rejects_class(x, type(var))]
+            if len(candidates) != 1:
+                return path, plan, var
+            plan = candidates[0]
+            continue
+
+        elif kind == K_ANNOTATED:
+            if not plan.args[0].check(var):
+                plan = plan.args[0]
+                continue
+            return path, plan, var  # a constraint failed
+
+        elif kind in _ELEMENT_KINDS and \
+                isinstance(var, get_origin(plan.check_type)):
+            elem = plan.args[0]
+            for idx, x in _items(plan, enumerate(var)):
+                if not elem.check(x):
+                    item = f" item {x!r}" if kind == K_SET else f"[{idx}]"
+                    plan, var, path = elem, x, path + item
+                    break
+            else:
+                return path, plan, var
+            continue
+
+        elif kind == K_TUPLE and isinstance(var, tuple) and \
+                len(var) == len(plan.args):
+            for idx, (sub_plan, x) in enumerate(zip(plan.args, var)):
+                if not sub_plan.check(x):
+                    plan, var, path = sub_plan, x, f"{path}[{idx}]"
+                    break
+            else:
+                return path, plan, var
+            continue
+
+        elif kind in (K_DICT, K_MAPPING) and \
+                isinstance(var, get_origin(plan.check_type)):
+            key_plan, val_plan = plan.args
+            for key, x in _items(plan, var.items()):
+                if not key_plan.check(key):
+                    plan, var, path = key_plan, key, f"{path} key {key!r}"
+                    break
+                if not val_plan.check(x):
+                    plan, var, path = val_plan, x, f"{path}[{key!r}]"
+                    break
+            else:
+                return path, plan, var
+            continue
+
+        return path, plan, var
+
+
+def explain(plan: Plan, var, name: str) -> str:
+    """
+    explains why var failed plan
+
+    :param plan: compiled plan var failed
+    :param var: value that failed plan
+    :param name: name of var, the root of the path
+    :return: description of the failing element e.g.
+             "history['1'][0]: expected float, got str", or "" if the
+             failure is var itself, or if var passes plan
+    """
+    failure = find_failure(plan, var, name)
+    if failure is None or failure[0] == name:
+        return ""
+    path, sub_plan, x = failure
+    return PATH_ERROR.format(path, type_name(sub_plan.check_type),
+                             type_name(type(x)))
+
+
+def with_path(message: str, plan: Plan, var, name: str) -> str:
+    """
+    appends the failing path of var (see explain) to an error message
+
+    :param message: error message
+    :param plan: compiled plan var failed
+    :param var: value that failed plan
+    :param name: name of var, the root of the path
+    :return: message, followed by the failing path if within var
+    """
+    explanation = explain(plan, var, name)
+    if not explanation:
+        return message
+    return FAILED_AT_ERROR.format(message, explanation)
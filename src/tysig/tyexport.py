@@ -0,0 +1,426 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyexport.py
+
+    Ahead of time export of validators. The types of the signature
+    decorated functions and the type aliases of a module are compiled to a
+    generated python module of straight-line validator functions. Importing
+    the generated module installs its validators in the plan cache, so
+    signature and is_type use them instead of compiling the types.
+
+        python -m tysig export pkg.module -o pkg/_validators.py
+
+    Only types built from builtin, typing and collections.abc types are
+    exported, so the generated module imports none of the exported modules
+    and can be imported first. Other types are compiled as usual, as are
+    top-level Any, AnyStr, Literal and plain classes, whose compiled plans
+    are cheaper than a validator call.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, get_type_hints
+import builtins
+import collections.abc
+import importlib
+import inspect
+import types
+import typing
+from tysig.tycompile import Plan, PlanCache, PLANS, compile_plan, K_ANY, \
+    K_ANYSTR, K_INSTANCE, K_UNION, K_LIST, K_TUPLE, K_DICT, K_LITERAL, \
+    K_SET, K_SEQUENCE, K_MAPPING, K_VARTUPLE, K_NEVER, K_EXPORTED
+from tysig.typolicy import FULL_POLICY
+
+# kinds of the plans exported, others are compiled at runtime
+EXPORTED_KINDS = frozenset((K_ANY, K_ANYSTR, K_INSTANCE, K_UNION, K_LIST,
+                            K_TUPLE, K_DICT, K_LITERAL, K_SET, K_SEQUENCE,
+                            K_MAPPING, K_VARTUPLE, K_NEVER))
+
+# kinds exported as sub plans only: installed as top-level plans they would
+# replace plans decided by class (see rejects_class) by opaque K_EXPORTED
+# ones, e.g. List[Any] would then walk its elements
+SUB_PLAN_KINDS = frozenset((K_ANY, K_ANYSTR, K_INSTANCE, K_LITERAL, K_NEVER))
+
+# types of the Literal values exported
+LITERAL_TYPES = (int, str, bytes, bool, type(None))
+
+# nesting of blocks inlined in a validator before calling a sub validator
+MAX_INLINE_DEPTH = 8
+
+HEADER = '''"""
+    Validators generated by: python -m tysig export {modules}
+
+    Do not edit, re-run the export instead. Importing this module installs
+    the validators, used by TySig.signature and TySig.is_type in place of
+    compiling the types.
+"""
+
+import typing
+import collections.abc
+from tysig.tyexport import install
+'''
+
+
+def install(*pairs: tuple):
+    """
+    installs exported validators in the plan cache PLANS
+
+    :param pairs: (type, validator function) of each exported type
+    """
+    for check_type, check in pairs:
+        PLANS.install(Plan(check_type, K_EXPORTED, (), check, FULL_POLICY))
+
+
+def type_source(check_type) -> Optional[str]:
+    """
+    gets the python source of check_type, evaluated in a namespace
+    importing typing and collections.abc
+
+    :param check_type: type
+    :return: source e.g. "typing.Dict[str, typing.List[int]]", or None if
+             check_type is not built from builtin, typing and
+             collections.abc types
+    """
+    if check_type is None or check_type is type(None):
+        return "None"
+    if check_type is Ellipsis:
+        return "..."
+    if check_type is typing.Any:
+        return "typing.Any"
+    if check_type is typing.AnyStr:
+        return "typing.AnyStr"
+    if isinstance(check_type, type) and \
+            not isinstance(check_type, types.GenericAlias):
+        name = check_type.__qualname__
+        if check_type.__module__ == "builtins" and \
+                getattr(builtins, name, None) is check_type:
+            return name
+        if check_type.__module__ == "collections.abc" and \
+                getattr(collections.abc, name, None) is check_type:
+            return f"collections.abc.{name}"
+        return None
+
+    origin, args = typing.get_origin(check_type), typing.get_args(check_type)
+    if origin is None:
+        return None
+    if origin is typing.Literal:
+        if not all(type(x) in LITERAL_TYPES for x in args):
+            return None
+        return f"typing.Literal[{', '.join(map(repr, args))}]"
+
+    if isinstance(check_type, types.GenericAlias):  # e.g. list[int]
+        base = type_source(origin)
+    elif origin is getattr(types, "UnionType", None):  # e.g. int | None
+        sources = [type_source(x) for x in args]
+        if None in sources:
+            return None
+        return " | ".join(sources)
+    elif origin is typing.Union:
+        base = "typing.Union"
+    else:  # typing alias e.g. List[int]
+        name = getattr(check_type, '_name', None)
+        if name is None or getattr(typing, name, None) is None:
+            return None
+        base = f"typing.{name}"
+        if check_type == getattr(typing, name):  # not subscripted
+            return base
+    if base is None:
+        return None
+    if not args or args == ((),):  # Tuple[()], ((),) before python 3.11
+        return f"{base}[()]"
+    sources = [type_source(x) for x in args]
+    if None in sources:
+        return None
+    return f"{base}[{', '.join(sources)}]"
+
+
+def _instance_source(plan: Plan) -> Optional[str]:
+    """
+    :param plan: compiled K_INSTANCE plan
+    :return: source of the class checked by plan: its type, or the origin
+             of subscripted generics e.g. type for Type[int]
+    """
+    origin = typing.get_origin(plan.check_type)
+    return type_source(plan.check_type if origin is None else origin)
+
+
+def _exportable(plan: Plan) -> bool:
+    """
+    :param plan: compiled plan
+    :return: True if plan and its sub plans can be exported
+    """
+    if plan.kind not in EXPORTED_KINDS or \
+            type_source(plan.check_type) is None or \
+            plan.kind == K_INSTANCE and _instance_source(plan) is None:
+        return False
+    return all(_exportable(x) for x in plan.args)
+
+
+class Exporter(object):
+    """
+    generates the source of a module of validators
+    """
+
+    def __init__(self):
+        self.cache = PlanCache()
+        self.consts: Dict[str, str] = dict()
+        self.functions: Dict[object, str] = dict()
+        self.exported: List[tuple] = []
+        self.blocks: List[str] = []
+        self._names = 0
+
+    def _name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def _const(self, source: str) -> str:
+        """
+        :param source: source of a type
+        :return: name of the module constant holding the type
+        """
+        name = self.consts.get(source)
+        if name is None:
+            name = self.consts[source] = self._name("_T")
+        return name
+
+    def _class(self, source: str) -> str:
+        """
+        :param source: source of a class
+        :return: expression of the class, builtins are used directly
+        """
+        return source if source.isidentifier() else self._const(source)
+
+    def export(self, check_type) -> Optional[str]:
+        """
+        exports the validator of check_type, installed on import
+
+        :param check_type: type to export
+        :return: name of the validator function, or None if check_type
+                 cannot be exported
+        """
+        try:
+            if any(x is check_type or x == check_type
+                   for x, _, _ in self.exported):
+                return None
+        except TypeError:
+            return None
+        try:
+            plan = compile_plan(check_type, self.cache)
+        except TypeError:
+            return None
+        source = type_source(check_type)
+        if plan.kind in SUB_PLAN_KINDS or not _exportable(plan) or \
+                not self._verify(source, check_type):
+            return None
+        name = self._function(plan)
+        self.exported.append((check_type, self._const(source), name))
+        return name
+
+    @staticmethod
+    def _verify(source: Optional[str], check_type) -> bool:
+        """
+        :param source: source of check_type
+        :param check_type: type
+        :return: True if source evaluates to check_type
+        """
+        if source is None:
+            return False
+        namespace = {"typing": typing, "collections": collections}
+        try:
+            return eval(source, namespace) == check_type
+        except Exception:
+            return False
+
+    def _function(self, plan: Plan) -> str:
+        """
+        :param plan: compiled plan
+        :return: name of the validator function of plan, generated once
+        """
+        name = self.functions.get(plan.check_type)
+        if name is not None:
+            return name
+        name = self.functions[plan.check_type] = self._name("_v")
+        lines = [f"def {name}(v):"]
+        lines += self._emit(plan, "v", 1)
+        lines.append("    return True")
+        self.blocks.append("\n".join(lines))
+        return name
+
+    def _condition(self, plan: Plan, var: str) -> str:
+        """
+        :param plan: compiled plan of a Union member
+        :param var: name of the checked variable
+        :return: expression, True if var passes plan
+        """
+        if plan.kind == K_INSTANCE:
+            source = _instance_source(plan)
+            if source == "None":
+                return f"{var} is None"
+            return f"isinstance({var}, {self._class(source)})"
+        if plan.kind == K_ANYSTR:
+            return f"isinstance({var}, (str, bytes, bytearray))"
+        if plan.kind == K_LITERAL:
+            return " or ".join(
+                f"{var} is None" if x is None else
+                f"(type({var}) is {type(x).__name__} and {var} == {x!r})"
+                for x in typing.get_args(plan.check_type)) or "False"
+        if plan.kind == K_NEVER:
+            return "False"
+        return f"{self._function(plan)}({var})"
+
+    def _loop(self, plan: Plan, var: str, depth: int) -> List[str]:
+        """
+        :param plan: compiled plan of the elements
+        :param var: name of the element variable
+        :param depth: nesting depth of the loop body
+        :return: lines checking var in a loop body
+        """
+        if depth > MAX_INLINE_DEPTH:
+            ind = "    " * depth
+            return [f"{ind}if not {self._function(plan)}({var}):",
+                    f"{ind}    return False"]
+        return self._emit(plan, var, depth)
+
+    def _emit(self, plan: Plan, var: str, depth: int) -> List[str]:
+        """
+        :param plan: compiled plan
+        :param var: name of the checked variable
+        :param depth: indentation depth
+        :return: lines returning False if var fails plan
+        """
+        ind = "    " * depth
+        kind = plan.kind
+        if kind == K_ANY:
+            return []
+        if kind == K_NEVER:
+            return [f"{ind}return False"]
+        if kind in (K_INSTANCE, K_ANYSTR, K_LITERAL):
+            return [f"{ind}if not ({self._condition(plan, var)}):",
+                    f"{ind}    return False"]
+
+        if kind == K_UNION:
+            if any(x.kind == K_ANY for x in plan.args):
+                return []
+            classes, conditions = [], []
+            for sub_plan in plan.args:
+                if sub_plan.kind == K_INSTANCE and \
+                        _instance_source(sub_plan) != "None":
+                    classes.append(self._class(_instance_source(sub_plan)))
+                elif sub_plan.kind == K_ANYSTR:
+                    classes += ["str", "bytes", "bytearray"]
+                else:
+                    conditions.append(self._condition(sub_plan, var))
+            if classes:
+                conditions.insert(0, f"isinstance({var}, "
+                                     f"({', '.join(classes)},))")
+            return [f"{ind}if not ({' or '.join(conditions)}):",
+                    f"{ind}    return False"]
+
+        if kind == K_TUPLE:
+            lines = [f"{ind}if not isinstance({var}, tuple) or "
+                     f"len({var}) != {len(plan.args)}:",
+                     f"{ind}    return False"]
+            for idx, sub_plan in enumerate(plan.args):
+                if sub_plan.kind == K_ANY:
+                    continue
+                item = self._name("x")
+                lines.append(f"{ind}{item} = {var}[{idx}]")
+                lines += self._emit(sub_plan, item, depth)
+            return lines
+
+        top = self._class(type_source(typing.get_origin(plan.check_type)))
+        lines = [f"{ind}if not isinstance({var}, {top}):",
+                 f"{ind}    return False"]
+        if all(x.kind == K_ANY for x in plan.args):
+            return lines
+        if kind in (K_LIST, K_DICT, K_MAPPING):
+            # checked containers of this type are accepted as they are
+            exact = "dict" if kind != K_LIST else "list"
+            const = self._const(type_source(plan.check_type))
+            lines += [f"{ind}if type({var}) is {exact} or "
+                      f"getattr({var}, 'typed_as', None) != {const}:"]
+            depth += 1
+            ind += "    "
+        if kind in (K_DICT, K_MAPPING):
+            for sub_plan, view in zip(plan.args, ("keys", "values")):
+                if sub_plan.kind == K_ANY:
+                    continue
+                item = self._name("k" if view == "keys" else "e")
+                body = self._loop(sub_plan, item, depth + 1)
+                if body:  # e.g. not Optional[Any]
+                    lines += [f"{ind}for {item} in {var}.{view}():"] + body
+        else:
+            item = self._name("e")
+            body = self._loop(plan.args[0], item, depth + 1)
+            if body:
+                lines += [f"{ind}for {item} in {var}:"] + body
+        if lines[-1].endswith(":"):
+            lines.append(f"{ind}pass")
+        return lines
+
+    def source(self, modules: Iterable[str]) -> str:
+        """
+        :param modules: names of the exported modules
+        :return: source of the generated module
+        """
+        parts = [HEADER.format(modules=" ".join(modules))]
+        if self.consts:
+            parts.append("\n".join(f"{name} = {source}"
+                                   for source, name in self.consts.items()))
+        parts += self.blocks
+        pairs = "".join(f"    ({const}, {name}),\n"
+                        for _, const, name in self.exported)
+        parts.append(f"install(\n{pairs})")
+        return "\n\n\n".join(parts) + "\n"
+
+
+def _signature_types(fun: Callable) -> list:
+    """
+    :param fun: function, possibly signature decorated
+    :return: param and return types of fun if signature decorated
+    """
+    signature_types = getattr(fun, 'signature_types', None)
+    if not isinstance(signature_types, dict):
+        return []
+    found = list(signature_types.values())
+    try:
+        found.append(get_type_hints(fun.__wrapped__).get('return'))
+    except (AttributeError, NameError, TypeError):
+        pass
+    return [x for x in found if x is not None]
+
+
+def discover(module) -> list:
+    """
+    finds the types of the signature decorated functions (including
+    methods) and the type aliases of module
+
+    :param module: imported module
+    :return: list of types
+    """
+    found = []
+    for name, obj in list(vars(module).items()):
+        if inspect.isclass(obj) and obj.__module__ == module.__name__:
+            for attr in vars(obj).values():
+                found += _signature_types(getattr(attr, '__func__', attr))
+        elif callable(obj):
+            found += _signature_types(obj)
+        # type aliases, not the typing names imported e.g. List
+        if typing.get_origin(obj) is not None and \
+                getattr(typing, name, None) is not obj:
+            found.append(obj)
+    return found
+
+
+def export(modules: Iterable[str]) -> str:
+    """
+    exports the validators of modules
+
+    :param modules: names of the modules, imported to find their types
+    :return: source of the generated module
+    """
+    modules = list(modules)
+    exporter = Exporter()
+    for name in modules:
+        for check_type in discover(importlib.import_module(name)):
+            exporter.export(check_type)
+    return exporter.source(modules)
@@ -0,0 +1,562 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyjson.py
+
+    Type directed JSON parsing: an incremental tokenizer over a str, bytes
+    or a file object read in chunks, checking each value against the plan
+    of its expected type as it is parsed. A payload is rejected at its
+    first mismatch, before the rest of it is read, and values only being
+    validated need not be built at all.
+
+    JSON arrays are checked as List, Sequence and Tuple values (and built
+    as tuples for the latter), objects as Dict and Mapping values. Values
+    of other types e.g. Annotated, Set or classes are built, then checked.
+
+    When the whole document is in memory (a str or bytes) and is built,
+    the elements of the top-level array / object are decoded by the json
+    C scanner then checked, rejecting at the first bad element; file
+    objects and unbuilt documents are checked token by token.
+"""
+
+from typing import Callable, Optional
+from json.scanner import NUMBER_RE, make_scanner
+from json.decoder import scanstring, JSONDecodeError, JSONDecoder
+import codecs
+from tysig.tyerrors import JSON_TYPE_ERROR, PATH_ERROR, FAILED_AT_ERROR
+from tysig.tycompile import Plan, PLANS, K_ANY, K_UNION, K_LIST, \
+    K_TUPLE, K_DICT, K_ANNOTATED, K_SEQUENCE, K_MAPPING, K_VARTUPLE, \
+    K_EXPORTED, rejects_class
+from tysig.tyexplain import type_name, find_failure
+
+# characters read from a file object at a time
+JSON_CHUNK_SIZE = 1 << 16
+
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+# kinds of the plans checking JSON arrays / objects element by element
+ARRAY_KINDS = (K_LIST, K_SEQUENCE, K_TUPLE, K_VARTUPLE)
+OBJECT_KINDS = (K_DICT, K_MAPPING)
+
+# decodes the JSON value at an index of a str, as json.loads does
+_scan_once = make_scanner(JSONDecoder())
+
+# (JSON literal, value)
+LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+
+
+class _Mismatch(Exception):
+    """
+    raised at the first value failing its plan, collecting the path of
+    the value (innermost first) as it propagates
+    """
+
+    def __init__(self, plan: Plan, got: str):
+        super().__init__()
+        self.plan = plan
+        self.got = got
+        self.path: list = []
+
+
+# shapes of the plans whose values are decoded by the json scanner
+S_NATURAL = "natural"
+S_TUPLES = "tuples"
+
+
+def _same(value):
+    return value
+
+
+def _mismatch(plan: Plan, value) -> _Mismatch:
+    """
+    :param plan: compiled plan value failed
+    :param value: value built
+    :return: _Mismatch of the innermost failing element of value
+    """
+    failure = find_failure(plan, value, "")
+    if failure is None:
+        return _Mismatch(plan, type(value).__name__)
+    path, plan, value = failure
+    ex = _Mismatch(plan, type(value).__name__)
+    if path:
+        ex.path.append(path)
+    return ex
+
+
+class JsonParser(object):
+    """
+    incremental JSON tokenizer checking the values parsed against plans
+    """
+
+    def __init__(self, source, chunk_size: int = JSON_CHUNK_SIZE):
+        """
+        :param source: str, bytes or a file object (text or binary)
+        :param chunk_size: characters / bytes read from a file at a time
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = bytes(source).decode("utf-8")
+        if isinstance(source, str):
+            self.buf, self.reader, self.eof = source, None, True
+        else:
+            self.buf, self.reader, self.eof = "", source, False
+        self.decoder = None
+        self.chunk_size = chunk_size
+        self.pos = 0
+        self.pins = 0
+        self.compiled: dict = dict()
+        self.shapes: dict = dict()
+        self.converters: dict = dict()
+
+    def _fill(self) -> bool:
+        """
+        reads the next chunk of the file into the buffer, dropping the part
+        already parsed unless pinned
+
+        :return: False if the file is exhausted
+        """
+        if self.eof:
+            return False
+        if self.pins == 0 and self.pos:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        while True:
+            chunk = self.reader.read(self.chunk_size)
+            if isinstance(chunk, bytes):
+                if self.decoder is None:
+                    self.decoder = codecs.getincrementaldecoder("utf-8")()
+                text = self.decoder.decode(chunk, not chunk)
+                if chunk and not text:  # partial utf-8 sequence
+                    continue
+                chunk = text
+            if not chunk:
+                self.eof = True
+                return False
+            self.buf += chunk
+            return True
+
+    def _error(self, message: str):
+        return JSONDecodeError(message, self.buf, self.pos)
+
+    def _peek(self) -> str:
+        """
+        :return: next non whitespace character, "" at the end of the input
+        """
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _separator(self, close: str) -> bool:
+        """
+        consumes the "," or closing bracket following a container element
+
+        :param close: closing bracket of the container
+        :return: True if the container is closed
+        """
+        ch = self._peek()
+        self.pos += 1
+        if ch == ",":
+            return False
+        if ch == close:
+            return True
+        self.pos -= 1
+        raise self._error(f"Expecting ',' delimiter or '{close}'")
+
+    def _string(self) -> str:
+        """
+        :return: string starting at the current position (a '"')
+        """
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos + 1)
+            except JSONDecodeError as ex:
+                # the string may continue in the next chunk
+                if ex.pos >= len(self.buf) - 6 or \
+                        ex.msg.startswith("Unterminated"):
+                    if self._fill():
+                        continue
+                raise
+            self.pos = end
+            return value
+
+    def _number_end(self) -> int:
+        """
+        :return: index of the first character after the number characters
+                 at the current position
+        """
+        buf, end = self.buf, self.pos
+        while end < len(buf) and buf[end] in NUMBER_CHARS:
+            end += 1
+        return end
+
+    def _leaf(self):
+        """
+        :return: string, number, true, false or null at the current
+                 position
+        """
+        ch = self._peek()
+        if ch == '"':
+            return self._string()
+        if ch in LITERALS:
+            text, value = LITERALS[ch]
+            while len(self.buf) - self.pos < len(text) and self._fill():
+                pass
+            if self.buf.startswith(text, self.pos):
+                self.pos += len(text)
+                return value
+        elif ch == "-" or ch.isdigit():
+            # the number may continue in the next chunk
+            while self._number_end() == len(self.buf) and self._fill():
+                pass
+            match = NUMBER_RE.match(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.end()
+                integer, frac, exp = match.groups()
+                if frac or exp:
+                    return float(integer + (frac or "") + (exp or ""))
+                return int(integer)
+        raise self._error("Expecting value" if ch else
+                          "Unexpected end of input")
+
+    def _key(self) -> str:
+        """
+        :return: key of the object member at the current position, with
+                 its ":" consumed
+        """
+        if self._peek() != '"':
+            raise self._error("Expecting property name enclosed in double "
+                              "quotes")
+        key = self._string()
+        if self._peek() != ":":
+            raise self._error("Expecting ':' delimiter")
+        self.pos += 1
+        return key
+
+    def value(self):
+        """
+        :return: value at the current position, parsed as json.loads does
+        """
+        ch = self._peek()
+        if self.eof and (ch == "[" or ch == "{"):  # whole input in memory
+            try:
+                value, self.pos = JSONDecoder().raw_decode(self.buf,
+                                                           self.pos)
+                return value
+            except JSONDecodeError as ex:
+                self.pos = ex.pos
+                raise self._error(ex.msg) from None
+        if ch == "[":
+            self.pos += 1
+            items: list = []
+            if self._peek() == "]":
+                self.pos += 1
+                return items
+            while True:
+                items.append(self.value())
+                if self._separator("]"):
+                    return items
+        if ch == "{":
+            self.pos += 1
+            members: dict = dict()
+            if self._peek() == "}":
+                self.pos += 1
+                return members
+            while True:
+                key = self._key()
+                members[key] = self.value()
+                if self._separator("}"):
+                    return members
+        return self._leaf()
+
+    def skip(self):
+        """
+        parses the value at the current position without building it
+        """
+        ch = self._peek()
+        if ch == "[":
+            self.pos += 1
+            if self._peek() == "]":
+                self.pos += 1
+                return
+            while True:
+                self.skip()
+                if self._separator("]"):
+                    return
+        elif ch == "{":
+            self.pos += 1
+            if self._peek() == "}":
+                self.pos += 1
+                return
+            while True:
+                self._key()
+                self.skip()
+                if self._separator("}"):
+                    return
+        else:
+            self._leaf()
+
+    def _plan(self, plan: Plan) -> Plan:
+        """
+        :param plan: plan, possibly exported
+        :return: plan with its sub plans
+        """
+        if plan.kind != K_EXPORTED:
+            return plan
+        compiled = self.compiled.get(plan.check_type)
+        if compiled is None:
+            compiled = self.compiled[plan.check_type] = \
+                PLANS.get_compiled(plan.check_type)
+        return compiled
+
+    def parse(self, plan: Plan, build: bool = True, top: bool = True):
+        """
+        parses the value at the current position, checking it against plan
+
+        :param plan: compiled plan of the expected type
+        :param build: set to False to only validate the value
+        :param top: False for the elements of a container. With the whole
+                    input in memory, built elements are decoded by the json
+                    scanner then checked, the top-level container is
+                    parsed token by token to reject at its first bad
+                    element
+        :return: value, or None if not built
+        :raises _Mismatch: at the first value failing its plan
+        """
+        plan = self._plan(plan)
+        kind = plan.kind
+        ch = self._peek()
+        if kind == K_ANY:
+            if build:
+                return self.value()
+            self.skip()
+            return None
+
+        container = ch == "[" or ch == "{"
+        scanned = self.eof and (build and not top or not container) and \
+            self._shape(plan) is not None
+        if container and not scanned:
+            if ch == "[" and kind in ARRAY_KINDS:
+                return self._array(plan, build)
+            if ch == "{" and kind in OBJECT_KINDS:
+                return self._object(plan, build)
+            if kind == K_UNION:
+                return self._union(plan, build, ch)
+            if kind != K_ANNOTATED and \
+                    rejects_class(plan, list if ch == "[" else dict):
+                raise _Mismatch(plan, "list" if ch == "[" else "dict")
+
+        if scanned:
+            try:
+                value, self.pos = _scan_once(self.buf, self.pos)
+            except StopIteration:
+                raise self._error("Expecting value") from None
+            except JSONDecodeError as ex:
+                self.pos = ex.pos
+                raise self._error(ex.msg) from None
+            if container and self._shape(plan) == S_TUPLES:
+                value = self._converter(plan)(value)
+        elif kind == K_ANNOTATED:
+            value = self.parse(plan.args[0], True, top)
+        elif container:
+            value = self.value()
+        else:
+            value = self._leaf()
+        if not plan.check(value):
+            raise _mismatch(plan, value)
+        return value
+
+    def _shape(self, plan: Plan) -> Optional[str]:
+        """
+        :param plan: compiled plan
+        :return: S_NATURAL if the values json.loads builds are checked by
+                 plan as they are, S_TUPLES if their arrays are converted
+                 to tuples by its _converter first, or None if they cannot be
+                 e.g. a Union of Tuple and List
+        """
+        try:
+            return self.shapes[plan]
+        except KeyError:
+            pass
+        compiled = self._plan(plan)
+        shapes = [self._shape(x) for x in compiled.args]
+        if all(x == S_NATURAL for x in shapes) and \
+                compiled.kind not in (K_TUPLE, K_VARTUPLE):
+            shape = S_NATURAL
+        elif None not in shapes and compiled.kind in ARRAY_KINDS + \
+                OBJECT_KINDS:
+            shape = S_TUPLES
+        else:
+            shape = None
+        self.shapes[plan] = shape
+        return shape
+
+    def _converter(self, plan: Plan) -> Optional[Callable]:
+        """
+        :param plan: compiled plan of shape S_TUPLES or S_NATURAL
+        :return: function converting the lists of a value built by
+                 json.loads checked as tuples by plan, None if there are
+                 none
+        """
+        try:
+            return self.converters[plan]
+        except KeyError:
+            pass
+        compiled = self._plan(plan)
+        kind, args = compiled.kind, compiled.args
+        convert = None
+        if self._shape(compiled) == S_NATURAL:
+            pass
+        elif kind == K_TUPLE:
+            size = len(args)
+            converters = tuple(self._converter(x) or _same for x in args)
+            if all(x is _same for x in converters):
+                converters = None
+
+            def convert(value):
+                if type(value) is not list or len(value) != size:
+                    return value
+                if converters is None:
+                    return tuple(value)
+                return tuple(x(y) for x, y in zip(converters, value))
+        elif kind in ARRAY_KINDS:
+            elem = self._converter(args[0])
+            top = tuple if kind == K_VARTUPLE else list
+
+            def convert(value):
+                if type(value) is not list:
+                    return value
+                return top(value if elem is None else map(elem, value))
+        else:  # object
+            elem = self._converter(args[1])
+
+            def convert(value):
+                if type(value) is not dict:
+                    return value
+                return {x: elem(y) for x, y in value.items()}
+        self.converters[plan] = convert
+        return convert
+
+    def _array(self, plan: Plan, build: bool):
+        self.pos += 1
+        kind, args = plan.kind, plan.args
+        items: Optional[list] = [] if build else None
+        size = 0
+        if self._peek() == "]":
+            self.pos += 1
+        else:
+            while True:
+                if kind == K_TUPLE:
+                    if size >= len(args):
+                        raise _Mismatch(plan, "list")
+                    elem = args[size]
+                else:
+                    elem = args[0]
+                try:
+                    value = self.parse(elem, build, False)
+                except _Mismatch as ex:
+                    ex.path.append(f"[{size}]")
+                    raise
+                if build:
+                    items.append(value)
+                size += 1
+                if self._separator("]"):
+                    break
+        if kind == K_TUPLE and size != len(args):
+            raise _Mismatch(plan, "list")
+        if build and kind in (K_TUPLE, K_VARTUPLE):
+            return tuple(items)
+        return items
+
+    def _object(self, plan: Plan, build: bool):
+        self.pos += 1
+        key_plan, val_plan = plan.args
+        members: Optional[dict] = dict() if build else None
+        if self._peek() == "}":
+            self.pos += 1
+            return members
+        while True:
+            key = self._key()
+            if not key_plan.check(key):
+                ex = _Mismatch(key_plan, "str")
+                ex.path.append(f" key {key!r}")
+                raise ex
+            try:
+                value = self.parse(val_plan, build, False)
+            except _Mismatch as ex:
+                ex.path.append(f"[{key!r}]")
+                raise
+            if build:
+                members[key] = value
+            if self._separator("}"):
+                return members
+
+    def _union(self, plan: Plan, build: bool, ch: str):
+        """
+        parses an array / object against the members of a Union accepting
+        it. If several may, the value is parsed once to find its extent,
+        then each member is tried on its text in turn
+        """
+        kinds, cls = (ARRAY_KINDS, list) if ch == "[" else (OBJECT_KINDS,
+                                                            dict)
+        members = [self._plan(x) for x in plan.args]
+        candidates = [x for x in members
+                      if x.kind in kinds or not rejects_class(x, cls)]
+        if not candidates:
+            raise _Mismatch(plan, cls.__name__)
+        if len(candidates) == 1:
+            return self.parse(candidates[0], build)
+
+        self.pins += 1
+        try:
+            start = self.pos
+            self.skip()
+            text = self.buf[start:self.pos]
+        finally:
+            self.pins -= 1
+        for member in candidates:
+            try:
+                return JsonParser(text).parse(member, build)
+            except _Mismatch:
+                continue
+        raise _Mismatch(plan, cls.__name__)
+
+    def end(self):
+        """
+        checks that only whitespace follows the value parsed
+        """
+        if self._peek():
+            raise self._error("Extra data")
+
+
+def validate_json(source, plan: Plan, build: bool = True,
+                  name: str = "json", chunk_size: int = JSON_CHUNK_SIZE):
+    """
+    parses the JSON document of source, checking it against plan as it is
+    parsed
+
+    :param source: str, bytes or a file object (text or binary)
+    :param plan: compiled plan of the expected type
+    :param build: set to False to only validate the document
+    :param name: name of the document, the root of the failing path
+    :param chunk_size: characters / bytes read from a file at a time
+    :return: parsed value, or None if not built
+    :raises TypeError: at the first value failing its type, ending with
+                       its path
+    :raises ValueError: if the document is not valid JSON
+    """
+    parser = JsonParser(source, chunk_size)
+    try:
+        value = parser.parse(plan, build)
+    except _Mismatch as ex:
+        path = name + "".join(reversed(ex.path))
+        raise TypeError(FAILED_AT_ERROR.format(
+            JSON_TYPE_ERROR.format(name, type_name(plan.check_type)),
+            PATH_ERROR.format(path, type_name(ex.plan.check_type),
+                              ex.got))) from None
+    parser.end()
+    return value
@@ -0,0 +1,284 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tylazy.py
+
+    Lazy checking of Iterator, Iterable and Generator values, and of their
+    async counterparts. Instead of materializing a stream to check it, the
+    value is wrapped in a proxy checking each item as it is consumed, so
+    the stream stays lazy and checking it needs O(1) memory.
+"""
+
+import collections.abc
+from tysig.tyerrors import ITEM_ERROR, SEND_ERROR, GEN_RET_ERROR
+from tysig.tycompile import Plan, K_ITERATOR, K_ITERABLE, K_GENERATOR, \
+    K_ASYNC_ITERATOR, K_ASYNC_ITERABLE, K_ASYNC_GENERATOR, ANY_PLAN
+
+
+class CheckedIterator(collections.abc.Iterator):
+    """
+    iterator checking each item of the wrapped iterator as it is consumed,
+    raising a TypeError on the first item not of the item type
+    """
+
+    __slots__ = ('_it', '_plan', '_name', '_index')
+
+    def __init__(self, it, plan: Plan, name: str):
+        """
+        :param it: iterator to wrap
+        :param plan: compiled plan of the items
+        :param name: name of the checked value, used in error messages
+        """
+        self._it = it
+        self._plan = plan
+        self._name = name
+        self._index = 0
+
+    def _checked(self, item):
+        if not self._plan.check(item):
+            raise TypeError(ITEM_ERROR.format(self._name, self._index,
+                                              self._plan.check_type,
+                                              type(item)))
+        self._index += 1
+        return item
+
+    def __next__(self):
+        return self._checked(next(self._it))
+
+
+class CheckedIterable(collections.abc.Iterable):
+    """
+    iterable whose iterators check each item of the wrapped iterable as
+    it is consumed
+    """
+
+    __slots__ = ('_iterable', '_plan', '_name')
+
+    def __init__(self, iterable, plan: Plan, name: str):
+        """
+        :param iterable: iterable to wrap
+        :param plan: compiled plan of the items
+        :param name: name of the checked value, used in error messages
+        """
+        self._iterable = iterable
+        self._plan = plan
+        self._name = name
+
+    def __iter__(self) -> CheckedIterator:
+        return CheckedIterator(iter(self._iterable), self._plan, self._name)
+
+
+class CheckedGenerator(collections.abc.Generator):
+    """
+    generator checking the values yielded by, sent to, and returned from
+    the wrapped generator
+    """
+
+    __slots__ = ('_gen', '_yield_plan', '_send_plan', '_return_plan',
+                 '_name', '_index')
+
+    def __init__(self, gen, yield_plan: Plan, send_plan: Plan,
+                 return_plan: Plan, name: str):
+        """
+        :param gen: generator to wrap
+        :param yield_plan: compiled plan of the yielded values
+        :param send_plan: compiled plan of the values sent
+        :param return_plan: compiled plan of the value returned
+        :param name: name of the checked value, used in error messages
+        """
+        self._gen = gen
+        self._yield_plan = yield_plan
+        self._send_plan = send_plan
+        self._return_plan = return_plan
+        self._name = name
+        self._index = 0
+
+    def _resume(self, method, *args):
+        try:
+            item = method(*args)
+        except StopIteration as stop:
+            if not self._return_plan.check(stop.value):
+                raise TypeError(GEN_RET_ERROR.format(
+                    self._name, self._return_plan.check_type,
+                    type(stop.value)))
+            raise
+        if not self._yield_plan.check(item):
+            raise TypeError(ITEM_ERROR.format(self._name, self._index,
+                                              self._yield_plan.check_type,
+                                              type(item)))
+        self._index += 1
+        return item
+
+    def __next__(self):
+        return self._resume(self._gen.__next__)
+
+    def send(self, value):
+        # the first send must be None to start the generator
+        if self._index > 0 and not self._send_plan.check(value):
+            raise TypeError(SEND_ERROR.format(
+                self._name, self._send_plan.check_type, type(value)))
+        return self._resume(self._gen.send, value)
+
+    def throw(self, typ, val=None, tb=None):
+        return self._resume(self._gen.throw, typ, val, tb)
+
+    def close(self):
+        return self._gen.close()
+
+
+class CheckedAsyncIterator(collections.abc.AsyncIterator):
+    """
+    async iterator checking each item of the wrapped async iterator as it
+    is consumed, raising a TypeError on the first item not of the item type
+    """
+
+    __slots__ = ('_it', '_plan', '_name', '_index')
+
+    def __init__(self, it, plan: Plan, name: str):
+        """
+        :param it: async iterator to wrap
+        :param plan: compiled plan of the items
+        :param name: name of the checked value, used in error messages
+        """
+        self._it = it
+        self._plan = plan
+        self._name = name
+        self._index = 0
+
+    async def __anext__(self):
+        item = await self._it.__anext__()
+        if not self._plan.check(item):
+            raise TypeError(ITEM_ERROR.format(self._name, self._index,
+                                              self._plan.check_type,
+                                              type(item)))
+        self._index += 1
+        return item
+
+
+class CheckedAsyncIterable(collections.abc.AsyncIterable):
+    """
+    async iterable whose async iterators check each item of the wrapped
+    async iterable as it is consumed
+    """
+
+    __slots__ = ('_iterable', '_plan', '_name')
+
+    def __init__(self, iterable, plan: Plan, name: str):
+        """
+        :param iterable: async iterable to wrap
+        :param plan: compiled plan of the items
+        :param name: name of the checked value, used in error messages
+        """
+        self._iterable = iterable
+        self._plan = plan
+        self._name = name
+
+    def __aiter__(self) -> CheckedAsyncIterator:
+        return CheckedAsyncIterator(self._iterable.__aiter__(), self._plan,
+                                    self._name)
+
+
+class CheckedAsyncGenerator(collections.abc.AsyncGenerator):
+    """
+    async generator checking the values yielded by, and sent to, the
+    wrapped async generator
+    """
+
+    __slots__ = ('_gen', '_yield_plan', '_send_plan', '_name', '_index')
+
+    def __init__(self, gen, yield_plan: Plan, send_plan: Plan, name: str):
+        """
+        :param gen: async generator to wrap
+        :param yield_plan: compiled plan of the yielded values
+        :param send_plan: compiled plan of the values sent
+        :param name: name of the checked value, used in error messages
+        """
+        self._gen = gen
+        self._yield_plan = yield_plan
+        self._send_plan = send_plan
+        self._name = name
+        self._index = 0
+
+    async def _resume(self, awaitable):
+        item = await awaitable
+        if not self._yield_plan.check(item):
+            raise TypeError(ITEM_ERROR.format(self._name, self._index,
+                                              self._yield_plan.check_type,
+                                              type(item)))
+        self._index += 1
+        return item
+
+    def __anext__(self):
+        return self._resume(self._gen.__anext__())
+
+    def asend(self, value):
+        # the first asend must be None to start the generator
+        if self._index > 0 and not self._send_plan.check(value):
+            raise TypeError(SEND_ERROR.format(
+                self._name, self._send_plan.check_type, type(value)))
+        return self._resume(self._gen.asend(value))
+
+    def athrow(self, typ, val=None, tb=None):
+        return self._resume(self._gen.athrow(typ, val, tb))
+
+    def aclose(self):
+        return self._gen.aclose()
+
+
+def is_lazy(plan: Plan) -> bool:
+    """
+    :param plan: compiled plan
+    :return: True if values of plan are checked lazily, as streams
+    """
+    return plan.kind in (K_ITERATOR, K_ITERABLE, K_GENERATOR,
+                         K_ASYNC_ITERATOR, K_ASYNC_ITERABLE,
+                         K_ASYNC_GENERATOR)
+
+
+def wrap_lazy(plan: Plan, var, name: str):
+    """
+    wraps var, already checked against plan, so its items are checked as
+    they are consumed
+
+    :param plan: compiled Iterator, Iterable or Generator plan, or async
+                 Iterator, Iterable or Generator plan
+    :param var: value to wrap
+    :param name: name of the value, used in error messages
+    :return: checking proxy of var
+    """
+    if not plan.args:
+        return var
+    if plan.kind == K_ASYNC_GENERATOR:
+        if not isinstance(var, collections.abc.AsyncGenerator):
+            return var
+        return CheckedAsyncGenerator(var, *plan.args[:2], name=name)
+    if plan.kind in (K_ASYNC_ITERATOR, K_ASYNC_ITERABLE):
+        if isinstance(var, collections.abc.AsyncIterator):
+            return CheckedAsyncIterator(var, plan.args[0], name)
+        return CheckedAsyncIterable(var, plan.args[0], name)
+    if plan.kind == K_GENERATOR:
+        if not isinstance(var, collections.abc.Generator):
+            return var
+        return CheckedGenerator(var, *plan.args[:3], name=name)
+    if isinstance(var, collections.abc.Iterator):
+        return CheckedIterator(var, plan.args[0], name)
+    if plan.kind == K_ITERABLE:
+        return CheckedIterable(var, plan.args[0], name)
+    return var
+
+
+def wrap_async_generator(plan: Plan, agen, name: str):
+    """
+    wraps the async generator agen of an async generator function so the
+    values it yields and is sent are checked against its return type
+
+    :param plan: compiled return type e.g. AsyncIterator[int]
+    :param agen: async generator to wrap
+    :param name: name of the value, used in error messages
+    :return: checking proxy of agen, or agen if there is nothing to check
+    """
+    if not plan.args or plan.kind not in (K_ASYNC_ITERATOR, K_ASYNC_ITERABLE,
+                                          K_ASYNC_GENERATOR):
+        return agen
+    send_plan = plan.args[1] if plan.kind == K_ASYNC_GENERATOR else ANY_PLAN
+    return CheckedAsyncGenerator(agen, plan.args[0], send_plan, name)
@@ -0,0 +1,221 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    typarallel.py
+
+    Opt-in parallel checking of large List / Dict values. Above a size
+    threshold the elements are split into chunks checked on a worker pool:
+    a thread pool (checking in parallel on free-threaded python builds) or
+    a process pool (chunks are pickled to the workers with the type and
+    its check policy, compiled by the workers). Checking stops early once
+    a worker finds a failure.
+"""
+
+from typing import Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, \
+    ProcessPoolExecutor, FIRST_COMPLETED, wait
+import threading
+from tysig.tycompile import Plan, PLANS, K_LIST, K_DICT
+from tysig.typolicy import CheckPolicy
+
+PARALLEL_THRESHOLD = 100000
+PARALLEL_CHUNK_SIZE = 25000
+
+# elements checked by a thread worker between checks of the stop flag
+STOP_CHECK_INTERVAL = 1024
+
+# default pools shared by the parallel policies, created on first use
+_POOLS: dict = dict()
+_POOLS_LOCK = threading.Lock()
+
+
+class ParallelPolicy(object):
+    """
+    policy for checking large List / Dict values on a worker pool. Only the
+    elements of the top-level List / Dict are split into chunks, nested
+    values are checked by the worker checking their chunk
+    """
+
+    __slots__ = ('executor', 'processes', 'workers', 'threshold',
+                 'chunk_size')
+
+    def __init__(self, executor: Optional[Executor] = None,
+                 processes: bool = False, workers: Optional[int] = None,
+                 threshold: int = PARALLEL_THRESHOLD,
+                 chunk_size: int = PARALLEL_CHUNK_SIZE):
+        """
+        :param executor: pool the chunks are checked on, default a pool
+                         shared by the policies with the same processes and
+                         workers
+        :param processes: set to True to check chunks on a process pool
+                          (implied by a ProcessPoolExecutor executor)
+        :param workers: number of workers of the default pool
+        :param threshold: minimum number of elements checked in parallel,
+                          smaller values are checked directly
+        :param chunk_size: number of elements per chunk
+        """
+        if threshold < 1 or chunk_size < 1:
+            raise ValueError("Parallel threshold and chunk size must be >= 1")
+        self.executor = executor
+        self.processes = processes or \
+            isinstance(executor, ProcessPoolExecutor)
+        self.workers = workers
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def thread_pool(cls, workers: Optional[int] = None,
+                    threshold: int = PARALLEL_THRESHOLD,
+                    chunk_size: int = PARALLEL_CHUNK_SIZE
+                    ) -> 'ParallelPolicy':
+        """
+        :param workers: number of threads, default as ThreadPoolExecutor
+        :param threshold: minimum number of elements checked in parallel
+        :param chunk_size: number of elements per chunk
+        :return: policy checking chunks on a shared thread pool
+        """
+        return cls(None, False, workers, threshold, chunk_size)
+
+    @classmethod
+    def process_pool(cls, workers: Optional[int] = None,
+                     threshold: int = PARALLEL_THRESHOLD,
+                     chunk_size: int = PARALLEL_CHUNK_SIZE
+                     ) -> 'ParallelPolicy':
+        """
+        :param workers: number of processes, default as ProcessPoolExecutor
+        :param threshold: minimum number of elements checked in parallel
+        :param chunk_size: number of elements per chunk
+        :return: policy checking chunks on a shared process pool
+        """
+        return cls(None, True, workers, threshold, chunk_size)
+
+    def pool(self) -> Executor:
+        """
+        :return: pool the chunks are checked on
+        """
+        if self.executor is not None:
+            return self.executor
+        key = (self.processes, self.workers)
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool_class = ProcessPoolExecutor if self.processes \
+                    else ThreadPoolExecutor
+                pool = _POOLS[key] = pool_class(self.workers)
+        return pool
+
+    def __repr__(self) -> str:
+        pool = "processes" if self.processes else "threads"
+        return f"ParallelPolicy({pool}, threshold={self.threshold}, " \
+               f"chunk_size={self.chunk_size})"
+
+
+def _check_range(checks: tuple, items: list, start: int, stop: int,
+                 stopped: threading.Event) -> bool:
+    """
+    checks items[start:stop] on a thread, giving up once stopped is set
+
+    :param checks: check of the list elements, or of the dict keys and
+                   values of the (key, value) pairs of items
+    :param items: list elements, or dict (key, value) pairs
+    :param start: index of the first element checked
+    :param stop: index after the last element checked
+    :param stopped: set once any worker found a failure
+    :return: True if every element checked passed, else False
+    """
+    for block in range(start, stop, STOP_CHECK_INTERVAL):
+        if stopped.is_set():
+            return False
+        block_items = items[block:min(block + STOP_CHECK_INTERVAL, stop)]
+        if len(checks) == 1:
+            check = checks[0]
+            for x in block_items:
+                if not check(x):
+                    return False
+        else:
+            key_check, val_check = checks
+            for x, y in block_items:
+                if not key_check(x) or not val_check(y):
+                    return False
+    return True
+
+
+def _check_chunk(check_type, policy: CheckPolicy, chunk: list) -> bool:
+    """
+    checks a chunk on a process worker, compiling check_type in the worker
+
+    :param check_type: List / Dict type of the whole value
+    :param policy: check policy of the plan of the whole value, e.g.
+                   accepting arrays
+    :param chunk: list elements, or dict (key, value) pairs
+    :return: True if every element of chunk passed, else False
+    """
+    plan = PLANS.get_compiled(check_type, policy)
+    if plan.kind == K_LIST:
+        return plan.check(chunk)
+    key_check, val_check = plan.args[0].check, plan.args[1].check
+    for x, y in chunk:
+        if not key_check(x) or not val_check(y):
+            return False
+    return True
+
+
+def check_parallel(plan: Plan, var, parallel: ParallelPolicy) -> bool:
+    """
+    checks var against plan, checking the elements of large List / Dict
+    values in chunks on the worker pool of parallel
+
+    :param plan: compiled plan
+    :param var: value to check
+    :param parallel: parallel policy
+    :return: True if var is of the type of plan, else False
+    """
+    if plan.kind == K_LIST and type(var) is list:
+        items = var
+        checks = (plan.args[0].check,)
+    elif plan.kind == K_DICT and type(var) is dict:
+        items = None
+        checks = (plan.args[0].check, plan.args[1].check)
+    else:
+        return plan.check(var)
+    if len(var) < parallel.threshold or not plan.policy.is_full:
+        return plan.check(var)
+    if items is None:
+        items = list(var.items())
+
+    size = parallel.chunk_size
+    pool = parallel.pool()
+    stopped = threading.Event()
+    if parallel.processes:
+        pending = {pool.submit(_check_chunk, plan.check_type, plan.policy,
+                               items[start:start + size])
+                   for start in range(0, len(items), size)}
+    else:
+        pending = {pool.submit(_check_range, checks, items, start,
+                               min(start + size, len(items)), stopped)
+                   for start in range(0, len(items), size)}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if not all(future.result() for future in done):
+                return False
+        return True
+    finally:
+        # stop early: running thread workers give up, queued chunks are
+        # cancelled
+        stopped.set()
+        for future in pending:
+            future.cancel()
+
+
+def parallel_plan(plan: Plan, parallel: ParallelPolicy) -> Plan:
+    """
+    gets a plan checking large List / Dict values in parallel
+
+    :param plan: compiled plan
+    :param parallel: parallel policy
+    :return: plan with the same type and kind, checked by check_parallel
+    """
+    def check(var) -> bool:
+        return check_parallel(plan, var, parallel)
+    return Plan(plan.check_type, plan.kind, plan.args, check, plan.policy)
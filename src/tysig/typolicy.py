@@ -0,0 +1,150 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    typolicy.py
+
+    Check policies controlling how much of a large container is checked
+    by a compiled plan: every element (full), the first N elements, a
+    random sample of N elements, or only the outer containers beyond a
+    maximum nesting depth. Policies can also opt in to accepting NumPy
+    arrays and buffer-protocol objects for List, Tuple[T, ...] and
+    Sequence[T] types.
+"""
+
+from typing import Optional
+import random
+
+# policy modes
+FULL = "full"
+FIRST = "first"
+SAMPLE = "sample"
+DEPTH = "depth"
+
+
+class CheckPolicy(object):
+    """
+    policy applied to the List and Dict elements checked by a compiled
+    plan. Tuples are fixed size, so their elements are always checked.
+    Policies are immutable; sampling policies own their random generator
+    so compile a sampling policy once and reuse it.
+
+    With arrays set, List, Tuple[T, ...] and Sequence[T] types also
+    accept NumPy arrays and objects supporting the buffer protocol
+    (array.array, memoryview, ...) other than str / bytes / bytearray.
+    These are checked in O(1) from their dtype or buffer format (see
+    tyarray)
+    """
+
+    __slots__ = ('mode', 'n', 'max_depth', 'rng', 'arrays')
+
+    def __init__(self, mode: str = FULL, n: Optional[int] = None,
+                 max_depth: Optional[int] = None,
+                 rng: Optional[random.Random] = None,
+                 arrays: bool = False):
+        """
+        :param mode: one of FULL, FIRST, SAMPLE, DEPTH
+        :param n: number of elements checked per container (FIRST, SAMPLE)
+        :param max_depth: container depth checked fully (DEPTH), deeper
+                          containers are only checked to be containers
+        :param rng: random generator used to sample elements (SAMPLE)
+        :param arrays: accept array-like values for List, Tuple[T, ...]
+                       and Sequence[T] types
+        """
+        if mode not in (FULL, FIRST, SAMPLE, DEPTH):
+            raise ValueError(f"Unknown check policy mode '{mode}'")
+        if mode in (FIRST, SAMPLE) and (n is None or n < 0):
+            raise ValueError(f"Check policy '{mode}' needs n >= 0")
+        if mode == DEPTH and (max_depth is None or max_depth < 0):
+            raise ValueError(f"Check policy '{mode}' needs max_depth >= 0")
+        if mode == SAMPLE and rng is None:
+            rng = random.Random()
+        self.mode = mode
+        self.n = n
+        self.max_depth = max_depth
+        self.rng = rng
+        self.arrays = arrays
+
+    @classmethod
+    def full(cls, arrays: bool = False) -> 'CheckPolicy':
+        """
+        :param arrays: accept array-like values for List, Tuple[T, ...]
+                       and Sequence[T] types
+        :return: policy checking every element
+        """
+        return cls(FULL, arrays=True) if arrays else FULL_POLICY
+
+    @classmethod
+    def first(cls, n: int, arrays: bool = False) -> 'CheckPolicy':
+        """
+        :param n: number of leading elements checked in each List / Dict
+        :param arrays: accept array-like values for List, Tuple[T, ...]
+                       and Sequence[T] types
+        :return: policy checking the first n elements
+        """
+        return cls(FIRST, n=n, arrays=arrays)
+
+    @classmethod
+    def sample(cls, n: int, seed=None,
+               rng: Optional[random.Random] = None,
+               arrays: bool = False) -> 'CheckPolicy':
+        """
+        :param n: number of random elements checked in each List / Dict
+        :param seed: seed of the random generator
+        :param rng: random generator to use instead of seeding a new one
+        :param arrays: accept array-like values for List, Tuple[T, ...]
+                       and Sequence[T] types
+        :return: policy checking a random sample of n elements
+        """
+        return cls(SAMPLE, n=n, rng=rng if rng is not None
+                   else random.Random(seed), arrays=arrays)
+
+    @classmethod
+    def depth(cls, max_depth: int, arrays: bool = False) -> 'CheckPolicy':
+        """
+        :param max_depth: number of container levels checked element-wise
+        :param arrays: accept array-like values for List, Tuple[T, ...]
+                       and Sequence[T] types
+        :return: policy checking only the outer container beyond max_depth
+        """
+        return cls(DEPTH, max_depth=max_depth, arrays=arrays)
+
+    @property
+    def is_full(self) -> bool:
+        """
+        :return: True if values are checked completely under this policy
+        """
+        return self.mode == FULL
+
+    def sub(self) -> Optional['CheckPolicy']:
+        """
+        gets the policy applied to the elements of a container
+
+        :return: policy of the elements, or None if they are not checked
+        """
+        if self.mode != DEPTH:
+            return self
+        if self.max_depth == 0:
+            return None
+        return CheckPolicy(DEPTH, max_depth=self.max_depth - 1,
+                           arrays=self.arrays)
+
+    def _key(self) -> tuple:
+        return self.mode, self.n, self.max_depth, self.rng, self.arrays
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CheckPolicy) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        arrays = ", arrays=True" if self.arrays else ""
+        if self.mode in (FIRST, SAMPLE):
+            return f"CheckPolicy('{self.mode}', n={self.n}{arrays})"
+        elif self.mode == DEPTH:
+            return f"CheckPolicy('{self.mode}', " \
+                   f"max_depth={self.max_depth}{arrays})"
+        return f"CheckPolicy('{self.mode}'{arrays})"
+
+
+FULL_POLICY = CheckPolicy(FULL)
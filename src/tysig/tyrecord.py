@@ -0,0 +1,125 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyrecord.py
+
+    Record classes: compact __slots__ classes of typed fields, validated by
+    a generated __init__ and on each field assignment using the compiled
+    plans of the field types. Records hold no instance __dict__, and a
+    record passes a check against its class with a plain isinstance, as
+    its fields were checked when they were stored.
+"""
+
+from typing import Callable, Optional
+from tysig.tyerrors import ARGS_ERROR, RECORD_FIELD_ERROR, \
+    RECORD_DEFAULT_ERROR
+from tysig.tybind import _NO_DEF
+from tysig.tyexplain import with_path
+
+# names a record field cannot take
+RESERVED_NAMES = frozenset(('self', '_fields', '_field_types'))
+
+
+def _field_error(fields: dict, name: str, var) -> TypeError:
+    """
+    :param fields: (type, plan) of each field name
+    :param name: name of the failing field
+    :param var: value given to the field
+    :return: TypeError ending with the path of the failing element
+    """
+    vtype, plan = fields[name]
+    return TypeError(with_path(ARGS_ERROR.format(name, vtype, type(var)),
+                               plan, var, name))
+
+
+def _init_source(params: tuple) -> str:
+    """
+    :param params: (name, default, type, plan) of each field
+    :return: source of the __init__ checking and storing each field
+    """
+    args, body = ["self"], []
+    for idx, (vname, vdef, _, _) in enumerate(params):
+        args.append(vname if vdef is _NO_DEF else f"{vname}=_d{idx}")
+        body += [f"    if not _c{idx}({vname}):",
+                 f"        raise _error({vname!r}, {vname})",
+                 f"    _s{idx}(self, {vname})"]
+    return f"def __init__({', '.join(args)}):\n" + \
+        "\n".join(body or ["    pass"])
+
+
+def _repr(self) -> str:
+    fields = ", ".join(f"{x}={getattr(self, x)!r}" for x in self._fields)
+    return f"{type(self).__qualname__}({fields})"
+
+
+def _eq(self, other) -> bool:
+    if type(other) is not type(self):
+        return NotImplemented
+    return all(getattr(self, x) == getattr(other, x) for x in self._fields)
+
+
+def _reduce(self):
+    return type(self), tuple(getattr(self, x) for x in self._fields)
+
+
+def make_record(name: str, params: tuple, namespace: Optional[dict] = None,
+                bases: tuple = (), module: Optional[str] = None) -> type:
+    """
+    creates a record class
+
+    :param name: name of the class
+    :param params: (name, default, type, plan) of each field, default
+                   being _NO_DEF when there is none
+    :param namespace: class attributes e.g. methods, default none
+    :param bases: base classes, default object
+    :param module: module of the class
+    :return: record class
+    """
+    names = [vname for vname, _, _, _ in params]
+    reserved = RESERVED_NAMES.intersection(names)
+    if reserved:
+        raise TypeError(RECORD_FIELD_ERROR.format(sorted(reserved)[0]))
+    seen_default = None
+    for vname, vdef, _, _ in params:
+        if vdef is not _NO_DEF:
+            seen_default = vname
+        elif seen_default is not None:
+            raise TypeError(RECORD_DEFAULT_ERROR.format(vname, seen_default))
+
+    fields = {vname: (vtype, plan) for vname, _, vtype, plan in params}
+    attrs = {x: y for x, y in (namespace or dict()).items()
+             if x not in ('__dict__', '__weakref__') and x not in names}
+    attrs.setdefault('__repr__', _repr)
+    attrs.setdefault('__eq__', _eq)
+    attrs.setdefault('__reduce__', _reduce)
+    attrs.update({'__slots__': tuple(names), '__match_args__': tuple(names),
+                  '_fields': tuple(names),
+                  '_field_types': {x: y for x, (y, _) in fields.items()}})
+    if module is not None:
+        attrs['__module__'] = module
+    cls = type(name, bases or (object,), attrs)
+    # stored through the slot descriptors, as __setattr__ checks again
+    slot_set = {vname: getattr(cls, vname).__set__ for vname in names}
+
+    def error(vname: str, var) -> TypeError:
+        return _field_error(fields, vname, var)
+
+    globs: dict = {'_error': error}
+    for idx, (vname, vdef, _, plan) in enumerate(params):
+        globs.update({f"_c{idx}": plan.check, f"_s{idx}": slot_set[vname],
+                      f"_d{idx}": vdef})
+    exec(_init_source(params), globs)
+    init: Callable = globs['__init__']
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    cls.__init__ = init
+
+    base_setattr = cls.__setattr__
+
+    def __setattr__(self, vname: str, var):
+        field = fields.get(vname)
+        if field is not None and not field[1].check(var):
+            raise error(vname, var)
+        base_setattr(self, vname, var)
+    __setattr__.__qualname__ = f"{cls.__qualname__}.__setattr__"
+    cls.__setattr__ = __setattr__
+    return cls
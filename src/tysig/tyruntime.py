@@ -0,0 +1,222 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tyruntime.py
+
+    Runtime check policies deciding which calls of a signature decorated
+    function are checked: every call (full), none (off), 1 in N calls, or
+    the first K calls of each call shape. Policies are set globally, per
+    module (or package) and per decorated function, and can be overridden
+    within a scope by a context manager.
+"""
+
+from typing import Optional, Dict
+from contextlib import contextmanager
+import contextvars
+
+# runtime modes
+R_FULL = "full"
+R_OFF = "off"
+R_EVERY = "every"
+R_FIRST = "first"
+
+CALLS_CACHE_SIZE = 64
+
+
+class RuntimePolicy(object):
+    """
+    policy deciding which calls of a decorated function are checked. Calls
+    that are not checked still bind args and apply default values, but
+    skip the type checks of the args and of the return value
+    """
+
+    __slots__ = ('mode', 'n')
+
+    def __init__(self, mode: str = R_FULL, n: Optional[int] = None):
+        """
+        :param mode: one of R_FULL, R_OFF, R_EVERY, R_FIRST
+        :param n: check 1 in n calls (R_EVERY), or the first n calls of
+                  each call shape (R_FIRST)
+        """
+        if mode not in (R_FULL, R_OFF, R_EVERY, R_FIRST):
+            raise ValueError(f"Unknown runtime policy mode '{mode}'")
+        if mode in (R_EVERY, R_FIRST) and (n is None or n < 1):
+            raise ValueError(f"Runtime policy '{mode}' needs n >= 1")
+        self.mode = mode
+        self.n = n
+
+    @classmethod
+    def full(cls) -> 'RuntimePolicy':
+        """
+        :return: policy checking every call
+        """
+        return RUNTIME_FULL
+
+    @classmethod
+    def off(cls) -> 'RuntimePolicy':
+        """
+        :return: policy checking no calls
+        """
+        return RUNTIME_OFF
+
+    @classmethod
+    def every(cls, n: int) -> 'RuntimePolicy':
+        """
+        :param n: check 1 in n calls, starting with the first call
+        :return: policy checking 1 in n calls
+        """
+        return cls(R_EVERY, n)
+
+    @classmethod
+    def first(cls, n: int) -> 'RuntimePolicy':
+        """
+        :param n: number of calls of each call shape checked
+        :return: policy checking the first n calls of each call shape
+        """
+        return cls(R_FIRST, n)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RuntimePolicy) and \
+            (self.mode, self.n) == (other.mode, other.n)
+
+    def __hash__(self) -> int:
+        return hash((self.mode, self.n))
+
+    def __repr__(self) -> str:
+        if self.n is None:
+            return f"RuntimePolicy('{self.mode}')"
+        return f"RuntimePolicy('{self.mode}', {self.n})"
+
+
+RUNTIME_FULL = RuntimePolicy(R_FULL)
+RUNTIME_OFF = RuntimePolicy(R_OFF)
+
+# policies set globally and per module, with a version bumped on changes
+# so decorated functions only re-resolve their policy after a change
+_policies = {"global": RUNTIME_FULL, "modules": dict(), "version": 0}
+
+_override: contextvars.ContextVar = contextvars.ContextVar(
+    "tysig_runtime_policy", default=None)
+
+
+def set_policy(policy: Optional[RuntimePolicy],
+               module: Optional[str] = None):
+    """
+    sets the runtime policy globally, or of a module or package
+
+    :param policy: runtime policy, None to remove the policy of module
+    :param module: module / package name e.g. "pkg.handlers", policies of
+                   packages apply to their sub modules
+    """
+    if module is None:
+        _policies["global"] = policy or RUNTIME_FULL
+    elif policy is None:
+        _policies["modules"].pop(module, None)
+    else:
+        _policies["modules"][module] = policy
+    _policies["version"] += 1
+
+
+def module_policy(module: Optional[str]) -> RuntimePolicy:
+    """
+    gets the runtime policy applying to module, i.e. the policy of the
+    module, or of its closest package, or the global policy
+
+    :param module: module name
+    :return: runtime policy
+    """
+    modules: Dict[str, RuntimePolicy] = _policies["modules"]
+    name = module or ""
+    while name:
+        policy = modules.get(name)
+        if policy is not None:
+            return policy
+        name = name.rpartition(".")[0]
+    return _policies["global"]
+
+
+@contextmanager
+def checking(policy: RuntimePolicy):
+    """
+    context manager applying policy to every decorated function called
+    within its scope (of the current thread / async task), overriding
+    global, module and function policies
+
+    :param policy: runtime policy applied within the scope
+    """
+    token = _override.set(policy)
+    try:
+        yield policy
+    finally:
+        _override.reset(token)
+
+
+class FunctionRuntime(object):
+    """
+    runtime policy state of a decorated function: its own policy, if set,
+    and the call counters of the R_EVERY and R_FIRST modes. The counters
+    are updated without a lock: an update lost to a concurrent call only
+    makes the sampling approximate, e.g. a few more calls checked
+    """
+
+    __slots__ = ('module', 'policy', 'resolved', 'version', 'calls',
+                 'shape_calls')
+
+    def __init__(self, module: Optional[str]):
+        """
+        :param module: module of the decorated function
+        """
+        self.module = module
+        self.policy: Optional[RuntimePolicy] = None
+        self.resolved = RUNTIME_FULL
+        self.version = -1
+        self.calls = 0
+        self.shape_calls: dict = dict()
+
+    def set_policy(self, policy: Optional[RuntimePolicy]):
+        """
+        :param policy: runtime policy of the function, None to use the
+                       module / global policy
+        """
+        self.policy = policy
+        self.version = -1
+
+    def current(self) -> RuntimePolicy:
+        """
+        :return: runtime policy applying to the current call
+        """
+        override = _override.get()
+        if override is not None:
+            return override
+        if self.version != _policies["version"]:
+            self.version = _policies["version"]
+            self.resolved = self.policy or module_policy(self.module)
+        return self.resolved
+
+    def should_check(self, shape_of, in_args: tuple, in_kwargs: dict) -> bool:
+        """
+        decides whether the current call is checked
+
+        :param shape_of: function returning the call shape of the args
+        :param in_args: positional arguments
+        :param in_kwargs: keyword arguments
+        :return: True if the call is checked, else False
+        """
+        policy = self.current()
+        mode = policy.mode
+        if mode == R_FULL:
+            return True
+        elif mode == R_OFF:
+            return False
+        elif mode == R_EVERY:
+            calls = self.calls
+            self.calls = calls + 1
+            return calls % policy.n == 0
+
+        shape = shape_of(in_args, in_kwargs)
+        calls = self.shape_calls.get(shape, 0)
+        if calls >= policy.n:
+            return False
+        if calls or len(self.shape_calls) < CALLS_CACHE_SIZE:
+            self.shape_calls[shape] = calls + 1
+        return True
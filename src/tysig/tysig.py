@@ -8,11 +8,39 @@
     Tuple, Dict, List, TypeVar. Also checking return types.
 """
 
-from typing import Union, Optional, Callable, get_type_hints
+from typing import Optional, Callable, Iterable, Sequence, List, Dict, \
+    get_type_hints
 import typing
 from functools import wraps
-from tysig.tyerrors import DEFAULT_ERROR, SIG_TYPE_ERROR, ARGS_ERROR, \
-    UNEXP_ERROR, RET_TYPE_ERROR
+import inspect
+from tysig.tyerrors import DEFAULT_ERROR, SIG_TYPE_ERROR, RET_TYPE_ERROR, \
+    MEMO_ERROR
+from tysig.tycompile import Plan, PLANS, K_DICT, COST_LINEAR, \
+    rejects_class, accepts_class
+import tysig.tycompile as tycompile
+from tysig.typolicy import CheckPolicy, FULL_POLICY
+from tysig.tycache import ResultCache, MemoCache, MEMO_MISS
+from tysig.tystack import ENGINE_RECURSIVE, ENGINE_STACK, check_stack, \
+    stack_plan
+from tysig.typarallel import ParallelPolicy, parallel_plan, check_parallel
+from tysig.tyadapt import ADAPTIVE
+from tysig.tytyped import CheckedList, CheckedDict
+from tysig.tyrecord import make_record
+from tysig.tyjson import validate_json
+from tysig.tystream import StreamValidator, StreamReport, Reject, F_JSONL, \
+    REPORT_EVERY
+from tysig.tylazy import is_lazy, wrap_lazy, wrap_async_generator
+from tysig.tybind import Binder, _NO_DEF
+from tysig.tyexplain import with_path
+from tysig.tyruntime import RuntimePolicy, FunctionRuntime
+import tysig.tyruntime as tyruntime
+from tysig.tystats import STATS, clock, write_prometheus
+
+# options of signature memoizing return values
+MEMO_OPTIONS = ('cache', 'cache_ttl', 'cache_key')
+
+# names of the typing types e.g. List, Union, computed once on import
+TYPING_NAMES = frozenset(x for x in typing.__all__ if x[0].isupper())
 
 
 class TySig(object):
@@ -43,75 +71,437 @@ class TySig(object):
                 pass
         return ftype
 
+    @staticmethod
+    def compile(check_type, policy: Optional[CheckPolicy] = None,
+                results: Optional[ResultCache] = None,
+                engine: str = ENGINE_RECURSIVE,
+                parallel: Optional[ParallelPolicy] = None,
+                adaptive: bool = False) -> Plan:
+        """
+        compiles check_type into a reusable validator. The type is inspected
+        once and the compiled plan is memoized in a bounded cache keyed by
+        the type object, so compiling the same type again is a lookup
+
+        :param check_type: type to compile e.g. Dict[str, List[int]]
+        :param policy: check policy for large List / Dict values e.g.
+                       CheckPolicy.first(100), default checks every element.
+                       The policy used is reported by the validator's policy
+        :param results: result cache e.g. tycache.RESULTS, remembering the
+                        result of checking deeply immutable values (tuples,
+                        frozensets) so the same object is only walked once
+        :param engine: ENGINE_RECURSIVE (default) or ENGINE_STACK, checking
+                       values with an explicit work stack (see tystack)
+        :param parallel: parallel policy e.g. ParallelPolicy.thread_pool(),
+                         checking the elements of large List / Dict values
+                         in chunks on a worker pool (see typarallel)
+        :param adaptive: set to True to get the adaptive validator of
+                         check_type, specialized to the classes of the
+                         values it sees once warmed up (see tyadapt and
+                         adaptations). Pass it to signature to adapt a
+                         param e.g. a=TySig.compile(List[int], adaptive=True)
+        :return: validator, call it with a value to get True / False
+        """
+        plans = ADAPTIVE if adaptive else PLANS
+        plan = plans.get(check_type, policy or FULL_POLICY)
+        if engine == ENGINE_STACK:
+            plan = stack_plan(plan)
+        elif engine != ENGINE_RECURSIVE:
+            raise ValueError(f"Unknown engine '{engine}'")
+        if parallel is not None:
+            plan = parallel_plan(plan, parallel)
+        if results is not None:
+            return results.cached(plan)
+        return plan
+
     @staticmethod
     def is_type(
             var: object,
-            check_type
+            check_type,
+            policy: Optional[CheckPolicy] = None,
+            engine: str = ENGINE_RECURSIVE,
+            parallel: Optional[ParallelPolicy] = None,
+            adaptive: bool = False
     ) -> bool:
         """
-        recursively checks if var is of type check_type
+        recursively checks if var is of type check_type, using the compiled
+        plan of check_type (see compile)
+
+        Iterator, Iterable and Generator values are only checked to be
+        streams, as checking their items would consume them; signature
+        checks their items lazily instead
 
         :param var: variable to check type
         :param check_type: type to check against
+        :param policy: check policy for large List / Dict values, default
+                       checks every element
+        :param engine: ENGINE_RECURSIVE (default) or ENGINE_STACK, walking
+                       var with an explicit work stack instead of recursion
+        :param parallel: parallel policy, checking the elements of large
+                         List / Dict values in chunks on a worker pool
+        :param adaptive: set to True to check var with the adaptive
+                         validator of check_type (see compile)
         :return: True if var is of type check_type, else False
         """
-        try:
-            return isinstance(var, check_type)
-        except TypeError:
-            pass
-        type_has_dict = hasattr(
-            check_type, '__dict__'
-        ) and len(check_type.__getattribute__('__dict__')) > 0
-        if not type_has_dict:
-            attr = TySig.getattr_name(check_type)
-            if attr == "Any":
-                return True
-            elif attr == "AnyStr":
-                return isinstance(var, str) or isinstance(var, bytearray) \
-                       or isinstance(var, bytes)
-            else:  # None or otherwise
-                return False
-        else:
-            type_dict = check_type.__getattribute__('__dict__')
-            type_args = type_dict['__args__']
-            type_origin = type_dict['__origin__']
-
-            if (type_origin is Union) or (type_origin is Optional):
-                correct_type = any(TySig.is_type(var, x) for x in type_args)
-
-            elif (type_origin is list) and (isinstance(var, list)):
-                correct_type = all(TySig.is_type(x, type_args[0]) for x in var)
-
-            elif (type_origin is tuple) and (isinstance(var, tuple)):
-                if len(var) == len(type_args):
-                    correct_type = all(TySig.is_type(x, type_args[i])
-                                       for i, x in enumerate(var))
-                else:
-                    correct_type = False
-
-            elif (type_origin is dict) and (isinstance(var, dict)):
-                correct_keys = all(TySig.is_type(x, type_args[0])
-                                   for x in var.keys())
-                correct_vals = all(TySig.is_type(x, type_args[1])
-                                   for x in var.values())
-                correct_type = correct_keys and correct_vals
+        plans = ADAPTIVE if adaptive else PLANS
+        plan = plans.get(check_type, policy or FULL_POLICY)
+        if parallel is not None:
+            return check_parallel(plan, var, parallel)
+        if engine == ENGINE_STACK:
+            return check_stack(plan, var)
+        return plan.check(var)
+
+    @staticmethod
+    def register_checker(type_or_origin, fn: Callable[[object, object], bool],
+                         cost_hint: int = COST_LINEAR):
+        """
+        registers a custom check of a class, or of the types subscripted
+        from a generic origin, used by compiled validators, is_type and
+        signature in place of isinstance e.g. a record batch validated
+        from its own schema:
+            TySig.register_checker(RecordBatch, check_batch,
+                                   cost_hint=COST_CONSTANT)
+
+        :param type_or_origin: class, or generic origin e.g. RecordBatch
+        :param fn: check called with the value and the type checked against
+                   (e.g. RecordBatch[Trade]), returning True / False
+        :param cost_hint: relative cost of fn (see tycompile COST_CONSTANT,
+                          COST_LINEAR), members of a Union are checked
+                          cheapest first
+        """
+        tycompile.register_checker(type_or_origin, fn, cost_hint)
+
+    @staticmethod
+    def unregister_checker(type_or_origin):
+        """
+        removes the custom check of a class or generic origin
+
+        :param type_or_origin: class, or generic origin
+        """
+        tycompile.unregister_checker(type_or_origin)
+
+    @staticmethod
+    def record(name: Optional[str] = None, /, **in_vars_types):
+        """
+        creates a record class: a __slots__ class (no instance __dict__) of
+        typed fields, given in the same format as signature params. The
+        generated __init__ takes the fields in order, positionally or by
+        name, and checks each against its type, as does each later field
+        assignment. A record is then checked against its class by
+        is_type / signature with a plain isinstance, in O(1).
+
+        Used as a factory, Point = TySig.record("Point", x=int, y=(0, int)),
+        or as a class decorator, keeping the methods of the class:
+
+            @TySig.record(x=int, y=(0, int))
+            class Point:
+                def norm(self): ...
+
+        Fields are checked when stored: mutating a mutable field value in
+        place is not seen by the record, see typed for checked containers
+
+        :param name: name of the class created, None when decorating
+                     (positional only, so a field can be called name)
+        :param in_vars_types: fields with their types and/or default values
+                              e.g. x=int, tags=((), Tuple[str, ...])
+        :return: record class, or class decorator if name is None
+        """
+        params = TySig.resolve_params(in_vars_types)
+        if name is not None:
+            return make_record(name, params,
+                               module=inspect.currentframe().f_back
+                               .f_globals.get('__name__'))
+
+        def inner(cls: type) -> type:
+            namespace = dict(vars(cls), __qualname__=cls.__qualname__)
+            return make_record(cls.__name__, params, namespace,
+                               cls.__bases__)
+        return inner
+
+    @staticmethod
+    def validate_stream(fileobj, schema: dict, format: str = F_JSONL,
+                        on_reject: Optional[Callable[[Reject], None]] = None,
+                        on_report: Optional[Callable[[StreamReport],
+                                                     None]] = None,
+                        report_every: int = REPORT_EVERY) -> StreamValidator:
+        """
+        validates the rows of a JSON Lines or CSV file against schema,
+        reading the file in chunks of lines so memory use stays constant.
+        Iterating the result yields the valid rows (dicts, with the default
+        values of missing fields applied) and a Reject (line number, row,
+        field and error message) for each invalid row, unless on_reject is
+        given. The counters and rows/sec are kept in the result's report
+
+            for row in TySig.validate_stream(fp, dict(id=int, tags=(
+                    [], List[str])), on_reject=rejects.append):
+                ...
+
+        CSV files start with a header line. CSV cells failing their field
+        type as strings are decoded as JSON e.g. "1" for an int field, and
+        empty cells are missing (None if the field has no default)
+
+        :param fileobj: text file object
+        :param schema: fields with their types and/or default values, as
+                       signature params e.g. dict(a=int, b=(2, int))
+        :param format: "jsonl" or "csv"
+        :param on_reject: called with each Reject, default yields them
+        :param on_report: called with the StreamReport every report_every
+                          rows and once the file is exhausted
+        :param report_every: rows between calls of on_report
+        :return: StreamValidator iterable of the rows
+        """
+        return StreamValidator(fileobj, TySig.resolve_params(schema), format,
+                               on_reject, on_report, report_every)
+
+    @staticmethod
+    def validate_json(source, check_type, build: bool = True,
+                      name: str = "json"):
+        """
+        parses a JSON document, checking it against check_type while it is
+        parsed (see tyjson) instead of loading it whole then checking it:
+        the document is read incrementally from a file object, rejected at
+        its first mismatch, and with build=False validated without
+        building its values
+
+        JSON arrays are checked as List, Sequence and Tuple values (built
+        as tuples for the latter), objects as Dict and Mapping values e.g.
+        TySig.validate_json(fp, Dict[str, List[Tuple[int, str]]])
+
+        :param source: str, bytes or a file object (text or binary)
+        :param check_type: type of the document
+        :param build: set to False to only validate the document
+        :param name: name of the document, the root of the failing path
+        :return: parsed value, or None if not built
+        :raises TypeError: at the first value failing its type
+        :raises ValueError: if the document is not valid JSON
+        """
+        return validate_json(source, PLANS.get(check_type), build, name)
+
+    @staticmethod
+    def typed(check_type, data=()):
+        """
+        creates a checked container of type check_type, checking data now
+        and the elements stored by each later mutation (append, extend,
+        item assignment, update, ...). is_type and signature accept the
+        container in O(1) when checked against check_type
+
+        :param check_type: List[T] or Dict[K, V] type e.g. List[int]
+        :param data: initial elements / items
+        :return: CheckedList or CheckedDict of check_type
+        """
+        if PLANS.get_compiled(check_type).kind == K_DICT:
+            return CheckedDict(check_type, data)
+        return CheckedList(check_type, data)
+
+    @staticmethod
+    def adaptations() -> List[dict]:
+        """
+        reports the specialization decisions of the adaptive validators
+        (see compile), including their nested ones: state (warmup,
+        specialized, general or deoptimized), the guard of the fast path
+        (names of the classes of the value, and of the dict keys and
+        elements) and how often it held
+
+        :return: list of dicts of the adaptive validators
+        """
+        return ADAPTIVE.report()
+
+    @staticmethod
+    def is_type_many(
+            values: Iterable,
+            check_type,
+            policy: Optional[CheckPolicy] = None,
+            failures: bool = False
+    ) -> List:
+        """
+        checks many independent values against check_type. check_type is
+        compiled once, and values are grouped by their concrete type() so
+        each group is checked together; groups whose class alone decides
+        the result (e.g. str values against int) are resolved without
+        checking the values one by one
+
+        :param values: values to check
+        :param check_type: type to check against
+        :param policy: check policy for large List / Dict values, default
+                       checks every element
+        :param failures: set to True to get the indices of the values that
+                         fail instead of a mask
+        :return: list of True / False per value, or list of failing indices
+        """
+        values = values if isinstance(values, Sequence) else list(values)
+        plan = PLANS.get(check_type, policy or FULL_POLICY)
+
+        groups: Dict[type, List[int]] = dict()
+        for idx, var in enumerate(values):
+            cls = type(var)
+            group = groups.get(cls)
+            if group is None:
+                groups[cls] = [idx]
             else:
-                correct_type = False
+                group.append(idx)
+
+        mask = [True] * len(values)
+        check = plan.check
+        for cls, group in groups.items():
+            if rejects_class(plan, cls):
+                for idx in group:
+                    mask[idx] = False
+            elif not accepts_class(plan, cls):
+                for idx in group:
+                    if not check(values[idx]):
+                        mask[idx] = False
+
+        if failures:
+            return [idx for idx, ok in enumerate(mask) if not ok]
+        return mask
+
+    @staticmethod
+    def set_policy(policy: Optional[RuntimePolicy],
+                   module: Optional[str] = None,
+                   function: Optional[Callable] = None):
+        """
+        sets the runtime policy deciding which calls of signature decorated
+        functions are checked: RuntimePolicy.full() (default), .off(),
+        .every(n) checking 1 in n calls, or .first(k) checking the first k
+        calls of each call shape (keyword names and positional arg types).
+        The policy of a function takes precedence over the policy of its
+        module (or closest package), which takes precedence over the global
+        policy
+
+        :param policy: runtime policy, None to remove the policy of module
+                       or function (the global policy resets to full)
+        :param module: module / package name to set the policy of
+        :param function: signature decorated function to set the policy of
+        """
+        if function is not None:
+            runtime = getattr(function, 'runtime', None)
+            if not isinstance(runtime, FunctionRuntime):
+                raise ValueError(f"{function} is not signature decorated")
+            runtime.set_policy(policy)
+        else:
+            tyruntime.set_policy(policy, module)
+
+    @staticmethod
+    def checking(policy: RuntimePolicy):
+        """
+        context manager applying the runtime policy policy to every call of
+        signature decorated functions within its scope, overriding global,
+        module and function policies e.g.
+            with TySig.checking(RuntimePolicy.full()): ...
+
+        :param policy: runtime policy applied within the scope
+        :return: context manager
+        """
+        return tyruntime.checking(policy)
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, int]]:
+        """
+        gets a snapshot of the overhead counters of the signature decorated
+        functions: calls, checked_calls, and the time in nanoseconds spent
+        binding args of unchecked calls (bind_ns), binding and checking
+        args of checked calls (check_args_ns), checking return values
+        (check_return_ns) and in the functions (function_ns). Calls raising
+        an exception are not counted
+
+        :return: dict of function qualified name -> dict of counters
+        """
+        return STATS.snapshot()
+
+    @staticmethod
+    def reset_stats():
+        """
+        resets the overhead counters of every signature decorated function
+        """
+        STATS.reset()
+
+    @staticmethod
+    def write_stats(path: str):
+        """
+        writes the overhead counters (see stats) to path in the Prometheus
+        text exposition format e.g. for the node exporter textfile collector
 
-            return correct_type
+        :param path: file to write
+        """
+        write_prometheus(path)
 
     @staticmethod
     def is_typing_type(vtype):
         """
         check if type vtype is a typing type of either:
-        _GenericAlias, _VariadicGenericAlias, or _SpecialForm
+        _GenericAlias, _VariadicGenericAlias, or _SpecialForm, or a
+        subscripted builtin type e.g. list[int] (PEP 585), or a union
+        e.g. int | None (PEP 604)
 
         :param vtype: we are checking the type of this type
         :return: True if is a typing type, else False
         """
-        type_name = TySig.getattr_name(vtype)
-        typing_types = [x for x in typing.__dict__['__all__'] if x[0].isupper()]
-        return type_name in typing_types
+        return TySig.getattr_name(vtype) in TYPING_NAMES or \
+            typing.get_origin(vtype) is not None
+
+    @staticmethod
+    def get_def_type(vdeftype, no_def=None) -> tuple:
+        """
+        gets the default value and type of a signature parameter, given
+        either as a type e.g. int, or as a (default, type) tuple e.g. (2, int).
+        A compiled validator (see compile) can be given in place of the type
+
+        :param vdeftype: type, or tuple of default value and type
+        :param no_def: value returned as the default when there is none
+        :return: tuple of default value and type
+        """
+        if TySig.is_typing_type(vdeftype) or \
+                isinstance(vdeftype, (type, Plan)):
+            return no_def, vdeftype
+        elif isinstance(vdeftype, tuple):
+            vdef, vtype = vdeftype
+            return vdef, vtype
+        raise TypeError(SIG_TYPE_ERROR.format(type(vdeftype)))
+
+    @staticmethod
+    def is_param_spec(vdeftype) -> bool:
+        """
+        :param vdeftype: value given for a signature param
+        :return: True if vdeftype is a type, a compiled validator or a
+                 (default, type) tuple
+        """
+        return isinstance(vdeftype, (type, Plan, tuple)) or \
+            TySig.is_typing_type(vdeftype)
+
+    @staticmethod
+    def get_return_type(fun: Callable):
+        """
+        gets the return type annotation of function fun
+
+        :param fun: function to get the return type of
+        :return: return type if annotated, else None
+        """
+        return get_type_hints(fun).get('return')
+
+    @staticmethod
+    def resolve_params(in_vars_types: dict) -> tuple:
+        """
+        resolves the types and default values of signature params (or
+        record fields), compiling each type and checking each default
+
+        :param in_vars_types: names with their types and/or default values
+                              e.g. dict(a=int, b=(2, int))
+        :return: tuple of (name, default, type, compiled plan) of each
+                 param, default being _NO_DEF when there is none
+        """
+        params = []
+        for vname, vdeftype in in_vars_types.items():
+            vdef, vtype = TySig.get_def_type(vdeftype, _NO_DEF)
+            if isinstance(vtype, Plan):  # e.g. compiled with a check policy
+                plan, vtype = vtype, vtype.check_type
+            else:
+                plan = TySig.compile(vtype)
+            # check default types which are of type tuple e.g. (2, int)
+            if vdef is not _NO_DEF and not plan.check(vdef):
+                raise TypeError(
+                    DEFAULT_ERROR.format(vname, type(vdef), vtype)
+                )
+            params.append((vname, vdef, vtype, plan))
+        return tuple(params)
 
     @staticmethod
     def signature(classobj: bool = False, **in_vars_types):
@@ -122,120 +512,246 @@ class TySig(object):
 
         Return types are also checked post execution of function.
 
+        The parameter types, default values and return type are resolved
+        once when the decorator is applied; a default value that does not
+        match its type raises a TypeError at decoration time.
+
+        Iterator[T], Iterable[T] and Generator[Y, S, R] args and return
+        values are passed on wrapped in proxies checking each item as it is
+        consumed, raising a TypeError on the first item of the wrong type.
+
+        Coroutine functions are checked by an async wrapper: args before
+        the coroutine is awaited and the awaited result against the return
+        type. Items yielded by async generator functions are checked
+        against the return type e.g. AsyncIterator[int], and AsyncIterator,
+        AsyncIterable and AsyncGenerator args are checked lazily.
+
+        The TypeError raised by a failing check of a nested value ends with
+        the path of the failing element, found by re-walking the value only
+        once the check has failed (see tyexplain) e.g.
+        "Failed at history['1'][0][0][1][2]: expected Union[str, float],
+        got int".
+
+        Which calls are checked is decided by the runtime policy (see
+        set_policy and checking): unchecked calls still bind args and apply
+        defaults, but skip the type checks of the args and return value.
+
+        Each param type can also be given as a compiled validator with a
+        check policy, e.g. a=TySig.compile(List[int], CheckPolicy.first(10)).
+        The policies applied are reported by the decorated function's
+        check_policies, mapping each param name to its CheckPolicy.
+
+        Results of pure functions can be memoized with cache=N: return
+        values are cached (LRU, N entries) keyed by the bound args, with
+        defaults applied, and the self object of methods. Only return
+        values of checked calls are cached, and a hit skips both the call
+        and the return check. cache_ttl expires entries after
+        that many seconds, and cache_key(kwargs) computes the key from the
+        bound args instead. Calls with unhashable args are not cached.
+        The hit / miss / eviction counters are reported by the decorated
+        function's cache.stats(). A param named cache, cache_ttl or
+        cache_key is still declared by its type e.g. cache=Optional[dict].
+
         :param classobj: set to True if within a class (self object)
         :param in_vars_types: arguments with their types and/or default values
                               e.g. @signature(a=int, b=Union[float, str],
                                               c=List[Dict[str, Tuple[str, int]]]
+                              and the cache, cache_ttl and cache_key options
         :return: applies signature checks and applies default values
         """
 
-        def inner(fun: Callable):
-            @wraps(fun)
-            def sub(*_in_args, **in_kwargs):
-                # initialise vars_types (signature params), kwargs, args
-                in_args = _in_args[1:] if classobj else _in_args
-                istype = TySig.is_type
-                vars_types = in_vars_types.copy()
-                kwargs = in_kwargs.copy()
-                args = [x for x in in_args]
-                _NO_DEF = "__NO_DEF__"
-
-                # check default types which are of type tuple e.g. (2, int)
-                defmap = dict()
-                for vname, vdeftype in vars_types.items():
-                    if isinstance(vdeftype, tuple):
-                        vdef, vtype = vdeftype
-                        if not istype(*vdeftype):
-                            raise TypeError(
-                                DEFAULT_ERROR.format(vname, type(vdef), vtype)
-                            )
-                        else:
-                            defmap[vname] = vdef
-
-                # function to get the type and default value
-                # _NO_DEF represents no default value
-                def get_def_type(in_vdeftype) -> tuple:
-                    if TySig.is_typing_type(in_vdeftype) or \
-                            isinstance(in_vdeftype, type):
-                        in_vdef, in_vtype = _NO_DEF, in_vdeftype
-                    elif isinstance(in_vdeftype, tuple):
-                        in_vdef, in_vtype = in_vdeftype
-                    else:
-                        raise TypeError(
-                            SIG_TYPE_ERROR.format(type(in_vdeftype)))
-                    return in_vdef, in_vtype
-
-                # check types in kwargs
-                # if types are good then pop from kwargs
-                _kwargs = kwargs.copy()
-                for kw_name, kw_val in _kwargs.items():
-                    vdeftype = vars_types.get(kw_name)
-                    if vdeftype is None:
-                        raise TypeError(
-                            f"Unexpected variable found: '{kw_name}'")
-
-                    # we don't care about default values here (handled below)
-                    # we are checking if kwarg types are correct
-                    _, vtype = get_def_type(vdeftype)
-                    if not istype(kw_val, vtype):
-                        raise TypeError(ARGS_ERROR.format(kw_name, vtype,
-                                                          type(kw_val)))
-                    kwargs.pop(kw_name)
-                    vars_types.pop(kw_name)
-
-                # assign values from args to kwargs
-                # go through all signature params and compare against args
-                for vname, vdeftype in vars_types.items():
-                    vdef, vtype = get_def_type(vdeftype)
-                    selected_arg = False
-                    idx = -1
-                    # compare signature type against types of args
-                    for idx, arg in enumerate(args):
-                        # if type matches, assign value or default
-                        if not istype(arg, vtype):
-                            if vdef == _NO_DEF:
-                                raise TypeError(
-                                    ARGS_ERROR.format(vname, vtype, type(arg)))
-                            else:  # assign default
-                                kwargs[vname] = vdef
-                                break
-                        # type matches, assign value in kwargs
-                        else:
-                            kwargs[vname] = arg
-                            selected_arg = True
-                            break
-                    # selected argument from args, so we can pop
-                    if selected_arg and (idx >= 0):
-                        del args[idx]
-
-                # finalize kwargs, apply defaults
-                kwargs.update(in_kwargs)
-                for vname, vdef in defmap.items():
-                    if kwargs.get(vname) is None:
-                        kwargs[vname] = vdef
-
-                # final check to see if there are any remaining args
-                if len(args) > 0:
-                    raise TypeError(UNEXP_ERROR.format(args))
-
-                # execute function
-                # if running in a class then pass through self class object
-                if classobj:
-                    return_obj = fun(_in_args[0], **kwargs)
-                else:  # ow: run function normally passing through all set args
-                    return_obj = fun(**kwargs)
+        # memo options, unless given as the type of a param of that name
+        memo_options = {x: in_vars_types.pop(x) for x in MEMO_OPTIONS
+                        if x in in_vars_types and
+                        not TySig.is_param_spec(in_vars_types[x])}
+        # resolve the signature once, at decoration time
+        params = TySig.resolve_params(in_vars_types)
+        binder = Binder(params)
+        # streams (Iterator, Iterable, Generator) are checked lazily
+        lazy_params = tuple((vname, plan) for vname, _, _, plan in params
+                            if is_lazy(plan))
 
+        def inner(fun: Callable):
+            # return type is resolved now, unless it is a forward reference
+            # that cannot be resolved yet, in which case on the first call
+            try:
+                ret_type = TySig.get_return_type(fun)
+                ret_pending = False
+            except NameError:
+                ret_type, ret_pending = None, True
+            ret_plan = None if ret_type is None \
+                else TySig.compile(ret_type)
+
+            def resolve_return():
+                nonlocal ret_type, ret_plan, ret_pending
+                ret_type = TySig.get_return_type(fun)
+                ret_plan = None if ret_type is None \
+                    else TySig.compile(ret_type)
+                if memo is not None and ret_plan is not None and \
+                        is_lazy(ret_plan):
+                    raise TypeError(MEMO_ERROR.format(
+                        getattr(fun, '__qualname__', fun)))
+                ret_pending = False
+
+            memo = None
+            if memo_options.get('cache'):
+                # lazy values (generators, Iterator args / return values)
+                # are consumed once, so cannot be reused
+                if inspect.isgeneratorfunction(fun) or \
+                        inspect.isasyncgenfunction(fun) or lazy_params or \
+                        ret_plan is not None and is_lazy(ret_plan):
+                    raise TypeError(MEMO_ERROR.format(
+                        getattr(fun, '__qualname__', fun)))
+                memo = MemoCache(memo_options['cache'],
+                                 tuple(x for x, _, _, _ in params),
+                                 memo_options.get('cache_ttl'),
+                                 memo_options.get('cache_key'))
+
+            runtime = FunctionRuntime(getattr(fun, '__module__', None))
+            stats = STATS.register(
+                f"{getattr(fun, '__module__', None)}."
+                f"{getattr(fun, '__qualname__', fun)}")
+
+            def bind(in_args: tuple, in_kwargs: dict, checked: bool) -> dict:
+                # check args / kwargs against the signature, apply defaults
+                if not checked:  # skipped by the runtime policy
+                    return binder.bind_unchecked(in_args, in_kwargs)
+                kwargs = binder.bind(in_args, in_kwargs)
+                for vname, plan in lazy_params:
+                    if vname in kwargs:
+                        kwargs[vname] = wrap_lazy(plan, kwargs[vname], vname)
+                return kwargs
+
+            def checked_return(return_obj):
                 # check return type. Continue if there is no return type,
                 # but check the return type if exists.
-                act_ret_type_obj = get_type_hints(fun)
-                if isinstance(act_ret_type_obj, dict):
-                    act_ret_type = act_ret_type_obj.get('return')
-                    if act_ret_type is not None:
-                        if not istype(return_obj, act_ret_type):
-                            raise TypeError(RET_TYPE_ERROR.format(act_ret_type))
-
+                if ret_pending:
+                    resolve_return()
+                if ret_plan is not None:
+                    if not ret_plan.check(return_obj):
+                        raise TypeError(with_path(
+                            RET_TYPE_ERROR.format(ret_type), ret_plan,
+                            return_obj, "return"))
+                    if is_lazy(ret_plan):
+                        return_obj = wrap_lazy(ret_plan, return_obj,
+                                               "return")
                 return return_obj
 
+            if inspect.isasyncgenfunction(fun):
+                @wraps(fun)
+                async def sub(*_in_args, **in_kwargs):
+                    start = clock()
+                    in_args = _in_args[1:] if classobj else _in_args
+                    checked = runtime.should_check(binder.shape, in_args,
+                                                   in_kwargs)
+                    kwargs = bind(in_args, in_kwargs, checked)
+                    # only the args are timed, items are checked while the
+                    # caller iterates
+                    stats.record(checked, clock() - start, 0, 0)
+                    if classobj:
+                        agen = fun(_in_args[0], **kwargs)
+                    else:
+                        agen = fun(**kwargs)
+
+                    # yielded items are checked against the return type e.g.
+                    # AsyncIterator[int], values sent / thrown are passed on
+                    if checked and ret_pending:
+                        resolve_return()
+                    if checked and ret_plan is not None:
+                        agen = wrap_async_generator(ret_plan, agen, "return")
+                    try:
+                        item = await agen.__anext__()
+                        while True:
+                            try:
+                                sent = yield item
+                            except GeneratorExit:
+                                await agen.aclose()
+                                raise
+                            except BaseException as exp:
+                                item = await agen.athrow(exp)
+                            else:
+                                item = await agen.asend(sent)
+                    except StopAsyncIteration:
+                        return
+
+            elif inspect.iscoroutinefunction(fun):
+                @wraps(fun)
+                async def sub(*_in_args, **in_kwargs):
+                    # args are checked before the coroutine is awaited,
+                    # the awaited result is checked against the return type
+                    start = clock()
+                    in_args = _in_args[1:] if classobj else _in_args
+                    checked = runtime.should_check(binder.shape, in_args,
+                                                   in_kwargs)
+                    kwargs = bind(in_args, in_kwargs, checked)
+                    if memo is not None:
+                        key = memo.key_of(kwargs, _in_args[0]) if classobj \
+                            else memo.key_of(kwargs)
+                        return_obj = memo.get(key)
+                        if return_obj is not MEMO_MISS:
+                            stats.record(checked, clock() - start, 0, 0)
+                            return return_obj
+                    bound = clock()
+                    if classobj:
+                        return_obj = await fun(_in_args[0], **kwargs)
+                    else:
+                        return_obj = await fun(**kwargs)
+                    returned = clock()
+                    if checked:
+                        return_obj = checked_return(return_obj)
+                        if memo is not None:
+                            memo.put(key, return_obj)
+                    stats.record(checked, bound - start, returned - bound,
+                                 clock() - returned)
+                    return return_obj
+
+            else:
+                @wraps(fun)
+                def sub(*_in_args, **in_kwargs):
+                    start = clock()
+                    in_args = _in_args[1:] if classobj else _in_args
+                    checked = runtime.should_check(binder.shape, in_args,
+                                                   in_kwargs)
+                    kwargs = bind(in_args, in_kwargs, checked)
+                    if memo is not None:
+                        # only return values of checked calls are stored
+                        key = memo.key_of(kwargs, _in_args[0]) if classobj \
+                            else memo.key_of(kwargs)
+                        return_obj = memo.get(key)
+                        if return_obj is not MEMO_MISS:
+                            stats.record(checked, clock() - start, 0, 0)
+                            return return_obj
+                    bound = clock()
+
+                    # execute function
+                    # if running in a class then pass through self class
+                    # object
+                    if classobj:
+                        return_obj = fun(_in_args[0], **kwargs)
+                    else:  # ow: run function normally passing all set args
+                        return_obj = fun(**kwargs)
+                    returned = clock()
+
+                    if checked:
+                        return_obj = checked_return(return_obj)
+                        if memo is not None:
+                            memo.put(key, return_obj)
+                    stats.record(checked, bound - start, returned - bound,
+                                 clock() - returned)
+                    return return_obj
+
+            # report the check policy applied to each param
+            sub.check_policies = {vname: plan.policy
+                                  for vname, _, _, plan in binder.params}
+            # declared param types, see tyexport
+            sub.signature_types = {vname: plan.check_type
+                                   for vname, _, _, plan in binder.params}
+            # runtime policy of the function, see TySig.set_policy
+            sub.runtime = runtime
+            # overhead counters of the function, see TySig.stats
+            sub.stats = stats
+            # memoized return values (cache=N), None if not memoized
+            sub.cache = memo
             return sub
 
         return inner
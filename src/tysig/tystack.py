@@ -0,0 +1,221 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tystack.py
+
+    Non-recursive engine checking a value against a compiled plan. The
+    value and the plan are walked together with an explicit work stack,
+    instead of a python frame and generator per element and nesting level,
+    stopping on the first failure. Results are identical to the recursive
+    checks of the compiled plans.
+
+    Plans are compiled innermost type first (see PlanCache), so compiling
+    does not recurse per nesting level either. Values are still bounded by
+    their types: typing itself hashes and compares nested types
+    recursively, which limits them to a few hundred levels at the default
+    recursion limit, and recursive aliases (a type referring to itself by
+    a forward reference, e.g. a JSON tree) are not supported. The engine
+    checks such deep values with little recursion headroom left, e.g.
+    deep in a call stack, where the recursive checks would overflow it.
+"""
+
+from itertools import islice
+import typing
+from tysig.tycompile import Plan, K_ANY, K_UNION, K_LIST, K_TUPLE, K_DICT, \
+    K_ANNOTATED, K_SET, K_SEQUENCE, K_MAPPING, K_VARTUPLE, rejects_class, \
+    _typed_as, _sample
+from tysig.typolicy import FIRST, SAMPLE
+from tysig.tyarray import Constraint, is_array_like
+
+ENGINE_RECURSIVE = "recursive"
+ENGINE_STACK = "stack"
+
+CANDIDATES_CACHE_SIZE = 4096
+
+# kind of the stack entries checking the constraints of an Annotated plan
+# once its base type has been checked
+_K_CONSTRAINTS = "constraints"
+
+# kinds of the plans of collections whose elements are all of one type
+_COLLECTIONS = frozenset((K_SET, K_SEQUENCE, K_VARTUPLE))
+
+# kinds of plans walked by the engine, other kinds are checked directly
+_WALKED = frozenset((K_UNION, K_LIST, K_TUPLE, K_DICT, K_MAPPING,
+                     K_ANNOTATED, _K_CONSTRAINTS)) | _COLLECTIONS
+
+# stack entry plan of the constraints, its value is (Annotated plan, value)
+_CONSTRAINTS = Plan(None, _K_CONSTRAINTS, (), None)
+
+# (union plan, class of value) -> member plans that may accept the value
+_CANDIDATES: dict = dict()
+
+
+def _elements(plan: Plan, var):
+    """
+    :param plan: compiled List / Dict plan
+    :param var: list, or dict keys / values view
+    :return: elements of var checked under the check policy of plan
+    """
+    policy = plan.policy
+    if policy.mode == FIRST:
+        return islice(var, policy.n)
+    elif policy.mode == SAMPLE and len(var) > policy.n:
+        return _sample(var, policy.n, policy.rng)
+    return var
+
+
+def _candidates(plan: Plan, cls) -> tuple:
+    """
+    gets the members of a Union plan that may accept values of class cls,
+    i.e. those not rejecting cls from the class alone
+
+    :param plan: compiled Union plan
+    :param cls: class of the value
+    :return: tuple of member plans
+    """
+    key = (plan, cls)
+    candidates = _CANDIDATES.get(key)
+    if candidates is None:
+        candidates = tuple(x for x in plan.args if not rejects_class(x, cls))
+        if len(_CANDIDATES) >= CANDIDATES_CACHE_SIZE:
+            _CANDIDATES.clear()
+        _CANDIDATES[key] = candidates
+    return candidates
+
+
+def check_stack(plan: Plan, var) -> bool:
+    """
+    checks var against plan using an explicit work stack
+
+    Members of a Union that cannot accept the class of the value are
+    skipped. When a single member is left it is pushed on the stack,
+    otherwise the members are tried in turn, each with its own stack, so
+    the python recursion depth only grows with Unions whose members
+    cannot be told apart by the class of the value
+
+    :param plan: compiled plan
+    :param var: value to check
+    :return: True if var is of the type of plan, else False
+    """
+    stack = [(plan, var)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        plan, var = pop()
+        kind = plan.kind
+        if kind not in _WALKED:
+            if not plan.check(var):
+                return False
+
+        elif kind == K_UNION:
+            candidates = _candidates(plan, type(var))
+            if len(candidates) == 1:  # no backtracking needed
+                push((candidates[0], var))
+                continue
+            for sub_plan in candidates:
+                if check_stack(sub_plan, var):
+                    break
+            else:
+                return False
+
+        elif kind == K_LIST:
+            if not isinstance(var, list):  # e.g. arrays, checked directly
+                if not plan.check(var):
+                    return False
+                continue
+            if type(var) is not list and _typed_as(var, plan.check_type):
+                continue
+            elem = plan.args[0]
+            if elem.kind == K_ANY:
+                continue
+            if elem.kind in _WALKED:
+                for x in _elements(plan, var):
+                    push((elem, x))
+            else:
+                elem_check = elem.check
+                for x in _elements(plan, var):
+                    if not elem_check(x):
+                        return False
+
+        elif kind == K_TUPLE:
+            if not isinstance(var, tuple) or len(var) != len(plan.args):
+                return False
+            for sub_plan, x in zip(plan.args, var):
+                if sub_plan.kind in _WALKED:
+                    push((sub_plan, x))
+                elif not sub_plan.check(x):
+                    return False
+
+        elif kind in _COLLECTIONS:
+            if plan.policy.arrays and kind != K_SET and is_array_like(var):
+                if not plan.check(var):  # arrays, checked directly
+                    return False
+                continue
+            if not isinstance(var, typing.get_origin(plan.check_type)):
+                return False
+            elem = plan.args[0]
+            if elem.kind == K_ANY:
+                continue
+            if elem.kind in _WALKED:
+                for x in _elements(plan, var):
+                    push((elem, x))
+            else:
+                elem_check = elem.check
+                for x in _elements(plan, var):
+                    if not elem_check(x):
+                        return False
+
+        elif kind == K_DICT or kind == K_MAPPING:
+            top = dict if kind == K_DICT \
+                else typing.get_origin(plan.check_type)
+            if not isinstance(var, top):
+                return False
+            if type(var) is not dict and _typed_as(var, plan.check_type):
+                continue
+            key_plan, val_plan = plan.args
+            if plan.policy.mode == SAMPLE and len(var) > plan.policy.n:
+                pairs = _sample(var.items(), plan.policy.n,
+                                plan.policy.rng)
+                keys = [x for x, _ in pairs]
+                values = [y for _, y in pairs]
+            else:
+                keys, values = _elements(plan, var.keys()), \
+                    _elements(plan, var.values())
+            for sub_plan, xs in ((key_plan, keys), (val_plan, values)):
+                if sub_plan.kind == K_ANY:
+                    continue
+                if sub_plan.kind in _WALKED:
+                    for x in xs:
+                        push((sub_plan, x))
+                else:
+                    sub_check = sub_plan.check
+                    for x in xs:
+                        if not sub_check(x):
+                            return False
+
+        elif kind == K_ANNOTATED:
+            # constraints are checked once the base type (and its elements,
+            # pushed above them) passed, as they may assume the base type
+            push((_CONSTRAINTS, (plan, var)))
+            push((plan.args[0], var))
+
+        else:  # _K_CONSTRAINTS
+            plan, var = var
+            for constraint in plan.check_type.__metadata__:
+                if isinstance(constraint, Constraint) and \
+                        not constraint.check(var):
+                    return False
+
+    return True
+
+
+def stack_plan(plan: Plan) -> Plan:
+    """
+    gets a plan checking values with the stack engine
+
+    :param plan: compiled plan
+    :return: plan with the same type and kind, checked by check_stack
+    """
+    def check(var) -> bool:
+        return check_stack(plan, var)
+    return Plan(plan.check_type, plan.kind, plan.args, check, plan.policy)
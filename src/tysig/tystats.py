@@ -0,0 +1,286 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tystats.py
+
+    Overhead statistics of signature decorated functions: number of calls,
+    and time spent binding args, checking args, checking the return value
+    and in the function itself. Counters are updated without a lock: each
+    thread increments its own counters, which are summed when read (see
+    ThreadCounters). They are exported as a dict or in the Prometheus text
+    exposition format.
+"""
+
+from typing import Dict, Optional
+from time import perf_counter_ns
+import threading
+import weakref
+import os
+
+STAT_FIELDS = ("calls", "checked_calls", "bind_ns", "check_args_ns",
+               "check_return_ns", "function_ns")
+
+# (metric name, stat field, scale, help) of the exported metrics
+METRICS = (
+    ("tysig_calls_total", "calls", 1,
+     "Completed calls of signature decorated functions."),
+    ("tysig_checked_calls_total", "checked_calls", 1,
+     "Completed calls whose args and return value were type checked."),
+    ("tysig_bind_seconds_total", "bind_ns", 1e-9,
+     "Time spent binding args of unchecked calls."),
+    ("tysig_check_args_seconds_total", "check_args_ns", 1e-9,
+     "Time spent binding and type checking args of checked calls."),
+    ("tysig_check_return_seconds_total", "check_return_ns", 1e-9,
+     "Time spent type checking return values."),
+    ("tysig_function_seconds_total", "function_ns", 1e-9,
+     "Time spent in the decorated functions."),
+)
+
+clock = perf_counter_ns
+
+
+class _Owner(object):
+    """
+    per-thread owner of the counters of a thread, dropped when the thread
+    exits
+    """
+
+    __slots__ = ('counts', '__weakref__')
+
+    def __init__(self, counts: list):
+        self.counts = counts
+
+
+def _fold(ref: weakref.ref, key: int, counts: list):
+    """
+    folds the counters of an exited thread into the base counters
+
+    :param ref: weak reference to the ThreadCounters
+    :param key: key of the counters of the thread
+    :param counts: counters of the thread
+    """
+    counters = ref()
+    if counters is not None:
+        counters.fold(key, counts)
+
+
+class ThreadCounters(object):
+    """
+    counters safe under concurrent updates without a lock on the hot path:
+    each thread increments its own list of counters (local), the lists of
+    the threads being summed when read (totals). The counters of exited
+    threads are folded into base counters, and reset offsets the base
+    counters rather than writing to the lists of other threads
+    """
+
+    __slots__ = ('size', '_local', '_threads', '_base', '_lock',
+                 '__weakref__')
+
+    def __init__(self, size: int):
+        """
+        :param size: number of counters
+        """
+        self.size = size
+        self._local = threading.local()
+        self._threads: dict = dict()
+        self._base = [0] * size
+        self._lock = threading.RLock()
+
+    def local(self) -> list:
+        """
+        :return: counters of the current thread, only updated by it
+        """
+        try:
+            return self._local.owner.counts
+        except AttributeError:
+            pass
+        counts = [0] * self.size
+        owner = _Owner(counts)
+        with self._lock:
+            self._threads[id(owner)] = counts
+        weakref.finalize(owner, _fold, weakref.ref(self), id(owner),
+                         counts).atexit = False
+        self._local.owner = owner
+        return counts
+
+    def fold(self, key: int, counts: list):
+        """
+        folds the counters of an exited thread into the base counters
+
+        :param key: key of the counters of the thread
+        :param counts: counters of the thread
+        """
+        with self._lock:
+            if self._threads.pop(key, None) is counts:
+                self._base = [x + y for x, y in zip(self._base, counts)]
+
+    def totals(self) -> list:
+        """
+        :return: counters summed over the threads
+        """
+        with self._lock:
+            totals = list(self._base)
+            for counts in self._threads.values():
+                for idx, value in enumerate(counts):
+                    totals[idx] += value
+        return totals
+
+    def reset(self):
+        """
+        resets the counters to 0
+        """
+        with self._lock:
+            self._base = [x - y for x, y in zip(self._base, self.totals())]
+
+
+class FunctionStats(object):
+    """
+    counters of a decorated function. Binding and checking the args are
+    interleaved (the binding of positional args is decided by their
+    checks), so the time in the binder is recorded as check_args_ns on
+    checked calls and as bind_ns on calls skipped by the runtime policy
+    """
+
+    __slots__ = ('name', 'counters', '__weakref__')
+
+    def __init__(self, name: str):
+        """
+        :param name: qualified name of the decorated function
+        """
+        self.name = name
+        self.counters = ThreadCounters(len(STAT_FIELDS))
+
+    def record(self, checked: bool, args_ns: int, function_ns: int,
+               return_ns: int):
+        """
+        records a completed call
+
+        :param checked: True if the call was type checked
+        :param args_ns: time spent binding (and checking) args
+        :param function_ns: time spent in the function
+        :param return_ns: time spent checking the return value
+        """
+        counts = self.counters.local()
+        counts[0] += 1
+        if checked:
+            counts[1] += 1
+            counts[3] += args_ns
+        else:
+            counts[2] += args_ns
+        counts[4] += return_ns
+        counts[5] += function_ns
+
+    def reset(self):
+        """
+        resets the counters
+        """
+        self.counters.reset()
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        :return: dict of the counters
+        """
+        return dict(zip(STAT_FIELDS, self.counters.totals()))
+
+    def __getattr__(self, field: str) -> int:
+        try:
+            idx = STAT_FIELDS.index(field)
+        except ValueError:
+            raise AttributeError(field) from None
+        return self.counters.totals()[idx]
+
+
+class StatsRegistry(object):
+    """
+    registry of the counters of decorated functions. Counters are held
+    weakly, so they are dropped together with their function
+    """
+
+    def __init__(self):
+        self._stats: weakref.WeakSet = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def register(self, name: str) -> FunctionStats:
+        """
+        :param name: qualified name of the decorated function
+        :return: counters of the function
+        """
+        stats = FunctionStats(name)
+        with self._lock:
+            self._stats.add(stats)
+        return stats
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        gets the counters of every decorated function, summing those of
+        functions with the same qualified name (e.g. redefined functions)
+
+        :return: dict of qualified name -> dict of counters
+        """
+        snapshot: Dict[str, Dict[str, int]] = dict()
+        for stats in self._registered():
+            counters = stats.as_dict()
+            total = snapshot.get(stats.name)
+            if total is None:
+                snapshot[stats.name] = counters
+            else:
+                for field, value in counters.items():
+                    total[field] += value
+        return snapshot
+
+    def reset(self):
+        """
+        resets the counters of every decorated function
+        """
+        for stats in self._registered():
+            stats.reset()
+
+    def _registered(self) -> list:
+        """
+        :return: counters of the decorated functions, copied under the lock
+                 as the set may change while it is iterated
+        """
+        with self._lock:
+            return list(self._stats)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n") \
+        .replace('"', '\\"')
+
+
+def to_prometheus(snapshot: Dict[str, Dict[str, int]]) -> str:
+    """
+    formats a snapshot in the Prometheus text exposition format
+
+    :param snapshot: snapshot of the counters (see StatsRegistry.snapshot)
+    :return: exposition text, one sample per function and metric
+    """
+    lines = []
+    for metric, field, scale, description in METRICS:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for name in sorted(snapshot):
+            value = snapshot[name][field]
+            value = value if scale == 1 else repr(value * scale)
+            lines.append(f'{metric}{{function="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str,
+                     snapshot: Optional[Dict[str, Dict[str, int]]] = None):
+    """
+    writes a snapshot in the Prometheus text exposition format to path,
+    replacing the file atomically so a collector never reads it half written
+
+    :param path: file to write e.g. for the node exporter textfile collector
+    :param snapshot: snapshot of the counters, default the current counters
+    """
+    text = to_prometheus(STATS.snapshot() if snapshot is None else snapshot)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fp:
+        fp.write(text)
+    os.replace(tmp_path, path)
+
+
+STATS = StatsRegistry()
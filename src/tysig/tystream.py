@@ -0,0 +1,256 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tystream.py
+
+    Streaming validation of JSON Lines and CSV rows against a schema of
+    field types. The file is read in chunks of lines and each row is
+    checked against the compiled plans of its fields, then yielded (valid
+    rows) or reported as a Reject with its line number, so memory use does
+    not grow with the size of the file.
+"""
+
+from typing import Callable, Iterator, Optional
+from itertools import chain
+import csv
+import json
+from tysig.tyerrors import ARGS_ERROR, UNEXP_KW_ERROR, MISSING_ERROR, \
+    ROW_ERROR, STREAM_FORMAT_ERROR
+from tysig.tybind import _NO_DEF
+from tysig.tyexplain import with_path
+from tysig.tystats import clock
+
+F_JSONL = "jsonl"
+F_CSV = "csv"
+STREAM_FORMATS = (F_JSONL, F_CSV)
+
+# approximate size in bytes of the chunks of lines read at a time
+STREAM_CHUNK_SIZE = 1 << 16
+
+# rows validated between calls of the report callback
+REPORT_EVERY = 100000
+
+
+class Reject(object):
+    """
+    row failing the schema: its line number, the row (the raw line if it
+    could not be decoded), the failing field (None if the whole row
+    failed) and the error message
+    """
+
+    __slots__ = ('line', 'row', 'field', 'error')
+
+    def __init__(self, line: int, row, field: Optional[str], error: str):
+        self.line = line
+        self.row = row
+        self.field = field
+        self.error = error
+
+    def as_dict(self) -> dict:
+        """
+        :return: dict of the reject, e.g. to write it to a JSON Lines file
+        """
+        return {"line": self.line, "row": self.row, "field": self.field,
+                "error": self.error}
+
+    def __repr__(self) -> str:
+        return f"Reject(line={self.line}, field={self.field!r}, " \
+               f"error={self.error!r})"
+
+
+class StreamReport(object):
+    """
+    counters of a validated stream, updated as the rows are consumed
+    """
+
+    __slots__ = ('rows', 'valid', 'rejected', 'start_ns', 'stop_ns')
+
+    def __init__(self):
+        self.rows = 0
+        self.valid = 0
+        self.rejected = 0
+        self.start_ns: Optional[int] = None
+        self.stop_ns: Optional[int] = None
+
+    @property
+    def seconds(self) -> float:
+        """
+        :return: seconds since the first row was read, until the last one
+                 once the stream is exhausted
+        """
+        if self.start_ns is None:
+            return 0.
+        return ((self.stop_ns or clock()) - self.start_ns) * 1e-9
+
+    @property
+    def rows_per_sec(self) -> float:
+        """
+        :return: rows read per second, including the time spent by the
+                 consumer of the rows
+        """
+        seconds = self.seconds
+        return self.rows / seconds if seconds > 0 else 0.
+
+    def as_dict(self) -> dict:
+        """
+        :return: dict of the counters and rates
+        """
+        return {"rows": self.rows, "valid": self.valid,
+                "rejected": self.rejected, "seconds": self.seconds,
+                "rows_per_sec": self.rows_per_sec}
+
+    def __repr__(self) -> str:
+        return f"StreamReport(rows={self.rows}, valid={self.valid}, " \
+               f"rejected={self.rejected}, " \
+               f"rows_per_sec={self.rows_per_sec:.0f})"
+
+
+def read_lines(fileobj, chunk_size: int = STREAM_CHUNK_SIZE
+               ) -> Iterator[str]:
+    """
+    :param fileobj: text file object
+    :param chunk_size: approximate size in bytes of the chunks read
+    :return: iterator of the lines of fileobj, read a chunk at a time
+    """
+    return chain.from_iterable(iter(lambda: fileobj.readlines(chunk_size),
+                                    []))
+
+
+class StreamValidator(object):
+    """
+    iterable of the rows of a JSON Lines / CSV file object valid against a
+    schema. Rejects are passed to on_reject, or yielded among the valid
+    rows if there is none, and counted in report
+    """
+
+    def __init__(self, fileobj, params: tuple, stream_format: str = F_JSONL,
+                 on_reject: Optional[Callable[[Reject], None]] = None,
+                 on_report: Optional[Callable[[StreamReport], None]] = None,
+                 report_every: int = REPORT_EVERY,
+                 chunk_size: int = STREAM_CHUNK_SIZE):
+        """
+        :param fileobj: text file object of the rows
+        :param params: (name, default, type, plan) of each field, default
+                       being _NO_DEF when there is none
+        :param stream_format: F_JSONL or F_CSV (with a header line)
+        :param on_reject: called with each Reject, default yields them
+        :param on_report: called with the report every report_every rows
+                          and once the stream is exhausted
+        :param report_every: rows between calls of on_report
+        :param chunk_size: approximate size in bytes of the chunks read
+        """
+        if stream_format not in STREAM_FORMATS:
+            raise ValueError(STREAM_FORMAT_ERROR.format(stream_format))
+        self.fileobj = fileobj
+        self.params = params
+        self.fields = {vname: (vtype, plan)
+                       for vname, _, vtype, plan in params}
+        self.stream_format = stream_format
+        self.on_reject = on_reject
+        self.on_report = on_report
+        self.report_every = max(report_every, 1)
+        self.chunk_size = chunk_size
+        self.report = StreamReport()
+
+    def _rows(self) -> Iterator[tuple]:
+        """
+        :return: iterator of (line number, decoded row or Reject)
+        """
+        lines = read_lines(self.fileobj, self.chunk_size)
+        if self.stream_format == F_CSV:
+            reader = csv.DictReader(lines)
+            for row in reader:
+                if None in row or None in row.values():
+                    yield reader.line_num, Reject(
+                        reader.line_num, row, None,
+                        ROW_ERROR.format("line with a cell per column"))
+                else:
+                    yield reader.line_num, row
+            return
+
+        decode = json.JSONDecoder().decode
+        for line_num, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = decode(line)
+            except ValueError as ex:
+                yield line_num, Reject(line_num, line.rstrip("\r\n"), None,
+                                       str(ex))
+                continue
+            if not isinstance(row, dict):
+                row = Reject(line_num, row, None,
+                             ROW_ERROR.format("JSON object"))
+            yield line_num, row
+
+    @staticmethod
+    def _cell(cell: str, has_default: bool):
+        """
+        decodes a CSV cell failing its field type as a string e.g. "1"
+        against int, "[1, 2]" against List[int]. An empty cell is missing
+        if the field has a default, else None
+
+        :param cell: CSV cell
+        :param has_default: True if the field has a default value
+        :return: decoded value, or cell if it cannot be decoded
+        """
+        if cell == "":
+            return _NO_DEF if has_default else None
+        try:
+            return json.loads(cell)
+        except ValueError:
+            return cell
+
+    def check_row(self, line: int, row: dict) -> Optional[Reject]:
+        """
+        checks row against the schema, applying the default values of the
+        missing fields
+
+        :param line: line number of row
+        :param row: decoded row, updated in place
+        :return: Reject of the first failing field, or None if row is valid
+        """
+        csv_row = self.stream_format == F_CSV
+        for vname, vdef, vtype, plan in self.params:
+            var = row.get(vname, _NO_DEF)
+            if csv_row and var is not _NO_DEF and not plan.check(var):
+                var = self._cell(var, vdef is not _NO_DEF)
+            if var is _NO_DEF:
+                if vdef is _NO_DEF:
+                    return Reject(line, row, vname,
+                                  MISSING_ERROR.format(vname))
+                row[vname] = var = vdef
+            elif csv_row:
+                row[vname] = var
+            if not plan.check(var):
+                return Reject(line, row, vname, with_path(
+                    ARGS_ERROR.format(vname, vtype, type(var)), plan, var,
+                    vname))
+        if len(row) > len(self.fields):
+            extra = next(x for x in row if x not in self.fields)
+            return Reject(line, row, extra, UNEXP_KW_ERROR.format(extra))
+        return None
+
+    def __iter__(self) -> Iterator:
+        report = self.report
+        report.start_ns, report.stop_ns = clock(), None
+        on_reject, on_report = self.on_reject, self.on_report
+        every = self.report_every
+        for line, row in self._rows():
+            report.rows += 1
+            reject = row if isinstance(row, Reject) \
+                else self.check_row(line, row)
+            if reject is None:
+                report.valid += 1
+                yield row
+            else:
+                report.rejected += 1
+                if on_reject is None:
+                    yield reject
+                else:
+                    on_reject(reject)
+            if on_report is not None and report.rows % every == 0:
+                on_report(report)
+        report.stop_ns = clock()
+        if on_report is not None:
+            on_report(report)
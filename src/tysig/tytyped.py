@@ -0,0 +1,156 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    tytyped.py
+
+    Checked containers: lists and dicts of a declared List / Dict type that
+    check elements as they are stored, on construction and on each
+    mutation, instead of being re-walked by every check. is_type and
+    signature accept them in O(1) when checked against their declared type.
+"""
+
+from tysig.tyerrors import ARGS_ERROR, TYPED_ERROR, TYPED_TYPE_ERROR
+from tysig.tycompile import Plan, PLANS, K_LIST, K_DICT
+from tysig.tyexplain import with_path, type_name
+
+
+def _plan_of(check_type, kind: str) -> Plan:
+    """
+    :param check_type: declared type of the container
+    :param kind: K_LIST or K_DICT
+    :return: compiled plan of check_type
+    """
+    plan = PLANS.get_compiled(check_type)
+    if plan.kind != kind:
+        raise TypeError(TYPED_TYPE_ERROR.format(check_type))
+    return plan
+
+
+class CheckedList(list):
+    """
+    list of a declared List[T] type, checking the elements stored by
+    append, extend, insert, item / slice assignment and +=
+
+    Elements are checked when stored: mutating a mutable element in place
+    is not seen by the list, use checked containers for the nested levels
+    that are mutated
+    """
+
+    __slots__ = ('typed_as', '_plan')
+
+    def __init__(self, check_type, data=()):
+        """
+        :param check_type: declared type e.g. List[int]
+        :param data: initial elements
+        """
+        plan = _plan_of(check_type, K_LIST)
+        data = list(data)
+        if not plan.check(data):
+            raise TypeError(with_path(
+                ARGS_ERROR.format("data", check_type, type(data)), plan,
+                data, "data"))
+        super().__init__(data)
+        self.typed_as = check_type
+        self._plan = plan
+
+    def _checked(self, x):
+        elem = self._plan.args[0]
+        if not elem.check(x):
+            raise TypeError(with_path(
+                TYPED_ERROR.format(type_name(self.typed_as), "item",
+                                   type_name(elem.check_type), type(x)),
+                elem, x, "item"))
+        return x
+
+    def _checked_all(self, xs) -> list:
+        xs = list(xs)
+        for x in xs:
+            self._checked(x)
+        return xs
+
+    def append(self, x):
+        super().append(self._checked(x))
+
+    def extend(self, xs):
+        super().extend(self._checked_all(xs))
+
+    def insert(self, idx, x):
+        super().insert(idx, self._checked(x))
+
+    def __setitem__(self, idx, x):
+        if isinstance(idx, slice):
+            super().__setitem__(idx, self._checked_all(x))
+        else:
+            super().__setitem__(idx, self._checked(x))
+
+    def __iadd__(self, xs):
+        self.extend(xs)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.typed_as, list(self))
+
+
+class CheckedDict(dict):
+    """
+    dict of a declared Dict[K, V] type, checking the keys and values stored
+    by item assignment, update, setdefault and |=
+
+    Values are checked when stored: mutating a mutable value in place is
+    not seen by the dict, use checked containers for the nested levels
+    that are mutated
+    """
+
+    __slots__ = ('typed_as', '_plan')
+
+    def __init__(self, check_type, data=()):
+        """
+        :param check_type: declared type e.g. Dict[str, int]
+        :param data: initial items, a mapping or (key, value) pairs
+        """
+        plan = _plan_of(check_type, K_DICT)
+        data = dict(data)
+        if not plan.check(data):
+            raise TypeError(with_path(
+                ARGS_ERROR.format("data", check_type, type(data)), plan,
+                data, "data"))
+        super().__init__(data)
+        self.typed_as = check_type
+        self._plan = plan
+
+    def _check_item(self, key, value):
+        key_plan, val_plan = self._plan.args
+        if not key_plan.check(key):
+            raise TypeError(with_path(
+                TYPED_ERROR.format(type_name(self.typed_as), "key",
+                                   type_name(key_plan.check_type),
+                                   type(key)),
+                key_plan, key, "key"))
+        if not val_plan.check(value):
+            raise TypeError(with_path(
+                TYPED_ERROR.format(type_name(self.typed_as), "value",
+                                   type_name(val_plan.check_type),
+                                   type(value)),
+                val_plan, value, f"[{key!r}]"))
+
+    def __setitem__(self, key, value):
+        self._check_item(key, value)
+        super().__setitem__(key, value)
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        for key, value in items.items():
+            self._check_item(key, value)
+        super().update(items)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._check_item(key, default)
+        return super().setdefault(key, default)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.typed_as, dict(self))
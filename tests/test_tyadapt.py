@@ -0,0 +1,109 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.tyadapt import AdaptiveCache, S_WARMUP, S_SPECIALIZED, \
+    S_GENERAL, S_DEOPTIMIZED, DEOPT_CHECKS
+from typing import Union, List, Optional, Dict, Set
+
+
+class TestTyAdapt(unittest.TestCase):
+    def test_specialize(self):
+        cache = AdaptiveCache(warmup=10)
+        plan = cache.get(List[Union[str, float]])
+        decision = cache.adaptations[(List[Union[str, float]],
+                                      plan.policy)]
+        for _ in range(9):
+            self.assertTrue(plan.check(["a", "b"]))
+        self.assertEqual(S_WARMUP, decision.state)
+        self.assertTrue(plan.check(["a", 1.]))
+        self.assertEqual(S_SPECIALIZED, decision.state)
+        self.assertEqual((["list"], ["float", "str"]), decision.guard)
+
+        # guarded fast path, and the general path when the guard fails
+        self.assertTrue(plan.check(["x"] * 100))
+        self.assertFalse(plan.check(["x", 1]))
+        self.assertTrue(plan.check([]))
+        self.assertFalse(plan.check(("x",)))
+        self.assertFalse(plan.check("x"))
+        self.assertEqual((2, 3), (decision.guard_hits,
+                                  decision.guard_misses))
+
+    def test_union_and_dict(self):
+        cache = AdaptiveCache(warmup=5)
+        optional = cache.get(Optional[int])
+        table = cache.get(Dict[str, Optional[float]])
+        for i in range(5):
+            self.assertTrue(optional.check(i))
+            self.assertTrue(table.check({"a": 1., "b": None}))
+        report = {str(x["type"]): x for x in cache.report()}
+        self.assertEqual(S_SPECIALIZED,
+                         report[str(Optional[int])]["state"])
+        self.assertEqual((["int"],), report[str(Optional[int])]["guard"])
+        self.assertEqual((["dict"], ["str"], ["NoneType", "float"]),
+                         report[str(Dict[str, Optional[float]])]["guard"])
+        self.assertTrue(optional.check(None))
+        self.assertFalse(optional.check("1"))
+        self.assertFalse(table.check({"a": "1"}))
+        self.assertFalse(table.check({1: 1}))
+        self.assertFalse(table.check({"a": True}))
+        self.assertTrue(table.check({}))
+
+        # Union members not told apart by the class are not specialized
+        nested = cache.get(Union[List[int], List[str]])
+        for _ in range(5):
+            nested.check([1])
+        self.assertEqual(S_GENERAL, cache.report()[-1]["state"])
+
+    def test_deoptimize_and_reset(self):
+        cache = AdaptiveCache(warmup=5)
+        plan = cache.get(Set[Union[int, str]])
+        for _ in range(5):
+            plan.check({1, 2})
+        for _ in range(DEOPT_CHECKS):
+            self.assertTrue(plan.check({"a"}))
+        decision = cache.report()[-1]
+        self.assertEqual(S_DEOPTIMIZED, decision["state"])
+        self.assertTrue(plan.check({"a", 1}))
+        cache.reset()
+        self.assertEqual(S_WARMUP, cache.report()[-1]["state"])
+
+    def test_tysig(self):
+        validator = TySig.compile(List[Union[str, float]], adaptive=True)
+
+        @TySig.signature(names=validator)
+        def count(names):
+            return len(names)
+
+        for _ in range(1100):
+            self.assertEqual(2, count(["a", "b"]))
+        self.assertTrue(TySig.is_type(["a"], List[Union[str, float]],
+                                      adaptive=True))
+        with self.assertRaises(TypeError):
+            count(["a", None])
+        states = {str(x["type"]): x["state"] for x in TySig.adaptations()}
+        self.assertEqual(S_SPECIALIZED,
+                         states[str(List[Union[str, float]])])
+
+    def test_register_checker(self):
+        class Tag(object):
+            def __init__(self, ok: bool):
+                self.ok = ok
+
+        cache = AdaptiveCache(warmup=5)
+        plan = cache.get(Union[int, Tag])
+        for _ in range(5):
+            self.assertTrue(plan.check(Tag(False)))
+        self.assertEqual(S_SPECIALIZED, cache.report()[0]["state"])
+
+        # the adaptive plans compiled before are dropped
+        TySig.register_checker(Tag, lambda var, _: var.ok)
+        try:
+            self.assertEqual(0, len(cache))
+            self.assertEqual([], cache.report())
+            plan = cache.get(Union[int, Tag])
+            self.assertFalse(plan.check(Tag(False)))
+            self.assertTrue(plan.check(Tag(True)))
+            self.assertFalse(TySig.is_type(Tag(False), Union[int, Tag],
+                                           adaptive=True))
+        finally:
+            TySig.unregister_checker(Tag)
+        self.assertTrue(cache.get(Union[int, Tag]).check(Tag(False)))
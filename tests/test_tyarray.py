@@ -0,0 +1,97 @@
+import unittest
+from array import array
+from tysig.tysig import TySig
+from tysig.typolicy import CheckPolicy
+from tysig.tyarray import Constraint, Finite, Range
+from tysig.tystack import ENGINE_RECURSIVE, ENGINE_STACK
+from typing import Union, List, Any, Annotated, Tuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ARRAYS = CheckPolicy.full(arrays=True)
+
+
+class TestTyArray(unittest.TestCase):
+    def test_buffers(self):
+        self.assertEqual(TySig.is_type(array("i", [1, 2]), List[int], ARRAYS),
+                         True)
+        self.assertEqual(TySig.is_type(array("d", [1.]), List[float], ARRAYS),
+                         True)
+        self.assertEqual(TySig.is_type(array("d", [1.]), List[int], ARRAYS),
+                         False)
+        self.assertEqual(TySig.is_type(memoryview(array("q", [1])),
+                                       List[Union[str, int]], ARRAYS), True)
+        self.assertEqual(TySig.is_type(array("i"), List[Any], ARRAYS), True)
+        self.assertEqual(TySig.is_type(b"ab", List[int], ARRAYS), False)
+        self.assertEqual(TySig.is_type([1, 2], List[int], ARRAYS), True)
+        self.assertEqual(TySig.is_type(array("i", [1, 2]), List[int]), False)
+
+    def test_sequences(self):
+        values = array("d", [1., 2.])
+        for engine in (ENGINE_RECURSIVE, ENGINE_STACK):
+            def is_type(var, check_type, policy=ARRAYS):
+                return TySig.is_type(var, check_type, policy, engine=engine)
+
+            self.assertEqual(is_type(values, Tuple[float, ...]), True)
+            self.assertEqual(is_type(values, Sequence[float]), True)
+            self.assertEqual(is_type(values, Tuple[int, ...]), False)
+            self.assertEqual(is_type(values, Sequence[int]), False)
+            self.assertEqual(is_type(values, Tuple[float, ...], None), False)
+            self.assertEqual(is_type((1., 2.), Tuple[float, ...]), True)
+            self.assertEqual(is_type([1., 2.], Tuple[float, ...]), False)
+            self.assertEqual(is_type(range(3), Sequence[int]), True)
+            self.assertEqual(is_type(b"ab", Sequence[int]), True)
+            self.assertEqual(is_type(b"ab", Tuple[int, ...]), False)
+            self.assertEqual(is_type("ab", Sequence[str]), True)
+            self.assertEqual(is_type([values], List[Sequence[float]]), True)
+
+    def test_nested_buffers(self):
+        view = memoryview(array("d", [1., 2., 3., 4.])).cast("B")\
+            .cast("d", [2, 2])
+        self.assertEqual(TySig.is_type(view, List[List[float]], ARRAYS), True)
+        self.assertEqual(TySig.is_type(view, List[float], ARRAYS), False)
+
+    def test_constraints(self):
+        FType = List[Annotated[float, Finite(), Range(0., 1.)]]
+        self.assertEqual(TySig.is_type(array("d", [0., .5]), FType, ARRAYS),
+                         True)
+        self.assertEqual(TySig.is_type(array("d", [0., 2.]), FType, ARRAYS),
+                         False)
+        self.assertEqual(TySig.is_type(array("d", [float("nan")]), FType,
+                                       ARRAYS), False)
+        self.assertEqual(TySig.is_type([.5, 1.], FType), True)
+        self.assertEqual(TySig.is_type([.5, float("inf")], FType), False)
+        self.assertEqual(TySig.is_type(3, Annotated[int, Range(hi=2)]), False)
+
+    def test_constraint_abstract(self):
+        class Positive(Constraint):
+            def check(self, var) -> bool:
+                return var > 0
+
+        with self.assertRaises(TypeError):
+            Positive()
+
+    def test_signature(self):
+        @TySig.signature(values=TySig.compile(List[float], ARRAYS))
+        def fna(*args, **kwargs):
+            return len(kwargs["values"])
+
+        self.assertEqual(3, fna(array("f", [1., 2., 3.])))
+        with self.assertRaises(TypeError):
+            fna(array("b", [1]))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_numpy(self):
+        self.assertEqual(TySig.is_type(np.arange(5), List[int], ARRAYS), True)
+        self.assertEqual(TySig.is_type(np.zeros((2, 3)), List[List[float]],
+                                       ARRAYS), True)
+        self.assertEqual(TySig.is_type(np.zeros((2, 3)), List[float],
+                                       ARRAYS), False)
+        self.assertEqual(TySig.is_type(np.array(["a", 1], dtype=object),
+                                       List[Union[str, int]], ARRAYS), True)
+        self.assertEqual(TySig.is_type(np.array([1., np.nan]),
+                                       List[Annotated[float, Finite()]],
+                                       ARRAYS), False)
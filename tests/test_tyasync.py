@@ -0,0 +1,81 @@
+import asyncio
+import inspect
+import unittest
+from tysig.tysig import TySig
+from typing import AsyncIterator, AsyncGenerator, List
+
+
+@TySig.signature(num=int)
+async def double(*args, **kwargs) -> int:
+    await asyncio.sleep(0)
+    return kwargs["num"] * 2 if kwargs["num"] >= 0 else str(kwargs["num"])
+
+
+@TySig.signature(num=int)
+async def count(*args, **kwargs) -> AsyncIterator[int]:
+    for i in range(kwargs["num"]):
+        yield i if i < 2 else str(i)
+
+
+@TySig.signature(start=int)
+async def echo(*args, **kwargs) -> AsyncGenerator[int, int]:
+    value = kwargs["start"]
+    while value >= 0:
+        value = yield value
+
+
+@TySig.signature(values=AsyncIterator[int])
+async def collect(*args, **kwargs) -> List[int]:
+    return [x async for x in kwargs["values"]]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestTyAsync(unittest.TestCase):
+    def test_coroutine(self):
+        self.assertEqual(inspect.iscoroutinefunction(double), True)
+        self.assertEqual(4, run(double(2)))
+        with self.assertRaises(TypeError):
+            run(double("2"))
+        with self.assertRaises(TypeError):
+            run(double(-1))
+
+    def test_async_generator(self):
+        self.assertEqual(inspect.isasyncgenfunction(count), True)
+
+        async def consume(num):
+            return [x async for x in count(num)]
+
+        self.assertEqual([0, 1], run(consume(2)))
+        with self.assertRaises(TypeError):
+            run(consume(3))
+
+    def test_async_generator_send(self):
+        async def talk(sent):
+            gen = echo(1)
+            values = [await gen.__anext__()]
+            try:
+                values.append(await gen.asend(sent))
+            except StopAsyncIteration:
+                pass
+            return values
+
+        self.assertEqual([1, 5], run(talk(5)))
+        self.assertEqual([1], run(talk(-1)))
+        with self.assertRaises(TypeError):
+            run(talk("x"))
+
+    def test_async_iterator_arg(self):
+        async def ints():
+            yield 1
+            yield 2
+
+        async def mixed():
+            yield 1
+            yield "2"
+
+        self.assertEqual([1, 2], run(collect(ints())))
+        with self.assertRaises(TypeError):
+            run(collect(mixed()))
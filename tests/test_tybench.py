@@ -0,0 +1,67 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from tysig import tybench
+from tysig.__main__ import main
+
+
+class TestTyBench(unittest.TestCase):
+    def test_run(self):
+        res = tybench.run(sizes=[10], repeat=1, min_time=0.0001)
+        self.assertIn("is_type.nested.10", res["results"])
+        self.assertIn("is_type.flat_fail.10", res["results"])
+        self.assertIn("signature.fail", res["results"])
+        self.assertEqual({"signature.simple", "signature.union",
+                          "signature.nested"}, set(res["overhead"]))
+        json.dumps(res)
+
+    def test_thread_scaling(self):
+        res = tybench.thread_scaling(threads=(1, 2), calls=50, repeat=1,
+                                     select="simple")
+        self.assertEqual({"signature.simple", "signature.simple.baseline"},
+                         set(res["throughput"]))
+        self.assertEqual({"1", "2"}, set(res["scaling"]["signature.simple"]))
+        self.assertEqual(1., res["scaling"]["signature.simple"]["1"])
+        self.assertTrue(res["throughput"]["signature.simple"]["2"] > 0)
+        json.dumps(res)
+
+    def test_compare(self):
+        base = {"results": {"a": 100., "b": 100., "c": 100.}}
+        cur = {"results": {"a": 105., "b": 130.}}
+        rows = tybench.compare(base, cur, threshold=0.1)
+        self.assertEqual([("a", False), ("b", True)],
+                         [(x["name"], x["regression"]) for x in rows])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "bench.json")
+            args = ["bench", "--sizes", "10", "--repeat", "1",
+                    "--min-time", "0.0001", "--select", "flat", "-o", out]
+            self.assertEqual(0, main(args))
+            with open(out) as fp:
+                res = json.load(fp)
+            self.assertEqual({"is_type.flat.10", "is_type.flat_fail.10"},
+                             set(res["results"]))
+
+            res["results"] = {k: v / 2 for k, v in res["results"].items()}
+            base = os.path.join(tmp, "base.json")
+            with open(base, "w") as fp:
+                json.dump(res, fp)
+            with redirect_stderr(io.StringIO()) as err:
+                self.assertEqual(1, main(["bench", "--current", out,
+                                          "--compare", base]))
+            self.assertIn("REGRESSION", err.getvalue())
+
+    def test_main_threads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "threads.json")
+            args = ["bench", "--threads", "1", "2", "--calls", "20",
+                    "--repeat", "1", "--select", "union", "-o", out]
+            self.assertEqual(0, main(args))
+            with open(out) as fp:
+                res = json.load(fp)
+        self.assertEqual({"signature.union", "signature.union.baseline"},
+                         set(res["scaling"]))
@@ -0,0 +1,38 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.tybind import Binder, _NO_DEF
+from typing import Union, List
+
+
+class TestTyBind(unittest.TestCase):
+    def test_shape_cache(self):
+        binder = Binder((
+            ("a", 0, int, TySig.compile(int)),
+            ("b", _NO_DEF, str, TySig.compile(str)),
+        ))
+        self.assertEqual({"a": 0, "b": "x"}, binder.bind(("x",), {}))
+        self.assertEqual({"a": 0, "b": "y"}, binder.bind(("y",), {}))
+        self.assertEqual({"a": 2, "b": "y"}, binder.bind((2, "y"), {}))
+        self.assertEqual({"a": 0, "b": "z"}, binder.bind((), {"b": "z"}))
+        self.assertEqual(3, len(binder.shapes))
+
+    def test_replay_rechecks(self):
+        binder = Binder((
+            ("a", [0], List[int], TySig.compile(List[int])),
+            ("b", _NO_DEF, List[Union[int, float]],
+             TySig.compile(List[Union[int, float]])),
+        ))
+        self.assertEqual({"a": [0], "b": [1.]}, binder.bind(([1.],), {}))
+        # same shape, but the element types now match the first param
+        self.assertEqual({"a": [1], "b": [2.]}, binder.bind(([1], [2.]), {}))
+        self.assertEqual({"a": [1]}, binder.bind(([1],), {}))
+
+    def test_errors_not_cached(self):
+        binder = Binder((("a", _NO_DEF, int, TySig.compile(int)),))
+        with self.assertRaises(TypeError):
+            binder.bind(("x",), {})
+        with self.assertRaises(TypeError):
+            binder.bind((1, 2), {})
+        with self.assertRaises(TypeError):
+            binder.bind((), {"c": 1})
+        self.assertEqual(0, len(binder.shapes))
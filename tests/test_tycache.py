@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+from tysig.tysig import TySig
+from tysig.tycache import ResultCache, is_deep_immutable
+from typing import Tuple, List, Any
+
+
+class TestTyCache(unittest.TestCase):
+    def test_deep_immutable(self):
+        self.assertEqual(is_deep_immutable((1, "a", (2., None), b"x")), True)
+        self.assertEqual(is_deep_immutable(frozenset({(1, 2)})), True)
+        self.assertEqual(is_deep_immutable((1, [2])), False)
+        self.assertEqual(is_deep_immutable((1, {})), False)
+
+    def test_hits(self):
+        cache = ResultCache()
+        CType = Tuple[Tuple[str, int], Tuple[str, int]]
+        validator = TySig.compile(CType, results=cache)
+        self.assertIs(validator, TySig.compile(CType, results=cache))
+        config = (("a", 1), ("b", 2))
+        self.assertEqual(validator(config), True)
+        self.assertEqual(validator(config), True)
+        self.assertEqual(validator((("a", 1), ("b", "2"))), False)
+        self.assertEqual({"hits": 1, "misses": 2, "evictions": 0, "size": 2},
+                         cache.stats())
+
+    def test_mutable_not_cached(self):
+        cache = ResultCache()
+        validator = TySig.compile(Tuple[List[int]], results=cache)
+        value = ([1],)
+        self.assertEqual(validator(value), True)
+        value[0].append("x")
+        self.assertEqual(validator(value), False)
+        self.assertEqual(validator([1]), False)
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.stats()["misses"])
+
+    def test_mutable_remembered(self):
+        walks = []
+
+        def counted(var) -> bool:
+            walks.append(var)
+            return is_deep_immutable(var)
+
+        cache = ResultCache()
+        validator = TySig.compile(Tuple[int, List[int]], results=cache)
+        value = (1, [2])
+        with mock.patch("tysig.tycache.is_deep_immutable", counted):
+            for _ in range(3):
+                self.assertEqual(validator(value), True)
+            value[1].append("x")
+            self.assertEqual(validator(value), False)
+        self.assertEqual([value], walks)
+        self.assertEqual({"hits": 0, "misses": 0, "evictions": 0, "size": 0},
+                         cache.stats())
+
+    def test_eviction(self):
+        cache = ResultCache(maxsize=2)
+        validator = TySig.compile(Tuple[int, Any], results=cache)
+        values = [(i, "x") for i in range(3)]
+        for value in values:
+            validator(value)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.stats()["evictions"])
+        validator(values[0])
+        self.assertEqual(4, cache.stats()["misses"])
+        cache.clear()
+        self.assertEqual(0, cache.stats()["misses"])
+
+    def test_signature(self):
+        cache = ResultCache()
+
+        @TySig.signature(
+            config=TySig.compile(Tuple[str, Tuple[int, int]], results=cache)
+        )
+        def fnc(*args, **kwargs):
+            return kwargs["config"]
+
+        config = ("a", (1, 2))
+        fnc(config)
+        fnc(config)
+        self.assertEqual(1, cache.stats()["hits"])
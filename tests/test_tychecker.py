@@ -0,0 +1,77 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.tycompile import COST_CONSTANT, K_CUSTOM, plan_cost
+from typing import Generic, TypeVar, Union, List, Dict
+
+T = TypeVar("T")
+
+
+class Batch(Generic[T]):
+    def __init__(self, schema, rows):
+        self.schema = schema
+        self.rows = rows
+
+
+class TestTyChecker(unittest.TestCase):
+    def tearDown(self):
+        TySig.unregister_checker(Batch)
+
+    def test_origin(self):
+        calls = []
+
+        def check_batch(var, check_type):
+            calls.append(check_type)
+            args = getattr(check_type, "__args__", ())
+            return isinstance(var, Batch) and \
+                (not args or var.schema is args[0])
+
+        TySig.register_checker(Batch, check_batch, cost_hint=COST_CONSTANT)
+        rows = [object()] * 1000
+        self.assertTrue(TySig.is_type(Batch(int, rows), Batch[int]))
+        self.assertFalse(TySig.is_type(Batch(str, rows), Batch[int]))
+        self.assertTrue(TySig.is_type(Batch(str, rows), Batch))
+        self.assertFalse(TySig.is_type(rows, Batch))
+        self.assertEqual(K_CUSTOM, TySig.compile(Batch[int]).kind)
+        self.assertEqual([Batch[int], Batch[int], Batch, Batch], calls)
+
+        @TySig.signature(a=Dict[str, Batch[int]])
+        def fn(a):
+            return a
+
+        fn({"x": Batch(int, rows)})
+        with self.assertRaises(TypeError):
+            fn({"x": Batch(float, rows)})
+
+        # no longer used once unregistered
+        TySig.unregister_checker(Batch)
+        self.assertTrue(TySig.is_type(Batch(str, rows), Batch[int]))
+
+    def test_union_order(self):
+        order = []
+
+        def cheap(var, check_type):
+            order.append("cheap")
+            return False
+
+        def costly(var, check_type):
+            order.append("costly")
+            return False
+
+        class Cheap:
+            pass
+
+        class Costly:
+            pass
+
+        TySig.register_checker(Costly, costly, cost_hint=500)
+        TySig.register_checker(Cheap, cheap, cost_hint=2)
+        try:
+            plan = TySig.compile(Union[List[int], Costly, Cheap, int])
+            self.assertEqual([int, Cheap, Costly, List[int]],
+                             [x.check_type for x in plan.args])
+            self.assertEqual(2, plan_cost(plan.args[1]))
+            self.assertFalse(plan("x"))
+            self.assertEqual(["cheap", "costly"], order)
+        finally:
+            TySig.unregister_checker(Cheap)
+            TySig.unregister_checker(Costly)
@@ -0,0 +1,131 @@
+import sys
+import unittest
+import threading
+from tysig.tysig import TySig
+from tysig.tycompile import PlanCache, K_LIST, K_INSTANCE, K_UNION, \
+    K_VARTUPLE, rejects_class
+from tysig.tyexplain import explain
+from typing import Union, Tuple, List, Optional, Dict, Any, AnyStr, \
+    Literal, Set, FrozenSet, Sequence, Mapping, Callable
+
+
+class TestTyCompile(unittest.TestCase):
+    def test_compile(self):
+        HType = Dict[str, Tuple[List[Dict[int, List[Union[str, float]]]],
+                                float, Optional[int]]]
+        validator = TySig.compile(HType)
+        self.assertEqual(validator({"1": ([{1: ["a", 2.]}], 0., None)}),
+                         True)
+        self.assertEqual(validator({"1": ([{1: ["a", 2]}], 0., None)}),
+                         False)
+        self.assertEqual(validator({"1": [[{1: []}], 0., None]}), False)
+        self.assertIs(validator, TySig.compile(HType))
+
+    def test_compile_kinds(self):
+        self.assertEqual(TySig.compile(int).kind, K_INSTANCE)
+        self.assertEqual(TySig.compile(List[int]).kind, K_LIST)
+        self.assertEqual(TySig.compile(Any)(object()), True)
+        self.assertEqual(TySig.compile(AnyStr)(b"x"), True)
+        self.assertEqual(TySig.compile(AnyStr)(1), False)
+        self.assertEqual(TySig.compile(Tuple[int, str])((1, "a", 2)), False)
+
+    def test_modern_types(self):
+        cases = [
+            (list[int], [1, 2], [1, "2"]),
+            (dict[str, list[int]], {"a": [1]}, {"a": [1.]}),
+            (Literal["a", 1], 1, True),
+            (Literal["a", 1], "a", 1.),
+            (Set[int], {1, 2}, {1, "2"}),
+            (FrozenSet[str], frozenset("ab"), {"a"}),
+            (set[int], {1}, [1]),
+            (Sequence[int], (1, 2), [1.]),
+            (Sequence[str], "abc", ["a", 1]),
+            (Mapping[str, int], {"a": 1}, {1: 1}),
+            (Tuple[int, ...], (1, 2, 3), (1, "2")),
+            (tuple[int, ...], (), [1]),
+            (Tuple[()], (), (1,)),
+            (Callable[[int], int], len, 1),
+        ]
+        for check_type, good, bad in cases:
+            self.assertTrue(TySig.is_type(good, check_type), check_type)
+            self.assertFalse(TySig.is_type(bad, check_type), check_type)
+
+        self.assertEqual(K_VARTUPLE, TySig.compile(Tuple[int, ...]).kind)
+        self.assertTrue(rejects_class(TySig.compile(Literal[1, 2]), str))
+        self.assertTrue(rejects_class(TySig.compile(Set[int]), list))
+        self.assertTrue(TySig.is_typing_type(list[int]))
+        self.assertEqual("a[1][0]: expected int, got str",
+                         explain(TySig.compile(Sequence[Tuple[int, ...]]),
+                                 [(1,), ("x",)], "a"))
+
+    @unittest.skipIf(sys.version_info < (3, 10), "X | Y needs python 3.10")
+    def test_union_operator(self):
+        cases = [
+            (int | None, None, 1.),
+            (list[int | str], [1, "a"], [1, 2.]),
+        ]
+        for check_type, good, bad in cases:
+            self.assertTrue(TySig.is_type(good, check_type), check_type)
+            self.assertFalse(TySig.is_type(bad, check_type), check_type)
+        self.assertEqual(K_UNION, TySig.compile(int | str).kind)
+        self.assertTrue(TySig.is_typing_type(int | None))
+
+        @TySig.signature(a=list[int], b=(None, int | None))
+        def fn(a, b) -> dict[str, int]:
+            return {"a": len(a)}
+
+        self.assertEqual({"a": 2}, fn([1, 2]))
+        with self.assertRaises(TypeError):
+            fn([1], 1.)
+
+    def test_shared_sub_plans(self):
+        cache = PlanCache()
+        plan = cache.get(Dict[str, List[int]])
+        self.assertIs(plan.args[1], cache.get(List[int]))
+        self.assertEqual(len(cache), 4)
+
+    def test_bounded_cache(self):
+        cache = PlanCache(maxsize=2)
+        cache.get(int)
+        cache.get(str)
+        cache.get(float)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(int, cache)
+        self.assertIn(float, cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_is_type_many(self):
+        values = [1, "a", 2, None, [1], True, 3.]
+        self.assertEqual([True, False, True, False, False, True, False],
+                         TySig.is_type_many(values, int))
+        self.assertEqual([1, 3, 4, 6],
+                         TySig.is_type_many(values, int, failures=True))
+        self.assertEqual([0, 2, 3, 5],
+                         TySig.is_type_many(iter(values),
+                                            Union[str, List[int], float],
+                                            failures=True))
+        rows = [("a", [1]), ("b", ["x"]), ("c", []), ["d", [1]]]
+        self.assertEqual([True, False, True, False],
+                         TySig.is_type_many(rows, Tuple[str, List[int]]))
+        self.assertEqual([], TySig.is_type_many([], Dict[str, int]))
+
+    def test_concurrent_get(self):
+        cache = PlanCache()
+        types = [Dict[str, List[Union[int, str]]], Tuple[int, ...],
+                 Optional[List[float]], Set[bytes]]
+        barrier = threading.Barrier(8)
+        plans = []
+
+        def get():
+            barrier.wait()
+            plans.append([cache.get(x) for x in types])
+        workers = [threading.Thread(target=get) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        # every thread gets the plan published first
+        for got in plans:
+            self.assertTrue(all(x is cache.get(y)
+                                for x, y in zip(got, types)))
@@ -0,0 +1,42 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.tyexplain import explain, find_failure
+from typing import Union, Tuple, List, Optional, Dict
+
+HISTORY = Dict[str, Tuple[List[Dict[int, List[Union[str, float]]]],
+                          float, Optional[int]]]
+
+
+class TestTyExplain(unittest.TestCase):
+    def test_path(self):
+        history = {"1": ([{3: ["a", 1.]}, {4: ["b", 2., 3]}], 1., None)}
+        self.assertEqual("history['1'][0][1][4][2]: expected "
+                         "Union[str, float], got int",
+                         explain(TySig.compile(HISTORY), history, "history"))
+
+        plan = TySig.compile(Dict[int, str])
+        path, sub_plan, var = find_failure(plan, {1: "a", "2": "b"}, "d")
+        self.assertEqual(("d key '2'", int, "2"),
+                         (path, sub_plan.check_type, var))
+        self.assertIsNone(find_failure(plan, {1: "a"}, "d"))
+
+    def test_top_level(self):
+        # the value itself failed, nothing to add to the message
+        self.assertEqual("", explain(TySig.compile(List[int]), (1,), "a"))
+        # Union members that cannot be told apart by the class of the value
+        self.assertEqual("", explain(TySig.compile(Union[List[int],
+                                                         List[str]]),
+                                     [1.], "a"))
+        self.assertEqual("a[0]: expected int, got float",
+                         explain(TySig.compile(Union[List[int], str]),
+                                 [1.], "a"))
+
+    def test_signature_error(self):
+        @TySig.signature(a=List[Tuple[int, str]])
+        def fn(a):
+            return a
+
+        with self.assertRaises(TypeError) as ctx:
+            fn([(1, "a"), (2, 3)])
+        self.assertTrue(str(ctx.exception).endswith(
+            ". Failed at a[1][1]: expected str, got int"))
@@ -0,0 +1,125 @@
+import importlib
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from tysig.tysig import TySig
+from tysig.tycompile import PLANS, PlanCache, compile_plan, K_EXPORTED, \
+    K_ANY, K_INSTANCE, K_LITERAL
+from tysig.tyexport import export, type_source
+from tysig.__main__ import main
+from typing import Tuple, List, Optional, Dict, Literal, Sequence, Set, \
+    FrozenSet, Mapping, Any, AnyStr, Callable
+
+MODULE = '''
+import sys
+from typing import Union, Tuple, List, Optional, Dict, Literal, \\
+    Sequence, Set, FrozenSet, Mapping, Any, AnyStr, Type, Callable
+from tysig.tysig import TySig
+
+Row = Dict[str, Tuple[int, Union[str, float]]]
+Deep = List[List[List[List[List[List[List[List[List[List[int]]]]]]]]]]
+Mixed = Union[int, List[str], Literal["a", 1, True], None]
+if sys.version_info >= (3, 10):
+    Modern = dict[str, list[int | None]]
+else:
+    Modern = dict[str, list[Optional[int]]]
+Var = Tuple[int, ...]
+Anything = Any
+Count = int
+Flag = Literal["on", "off"]
+Loose = Dict[str, Optional[Any]]
+Either = List[Union[int, Any]]
+Kinds = Union[int, Type[int], Callable[..., int]]
+
+
+class Local(object):
+    pass
+
+
+@TySig.signature(a=Row, b=Optional[Sequence[AnyStr]],
+                 c=Set[FrozenSet[int]], d=Mapping[str, Any])
+def fn(a, b, c, d) -> List[Row]:
+    return [a]
+
+
+class Service(object):
+    @staticmethod
+    @TySig.signature(x=List[Local], y=Tuple[()])
+    def run(x, y):
+        return x
+'''
+
+VALUES = [None, 1, True, 1., "a", b"a", [], [1], ["a"], [None], (),
+          (1,), (1, "a"), (1, 2), {}, {"a": (1, "x")}, {"a": (1, 2)},
+          {"a": [1, None]}, {"a": ["x"]}, {1: (1, "x")}, set(),
+          {frozenset([1])}, {frozenset(["a"])}, [[[[[[[[[[1]]]]]]]]]],
+          [[[[[[[[[["a"]]]]]]]]]], [{"a": (1, "x")}], ["a", b"b"],
+          {"k": object()}, int, len, {"a": None}, [1, "a"]]
+
+
+class TestTyExport(unittest.TestCase):
+    def test_type_source(self):
+        self.assertEqual("typing.List[typing.Union[str, None]]",
+                         type_source(List[Optional[str]]))
+        if sys.version_info >= (3, 10):
+            self.assertEqual("typing.Dict[str, typing.List[int | None]]",
+                             type_source(Dict[str, List[int | None]]))
+        self.assertEqual("typing.Literal['a', 1]",
+                         type_source(Literal["a", 1]))
+        self.assertEqual("typing.Tuple[()]", type_source(Tuple[()]))
+        self.assertEqual("collections.abc.Sequence[str]",
+                         type_source(Sequence.__origin__[str]))
+        self.assertIsNone(type_source(List[TestTyExport]))
+        self.assertIsNone(type_source(Callable[[int], int]))
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "tyexport_src.py"), "w") as fp:
+                fp.write(textwrap.dedent(MODULE))
+            sys.path.insert(0, tmp)
+            try:
+                out = os.path.join(tmp, "tyexport_gen.py")
+                self.assertEqual(0, main(["export", "tyexport_src",
+                                          "-o", out]))
+                with open(out) as fp:
+                    source = fp.read()
+                self.assertNotIn("tyexport_src", source.split('"""')[2])
+                self.assertEqual(source, export(["tyexport_src"]))
+                importlib.import_module("tyexport_gen")
+                module = importlib.import_module("tyexport_src")
+            finally:
+                sys.path.remove(tmp)
+                sys.modules.pop("tyexport_gen", None)
+                sys.modules.pop("tyexport_src", None)
+
+        types = [module.Row, module.Deep, module.Mixed, module.Modern,
+                 module.Var, Optional[Sequence[AnyStr]],
+                 Set[FrozenSet[int]], Mapping[str, Any], Tuple[()],
+                 List[module.Row], module.Loose, module.Either,
+                 module.Kinds]
+        for check_type in types:
+            plan = PLANS.get(check_type)
+            self.assertEqual(K_EXPORTED, plan.kind, check_type)
+            compiled = compile_plan(check_type, PlanCache())
+            for var in VALUES:
+                self.assertEqual(compiled.check(var), plan.check(var),
+                                 (check_type, var))
+        # plans decided by class are not replaced by exported ones
+        self.assertEqual(K_ANY, PLANS.get(Any).kind)
+        self.assertEqual(K_INSTANCE, PLANS.get(int).kind)
+        self.assertEqual(K_LITERAL, PLANS.get(module.Flag).kind)
+        # user classes are compiled as usual
+        self.assertNotEqual(K_EXPORTED,
+                            PLANS.get(List[module.Local]).kind)
+
+        checked = TySig.typed(module.Row, {"a": (1, "x")})
+        self.assertTrue(TySig.is_type(checked, module.Row))
+        self.assertEqual([{"a": (1, "x")}],
+                         module.fn({"a": (1, "x")}, None, set(), {}))
+        with self.assertRaises(TypeError) as ctx:
+            module.fn({"a": (1, 2)}, None, set(), {})
+        self.assertTrue(str(ctx.exception).endswith(
+            ". Failed at a['a'][1]: expected Union[str, float], got int"))
+        PLANS.clear()
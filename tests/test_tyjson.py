@@ -0,0 +1,101 @@
+import io
+import json
+import unittest
+from tysig.tysig import TySig
+from typing import Union, Tuple, List, Optional, Dict, Any, Literal, \
+    Sequence
+
+BODY = Dict[str, List[Tuple[int, str]]]
+
+
+class Reader(object):
+    """ file object reading a few characters at a time """
+
+    def __init__(self, text, size=3):
+        self.text = text
+        self.size = size
+        self.reads = 0
+
+    def read(self, _):
+        self.reads += 1
+        chunk, self.text = self.text[:self.size], self.text[self.size:]
+        return chunk
+
+
+class TestTyJson(unittest.TestCase):
+    def test_parse(self):
+        doc = {"a": [[1, "x"], [2, "é\n"]], "b": []}
+        text = json.dumps(doc)
+        expected = {"a": [(1, "x"), (2, "é\n")], "b": []}
+        self.assertEqual(expected, TySig.validate_json(text, BODY))
+        self.assertEqual(expected, TySig.validate_json(text.encode(), BODY))
+        self.assertEqual(expected, TySig.validate_json(Reader(text), BODY))
+        self.assertEqual(expected, TySig.validate_json(
+            io.BytesIO(json.dumps(doc, ensure_ascii=False).encode()), BODY))
+        self.assertIsNone(TySig.validate_json(Reader(text), BODY,
+                                              build=False))
+
+        values = [None, True, -1.5e3, 12345, "a", [], {}, [1, [2, {}]],
+                  {"k": [None, "v"]}]
+        for value in values:
+            text = json.dumps(value)
+            self.assertEqual(value, TySig.validate_json(Reader(text), Any))
+            self.assertEqual(value, TySig.validate_json(text, Any))
+
+    def test_types(self):
+        mixed = List[Union[int, str, List[int], List[str],
+                           Dict[str, Optional[float]]]]
+        text = '[1, "a", [1, 2], ["x"], {"k": 1.5, "n": null}]'
+        self.assertEqual(json.loads(text),
+                         TySig.validate_json(Reader(text), mixed))
+        with self.assertRaises(TypeError):
+            TySig.validate_json('[[1, "x"]]', mixed)
+        self.assertEqual([1, "a"], TySig.validate_json(
+            '[1, "a"]', Sequence[Literal[1, "a"]]))
+        self.assertEqual((1, 2), TySig.validate_json(
+            '[1, 2]', Tuple[int, ...]))
+        with self.assertRaises(TypeError):
+            TySig.validate_json('[1, true, 2]', List[Literal[1, 2]])
+
+        pairs = Dict[str, List[Union[Tuple[int, int], List[str]]]]
+        text = '{"a": [[1, 2], ["x", "y"], [3, 4], []]}'
+        expected = {"a": [(1, 2), ["x", "y"], (3, 4), []]}
+        self.assertEqual(expected, TySig.validate_json(text, pairs))
+        self.assertEqual(expected, TySig.validate_json(Reader(text), pairs))
+        with self.assertRaises(TypeError) as ctx:
+            TySig.validate_json('{"a": [[1, 2], [1, "x"]]}', pairs)
+        self.assertIn("Failed at json['a'][1]: ", str(ctx.exception))
+
+    def test_reject(self):
+        with self.assertRaises(TypeError) as ctx:
+            TySig.validate_json('{"a": [[1, "x"], [2, 3]]}', BODY)
+        self.assertEqual(
+            "'json' JSON value should be of type 'Dict[str, List[Tuple["
+            "int, str]]]'. Failed at json['a'][1][1]: expected str, got int",
+            str(ctx.exception))
+        for bad, path in (('{"a": [[1]]}', "json['a'][0]"),
+                          ('{"a": [[1, "x", 2]]}', "json['a'][0]"),
+                          ('{"a": {}}', "json['a']"), ('[]', "json")):
+            with self.assertRaises(TypeError) as ctx:
+                TySig.validate_json(bad, BODY, build=False)
+            self.assertIn(f"Failed at {path}: ", str(ctx.exception))
+        with self.assertRaises(TypeError) as ctx:
+            TySig.validate_json('{"1": "a"}', Dict[int, str], name="body")
+        self.assertTrue(str(ctx.exception).endswith(
+            "Failed at body key '1': expected int, got str"))
+
+        # rejected before the rest of the document is read
+        reader = Reader('{"a": [[1, 2]' + ', [1, "x"]' * 10000 + ']}')
+        with self.assertRaises(TypeError):
+            TySig.validate_json(reader, BODY)
+        self.assertLess(reader.reads, 10)
+
+    def test_invalid_json(self):
+        for bad in ('', '[1', '[1,]', '{"a" 1}', '[1] 2', 'nul',
+                    '"abc', '{1: 2}'):
+            with self.assertRaises(ValueError):
+                TySig.validate_json(Reader(bad), Any)
+            with self.assertRaises(ValueError):
+                TySig.validate_json(bad, Any, build=False)
+        with self.assertRaises(ValueError):
+            TySig.validate_json('[1, 2', List[int], build=False)
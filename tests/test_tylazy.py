@@ -0,0 +1,73 @@
+import unittest
+from tysig.tysig import TySig
+from typing import Iterator, Iterable, Generator, List, Tuple
+
+
+@TySig.signature(rows=Iterator[Tuple[str, int]])
+def total(*args, **kwargs) -> int:
+    return sum(x for _, x in kwargs["rows"])
+
+
+@TySig.signature(num=int)
+def count(*args, **kwargs) -> Iterator[int]:
+    for i in range(kwargs["num"]):
+        yield i if i < 3 else str(i)
+
+
+@TySig.signature(start=int)
+def echo(*args, **kwargs) -> Generator[int, int, str]:
+    value = kwargs["start"]
+    while value >= 0:
+        value = yield value
+    return "done" if value == -1 else value
+
+
+class TestTyLazy(unittest.TestCase):
+    def test_iterator_arg(self):
+        rows = (("a", i) for i in range(5))
+        self.assertEqual(10, total(rows))
+        with self.assertRaises(TypeError) as ctx:
+            total(iter([("a", 1), ("b", "2")]))
+        self.assertEqual("'rows' item 1 type should be 'typing.Tuple[str, "
+                         "int]' instead found '<class 'tuple'>'",
+                         str(ctx.exception))
+        with self.assertRaises(TypeError):
+            total([("a", 1)])
+
+    def test_iterable_arg(self):
+        @TySig.signature(values=Iterable[int])
+        def twice(*args, **kwargs) -> List[int]:
+            return list(kwargs["values"]) + list(kwargs["values"])
+
+        self.assertEqual([1, 2, 1, 2], twice([1, 2]))
+        with self.assertRaises(TypeError):
+            twice([1, "2"])
+
+    def test_iterator_return(self):
+        values = count(5)
+        self.assertEqual([0, 1, 2], [next(values) for _ in range(3)])
+        with self.assertRaises(TypeError):
+            next(values)
+
+    def test_generator_return(self):
+        gen = echo(1)
+        self.assertEqual(1, next(gen))
+        self.assertEqual(5, gen.send(5))
+        with self.assertRaises(TypeError):
+            gen.send("x")
+        gen = echo(1)
+        next(gen)
+        with self.assertRaises(StopIteration) as ctx:
+            gen.send(-1)
+        self.assertEqual("done", ctx.exception.value)
+        gen = echo(1)
+        next(gen)
+        with self.assertRaises(TypeError):
+            gen.send(-2)
+
+    def test_is_type(self):
+        self.assertEqual(TySig.is_type(iter([1]), Iterator[str]), True)
+        self.assertEqual(TySig.is_type([1], Iterator[int]), False)
+        self.assertEqual(TySig.is_type([1], Iterable[int]), True)
+        self.assertEqual(TySig.is_type(count(1), Generator[int, None, None]),
+                         False)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import unittest
+from tysig.tysig import TySig
+from tysig.tyruntime import RuntimePolicy
+from typing import Iterator, List, Optional, Tuple, Union
+
+
+class TestTyMemo(unittest.TestCase):
+    def test_memo(self):
+        calls = []
+
+        @TySig.signature(a=int, b=(2, int), cache=2)
+        def add(a, b) -> int:
+            calls.append((a, b))
+            return a + b
+
+        self.assertEqual(3, add(1))
+        self.assertEqual(3, add(1, 2))
+        self.assertEqual(3, add(b=2, a=1))
+        self.assertEqual([(1, 2)], calls)
+        add(2)
+        add(3)  # evicts (1, 2)
+        add(1)
+        self.assertEqual(4, len(calls))
+        self.assertEqual({"hits": 2, "misses": 4, "evictions": 2,
+                          "expirations": 0, "uncached": 0, "size": 2},
+                         add.cache.stats())
+        with self.assertRaises(TypeError):
+            add("1")  # args are checked before the cache lookup
+
+        add.cache.clear()
+        self.assertEqual(0, len(add.cache))
+
+    def test_skips_return_check(self):
+        results = [1, "x"]
+
+        @TySig.signature(a=int, cache=8)
+        def fn(a) -> int:
+            return results.pop(0)
+
+        self.assertEqual(1, fn(1))
+        self.assertEqual(1, fn(1))
+        self.assertEqual(2, fn.stats.calls)
+        with self.assertRaises(TypeError):
+            fn(2)  # the miss is checked, and not cached
+        self.assertEqual(0, fn.cache.stats()["evictions"])
+        self.assertEqual(1, len(fn.cache))
+
+    def test_ttl_and_key(self):
+        calls = []
+
+        @TySig.signature(a=List[int], scale=(1, int), cache=4,
+                         cache_ttl=0.05,
+                         cache_key=lambda kw: (tuple(kw["a"]), kw["scale"]))
+        def total(a, scale) -> int:
+            calls.append(a)
+            return sum(a) * scale
+
+        self.assertEqual(6, total([1, 2, 3]))
+        self.assertEqual(6, total([1, 2, 3]))
+        self.assertEqual(1, len(calls))
+        time.sleep(0.06)
+        self.assertEqual(6, total([1, 2, 3]))
+        self.assertEqual(2, len(calls))
+        self.assertEqual(1, total.cache.stats()["expirations"])
+
+        @TySig.signature(a=List[int], cache=4)
+        def first(a) -> int:
+            return a[0]
+        first([1])
+        first([1])
+        self.assertEqual(2, first.cache.stats()["uncached"])
+
+    def test_methods_and_coroutines(self):
+        class Counter(object):
+            def __init__(self, n):
+                self.n = n
+                self.calls = 0
+
+            @TySig.signature(True, a=int, cache=8)
+            def scaled(self, a) -> int:
+                self.calls += 1
+                return self.n * a
+
+        one, two = Counter(1), Counter(2)
+        self.assertEqual((3, 6, 3), (one.scaled(3), two.scaled(3),
+                                     one.scaled(3)))
+        self.assertEqual((1, 1), (one.calls, two.calls))
+
+        awaited = []
+
+        @TySig.signature(a=int, cache=8)
+        async def double(a) -> int:
+            awaited.append(a)
+            return a * 2
+
+        async def run():
+            return [await double(1), await double(1)]
+        self.assertEqual([2, 2], asyncio.run(run()))
+        self.assertEqual([1], awaited)
+
+    def test_reserved_names(self):
+        @TySig.signature(key=str, cache=(None, Optional[dict]))
+        def lookup(key, cache):
+            return key if cache is None else cache[key]
+        self.assertIsNone(lookup.cache)
+        self.assertEqual("a", lookup("a"))
+        self.assertEqual(1, lookup("a", {"a": 1}))
+
+        with self.assertRaises(TypeError):
+            @TySig.signature(a=Iterator[int], cache=2)
+            def consume(a) -> List[int]:
+                return list(a)
+
+        with self.assertRaises(TypeError):
+            @TySig.signature(n=int, cache=2)
+            def count(n) -> Iterator[int]:
+                return iter(range(n))
+
+        with self.assertRaises(ValueError):
+            @TySig.signature(a=Tuple[int, int], cache=2, cache_ttl=0)
+            def swap(a):
+                return a[1], a[0]
+
+    def test_unchecked_and_typed(self):
+        @TySig.signature(a=int, cache=8)
+        def bad(a) -> int:
+            return "not an int"
+
+        with TySig.checking(RuntimePolicy.off()):
+            self.assertEqual("not an int", bad(1))
+        self.assertEqual(0, len(bad.cache))  # unchecked, not cached
+        with self.assertRaises(TypeError):
+            bad(1)
+
+        @TySig.signature(x=Union[int, bool, float], cache=8)
+        def kind(x) -> str:
+            return type(x).__name__
+
+        self.assertEqual(["int", "bool", "float"],
+                         [kind(1), kind(True), kind(1.)])
+        self.assertEqual(3, len(kind.cache))
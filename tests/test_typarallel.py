@@ -0,0 +1,62 @@
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from tysig.tysig import TySig
+from tysig.typarallel import ParallelPolicy
+from tysig.typolicy import CheckPolicy
+from typing import Union, Tuple, List, Dict
+
+
+RType = List[Dict[str, Tuple[int, Union[str, float]]]]
+
+
+class TestTyParallel(unittest.TestCase):
+    def assert_parallel(self, parallel):
+        rows = [{"a": (i, "x"), "b": (i, 1.)} for i in range(1000)]
+        self.assertTrue(TySig.is_type(rows, RType, parallel=parallel))
+        rows[-1] = {"a": (1, 2)}
+        self.assertFalse(TySig.is_type(rows, RType, parallel=parallel))
+        rows[-1] = {"a": (1, "x")}
+        rows[0] = {"a": (1, 2)}
+        self.assertFalse(TySig.is_type(rows, RType, parallel=parallel))
+
+        table = {str(i): i for i in range(1000)}
+        validator = TySig.compile(Dict[str, int], parallel=parallel)
+        self.assertTrue(validator(table))
+        table[1] = 1
+        self.assertFalse(validator(table))
+
+    def test_threads(self):
+        self.assert_parallel(ParallelPolicy.thread_pool(4, threshold=100,
+                                                        chunk_size=64))
+        with ThreadPoolExecutor(2) as pool:
+            self.assert_parallel(ParallelPolicy(pool, threshold=100,
+                                                chunk_size=64))
+
+    def test_processes(self):
+        with ProcessPoolExecutor(2) as pool:
+            parallel = ParallelPolicy(pool, threshold=100, chunk_size=250)
+            self.assertTrue(parallel.processes)
+            self.assert_parallel(parallel)
+            # the check policy is passed to the workers
+            rows = [array("i", [1, 2])] * 1000
+            self.assertTrue(TySig.is_type(rows, List[List[int]],
+                                          CheckPolicy.full(arrays=True),
+                                          parallel=parallel))
+            self.assertFalse(TySig.is_type(rows, List[List[int]],
+                                           parallel=parallel))
+
+    def test_small_and_other_values(self):
+        parallel = ParallelPolicy.thread_pool(threshold=100, chunk_size=10)
+        self.assertTrue(TySig.is_type([1] * 10, List[int],
+                                      parallel=parallel))
+        self.assertFalse(TySig.is_type((1,) * 200, List[int],
+                                       parallel=parallel))
+        self.assertTrue(TySig.is_type("a", Union[str, List[int]],
+                                      parallel=parallel))
+        # element policies are checked directly
+        self.assertTrue(TySig.is_type([1] * 200 + ["x"], List[int],
+                                      CheckPolicy.first(200),
+                                      parallel=parallel))
+        with self.assertRaises(ValueError):
+            ParallelPolicy(chunk_size=0)
@@ -0,0 +1,92 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.typolicy import CheckPolicy, FULL_POLICY
+from tysig.tystack import ENGINE_STACK
+from typing import Union, Tuple, List, Dict, Set, Sequence
+
+
+class TestTyPolicy(unittest.TestCase):
+    def test_first(self):
+        policy = CheckPolicy.first(3)
+        self.assertEqual(TySig.is_type([1, 2, 3, "x"], List[int], policy),
+                         True)
+        self.assertEqual(TySig.is_type([1, "x", 3], List[int], policy),
+                         False)
+        self.assertEqual(TySig.is_type({1: 1, 2: 2, 3: 3, 4: "x"},
+                                       Dict[int, int], policy), True)
+        self.assertEqual(TySig.is_type([1, 2, 3, "x"], List[int]), False)
+
+    def test_sample(self):
+        values = list(range(1000)) + ["x"]
+        policy = CheckPolicy.sample(10, seed=1)
+        self.assertEqual(TySig.is_type(values, List[int], policy),
+                         TySig.is_type(values, List[int],
+                                       CheckPolicy.sample(10, seed=1)))
+        self.assertEqual(TySig.is_type(list(range(5)) + ["x"], List[int],
+                                       policy), False)
+        self.assertEqual(TySig.is_type({i: i for i in range(100)},
+                                       Dict[int, int], policy), True)
+
+    def test_sample_collections(self):
+        # one bad value out of 20, drawn 10 at a time from every collection
+        values = list(range(19)) + ["x"]
+        cases = ((set(values), Set[int], {False, True}),
+                 (tuple(values), Tuple[int, ...], {False, True}),
+                 (dict(zip(values, values)), Dict[Union[int, str], int],
+                  {False, True}),
+                 (range(20), Sequence[int], {True}))
+        for var, check_type, results in cases:
+            found = set()
+            for seed in range(20):
+                policy = CheckPolicy.sample(10, seed=seed)
+                result = TySig.is_type(var, check_type, policy)
+                self.assertEqual(result, TySig.is_type(
+                    var, check_type, CheckPolicy.sample(10, seed=seed),
+                    engine=ENGINE_STACK))
+                found.add(result)
+            self.assertEqual(found, results)
+
+    def test_depth(self):
+        DType = Dict[str, List[Tuple[int, List[int]]]]
+        value = {"a": [(1, ["x"])]}
+        self.assertEqual(TySig.is_type(value, DType), False)
+        self.assertEqual(TySig.is_type(value, DType, CheckPolicy.depth(2)),
+                         True)
+        self.assertEqual(TySig.is_type(value, DType, CheckPolicy.depth(3)),
+                         True)
+        self.assertEqual(TySig.is_type(value, DType, CheckPolicy.depth(4)),
+                         False)
+        self.assertEqual(TySig.is_type({"a": [("1", [1])]}, DType,
+                                       CheckPolicy.depth(2)), True)
+        self.assertEqual(TySig.is_type({"a": [("1", [1])]}, DType,
+                                       CheckPolicy.depth(3)), False)
+        self.assertEqual(TySig.is_type({"a": 1}, DType, CheckPolicy.depth(0)),
+                         True)
+        self.assertEqual(TySig.is_type([], DType, CheckPolicy.depth(0)),
+                         False)
+
+    def test_policy_reported(self):
+        policy = CheckPolicy.first(2)
+        self.assertIs(TySig.compile(List[int]).policy, FULL_POLICY)
+        self.assertEqual(TySig.compile(List[int], policy).policy, policy)
+
+        @TySig.signature(
+            a=TySig.compile(List[Union[int, str]], policy),
+            b=([], TySig.compile(List[float], policy)),
+            c=int
+        )
+        def fnp(*args, **kwargs):
+            return kwargs
+
+        self.assertEqual({"a": [1, "x", 2.], "b": [], "c": 1},
+                         fnp([1, "x", 2.], c=1))
+        self.assertEqual({"a": policy, "b": policy, "c": FULL_POLICY},
+                         fnp.check_policies)
+        with self.assertRaises(TypeError):
+            fnp([1.], c=1)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            CheckPolicy("most")
+        with self.assertRaises(ValueError):
+            CheckPolicy.first(-1)
@@ -0,0 +1,83 @@
+import pickle
+import sys
+import unittest
+from tysig.tysig import TySig
+from typing import Tuple, List, Optional, Dict
+
+
+Point = TySig.record("Point", x=int, y=(0, int),
+                     tags=((), Tuple[str, ...]))
+
+
+@TySig.record(name=str, scores=Dict[str, List[float]],
+              parent=(None, Optional[Point]))
+class Player(object):
+    def total(self) -> float:
+        return sum(sum(x) for x in self.scores.values())
+
+
+class TestTyRecord(unittest.TestCase):
+    def test_init(self):
+        point = Point(1)
+        self.assertEqual((1, 0, ()), (point.x, point.y, point.tags))
+        self.assertEqual(Point(1, 2, ("a",)), Point(tags=("a",), y=2, x=1))
+        self.assertEqual("Point(x=1, y=0, tags=())", repr(point))
+        self.assertEqual(point, pickle.loads(pickle.dumps(point)))
+        self.assertFalse(hasattr(point, "__dict__"))
+        with self.assertRaises(AttributeError):
+            point.z = 1
+
+        with self.assertRaises(TypeError):
+            Point("1")
+        with self.assertRaises(TypeError):
+            Point()
+        with self.assertRaises(TypeError) as ctx:
+            Point(1, 2, ("a", 3))
+        self.assertTrue(str(ctx.exception).endswith(
+            ". Failed at tags[1]: expected str, got int"))
+
+    def test_assignment(self):
+        point = Point(1)
+        point.y = 3
+        self.assertEqual(3, point.y)
+        with self.assertRaises(TypeError):
+            point.y = "3"
+        self.assertEqual(3, point.y)
+
+    def test_decorated_class(self):
+        player = Player("a", {"x": [1., 2.]}, Point(1))
+        self.assertEqual(3., player.total())
+        self.assertEqual("Player", Player.__qualname__)
+        self.assertEqual(("name", "scores", "parent"), Player._fields)
+        with self.assertRaises(TypeError) as ctx:
+            Player("a", {"x": [1., "2"]})
+        self.assertTrue(str(ctx.exception).endswith(
+            ". Failed at scores['x'][1]: expected float, got str"))
+        with self.assertRaises(TypeError):
+            Player("a", {}, parent=(1, 2))
+
+    def test_is_type(self):
+        players = [Player(str(i), {}) for i in range(10)]
+        self.assertTrue(TySig.is_type(players, List[Player]))
+        self.assertFalse(TySig.is_type(players, List[Point]))
+
+        @TySig.signature(player=Player)
+        def name(player):
+            return player.name
+        self.assertEqual("1", name(players[1]))
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            TySig.record("Bad", x=(0, int), y=int)
+        with self.assertRaises(TypeError):
+            TySig.record("Bad", x=("0", int))
+        with self.assertRaises(TypeError):
+            TySig.record("Bad", _fields=int)
+
+    def test_size(self):
+        class Plain(object):
+            def __init__(self, x, y, tags):
+                self.x, self.y, self.tags = x, y, tags
+        plain = Plain(1, 0, ())
+        self.assertLess(sys.getsizeof(Point(1)),
+                        sys.getsizeof(plain) + sys.getsizeof(plain.__dict__))
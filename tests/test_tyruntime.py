@@ -0,0 +1,77 @@
+import unittest
+from tysig.tysig import TySig
+from tysig.tyruntime import RuntimePolicy
+from typing import List
+
+
+def make_fun():
+    @TySig.signature(a=List[int], b=(2, int))
+    def fun(a, b) -> int:
+        return a
+
+    return fun
+
+
+class TestTyRuntime(unittest.TestCase):
+    def tearDown(self):
+        TySig.set_policy(None)
+        TySig.set_policy(None, module=__name__)
+
+    def test_full(self):
+        fun = make_fun()
+        with self.assertRaises(TypeError):
+            fun(["x"])
+        with self.assertRaises(TypeError):
+            fun([1])  # returns a list
+
+    def test_off(self):
+        fun = make_fun()
+        TySig.set_policy(RuntimePolicy.off())
+        self.assertEqual([1], fun([1]))
+        # shape seen before: bound without checking
+        self.assertEqual(["x"], fun(["x"]))
+        with self.assertRaises(TypeError):
+            fun([1], c=3)
+
+    def test_every(self):
+        fun = make_fun()
+        TySig.set_policy(RuntimePolicy.every(3), function=fun)
+        errors = 0
+        for _ in range(9):
+            try:
+                fun([1])
+            except TypeError:
+                errors += 1
+        self.assertEqual(3, errors)
+
+    def test_first_per_shape(self):
+        fun = make_fun()
+        TySig.set_policy(RuntimePolicy.first(2), module=__name__)
+        for _ in range(2):
+            with self.assertRaises(TypeError):
+                fun([1])
+        self.assertEqual([1], fun([1]))
+        # new shape, checked again
+        with self.assertRaises(TypeError):
+            fun([1], b=1)
+
+    def test_precedence(self):
+        fun = make_fun()
+        TySig.set_policy(RuntimePolicy.off(), module="tests")
+        self.assertEqual([1], fun([1]))
+        TySig.set_policy(RuntimePolicy.full(), function=fun)
+        with self.assertRaises(TypeError):
+            fun([1])
+        with TySig.checking(RuntimePolicy.off()):
+            self.assertEqual([1], fun([1]))
+        with self.assertRaises(TypeError):
+            fun([1])
+        TySig.set_policy(None, module="tests")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RuntimePolicy.every(0)
+        with self.assertRaises(ValueError):
+            RuntimePolicy("sometimes")
+        with self.assertRaises(ValueError):
+            TySig.set_policy(RuntimePolicy.off(), function=len)
@@ -267,7 +267,8 @@ class TestTySig(unittest.TestCase):
                          "List[int]]' instead found '<class 'tuple'>'. "
                          "If you're using GenericAlias, VariadicGenericAlias, "
                          "or SpecialForm types then please check the sub "
-                         "argument types are correct", err)
+                         "argument types are correct. Failed at d[1][0]: "
+                         "expected int, got float", err)
 
     def test_sig3(self):
         res = fn2(
@@ -353,7 +354,9 @@ class TestTySig(unittest.TestCase):
                     "NoneType]]]' instead found '<class 'dict'>'. If "\
                     "you're using GenericAlias, VariadicGenericAlias, "\
                     "or SpecialForm types then please check the sub "\
-                    "argument types are correct"
+                    "argument types are correct. Failed at history['gs']: "\
+                    "expected Tuple[List[Dict[int, List[Union[str, float]]]"\
+                    "], float, Optional[int]], got list"
         self.assertEqual(exp_error, err)
 
     def test_sig5(self):
@@ -389,7 +392,8 @@ class TestTySig(unittest.TestCase):
                     "int, int, int], str]' instead found '<class 'tuple'>'"\
                     ". If you're using GenericAlias, VariadicGenericAlias, "\
                     "or SpecialForm types then please check the sub argument"\
-                    " types are correct"
+                    " types are correct. Failed at dob[2]: expected int, "\
+                    "got str"
         self.assertEqual(exp_error, err)
 
     def test_sig6(self):
@@ -432,7 +436,8 @@ class TestTySig(unittest.TestCase):
             "'var2' type should be 'typing.Tuple[typing.Any, typing.Any, str]'"
             " instead found '<class 'tuple'>'. If you're using GenericAlias, "
             "VariadicGenericAlias, or SpecialForm types then please check the"
-            " sub argument types are correct",
+            " sub argument types are correct. Failed at var2[2]: expected "
+            "str, got int",
             err
         )
 
@@ -457,7 +462,8 @@ class TestTySig(unittest.TestCase):
             "'var3' type should be 'typing.Tuple[typing.Any, ~AnyStr, "
             "typing.Any]' instead found '<class 'tuple'>'. If you're using "
             "GenericAlias, VariadicGenericAlias, or SpecialForm types then "
-            "please check the sub argument types are correct",
+            "please check the sub argument types are correct. Failed at "
+            "var3[1]: expected ~AnyStr, got float",
             err
         )
 
@@ -549,7 +555,9 @@ class TestTySig(unittest.TestCase):
                          "[str, typing.Dict[str, ~AnyStr]]]' instead found '"
                          "<class 'list'>'. If you're using GenericAlias, Vari"
                          "adicGenericAlias, or SpecialForm types then please"
-                         " check the sub argument types are correct", err)
+                         " check the sub argument types are correct. Failed "
+                         "at education[0]['a-level']['sd']: expected ~AnyStr, "
+                         "got float", err)
 
     def test_sig14II(self):
         @TySig.signature(name=Optional[str],
@@ -634,7 +642,8 @@ class TestTySig(unittest.TestCase):
                          "signature return type typing.Union[typing.Tuple"
                          "[str, float, typing.List[~AnyStr]], typing.Dict["
                          "int, typing.List[typing.Dict[float, typing.An"
-                         "y]]], NoneType]", err)
+                         "y]]], NoneType]. Failed at "
+                         "return[2][1]: expected ~AnyStr, got int", err)
 
     def test_sig153(self):
         err = ""
@@ -678,7 +687,8 @@ class TestTySig(unittest.TestCase):
                          "signature return type typing.Union[typing.Tuple"
                          "[str, float, typing.List[~AnyStr]], typing.Dict["
                          "int, typing.List[typing.Dict[float, typing.An"
-                         "y]]], NoneType]", err)
+                         "y]]], NoneType]. Failed at "
+                         "return key 1.0: expected int, got float", err)
 
     def test_sig157(self):
         err = ""
@@ -691,7 +701,8 @@ class TestTySig(unittest.TestCase):
                          "signature return type typing.Union[typing.Tuple"
                          "[str, float, typing.List[~AnyStr]], typing.Dict["
                          "int, typing.List[typing.Dict[float, typing.An"
-                         "y]]], NoneType]", err)
+                         "y]]], NoneType]. Failed at "
+                         "return[1][0] key 2: expected float, got int", err)
 
     def test_sig158(self):
         ret = fn15(-1)
@@ -708,3 +719,26 @@ class TestTySig(unittest.TestCase):
 
         fnd(1)
         fnd(1, ver="v4")
+
+    def test_def2(self):
+        err = ""
+        try:
+            @TySig.signature(j=int, ver=(3, str))
+            def fnd(j: int, ver: str = "v3"):
+                return j, ver
+        except TypeError as exp:
+            err = str(exp)
+        self.assertEqual("'ver' default value is of type '<class 'int'>', "
+                         "but expecting type '<class 'str'>'", err)
+
+    def test_def3(self):
+        @TySig.signature(num=int)
+        def fnf(num: int) -> "FwdRef":  # noqa: F821
+            return num
+
+        global FwdRef
+        FwdRef = int
+        try:
+            self.assertEqual(5, fnf(5))
+        finally:
+            del FwdRef
@@ -0,0 +1,113 @@
+import sys
+import unittest
+from tysig.tysig import TySig
+from tysig.tystack import ENGINE_STACK
+from tysig.typolicy import CheckPolicy
+from tysig.tyarray import Constraint, Finite
+from typing import Union, Tuple, List, Optional, Dict, Any, AnyStr, \
+    Annotated, Sequence, Mapping, Set, FrozenSet
+
+
+HType = Dict[str, Tuple[List[Dict[int, List[Union[str, float]]]],
+                        float, Optional[int]]]
+
+
+class Pos(Constraint):
+    # assumes the base type was checked, e.g. raises TypeError on "a"
+    def check(self, var) -> bool:
+        return var > 0 if isinstance(var, int) else var[0] > 0
+
+    def check_array(self, data) -> bool:
+        return bool((data > 0).all())
+
+
+class TestTyStack(unittest.TestCase):
+    def assert_same(self, var, check_type, policy=None):
+        self.assertEqual(TySig.is_type(var, check_type, policy),
+                         TySig.is_type(var, check_type, policy,
+                                       engine=ENGINE_STACK))
+
+    def test_same_results(self):
+        cases = [
+            ({"1": ([{1: ["a", 2.]}], 0., None)}, HType),
+            ({"1": ([{1: ["a", 2]}], 0., None)}, HType),
+            ({"1": [[{1: []}], 0., None]}, HType),
+            ({"1": ([{1: []}, {"2": []}], 0., 1)}, HType),
+            ((2.3, 1, "oik"), Tuple[Union[float, str], Union[int, str],
+                                    Union[float, str]]),
+            ((2.3, 1.6, "oik"), Tuple[Union[float, str], Union[int, str],
+                                      Union[float, str]]),
+            ([b"h", "k", 1], List[AnyStr]),
+            ([[1, "x"], {}], List[Union[Dict[str, int], List[Any]]]),
+            ([1., float("nan")], List[Annotated[float, Finite()]]),
+            ([1., 2.], List[Annotated[float, Finite()]]),
+            (["a"], List[Annotated[int, Pos()]]),
+            ([[1, "a"]], List[Annotated[List[int], Pos()]]),
+            ([1, 0], List[Annotated[int, Pos()]]),
+            ((1, 2), Tuple[int]),
+            ("x", int),
+        ]
+        for var, check_type in cases:
+            self.assert_same(var, check_type)
+        self.assert_same([1, 2, "x"], List[List[int]],
+                         CheckPolicy.first(2))
+        self.assert_same([[1], [2, "x"]], List[List[int]],
+                         CheckPolicy.first(2))
+        self.assert_same({"a": [[1], ["x"]]}, Dict[str, List[List[int]]],
+                         CheckPolicy.depth(1))
+
+    def test_deep(self):
+        # compiled at the default recursion limit, as nested types are
+        # compiled innermost first
+        DType, value, bad = Any, 1, "x"
+        for idx in range(300):
+            DType = (List[Union[int, DType]], Sequence[DType],
+                     Mapping[str, DType], Tuple[DType, ...])[idx % 4]
+            value, bad = ([[value], [bad]], [(value,), (bad,)],
+                          [{"a": value}, {1: value}], [(value,), (1, bad)]
+                          )[idx % 4]
+        plan = TySig.compile(DType)
+        validator = TySig.compile(DType, engine=ENGINE_STACK)
+        self.assertEqual(plan(value), True)
+        self.assert_same(bad, DType)
+
+        def nested(calls: int, fun):  # uses up the recursion headroom
+            return nested(calls - 1, fun) if calls else fun()
+        depth, frame = 0, sys._getframe()
+        while frame is not None:
+            depth, frame = depth + 1, frame.f_back
+        calls = sys.getrecursionlimit() - depth - 100
+        with self.assertRaises(RecursionError):
+            nested(calls, lambda: plan(value))
+        self.assertEqual(nested(calls, lambda: validator(value)), True)
+        self.assertEqual(nested(calls, lambda: validator(bad)), False)
+
+    def test_collections(self):
+        cases = [
+            ({frozenset([1]), frozenset(["a"])}, Set[FrozenSet[int]]),
+            ({frozenset([1])}, Set[FrozenSet[Union[int, str]]]),
+            (((1,), ("a",)), Tuple[Sequence[int], ...]),
+            ([(1, 2), ()], Sequence[Tuple[int, ...]]),
+            ({"a": {"b": [1]}}, Mapping[str, Mapping[str, List[int]]]),
+            ({"a": {"b": ["x"]}}, Mapping[str, Mapping[str, List[int]]]),
+            ({"a": {1: [1]}}, Mapping[str, Dict[str, Any]]),
+            ("abc", Sequence[Sequence[str]]),
+            ([1, 2], Set[int]),
+        ]
+        for var, check_type in cases:
+            self.assert_same(var, check_type)
+        self.assert_same([(1,), ("x",)], Sequence[Tuple[int, ...]],
+                         CheckPolicy.first(1))
+
+    def test_signature(self):
+        @TySig.signature(a=TySig.compile(HType, engine=ENGINE_STACK))
+        def fns(*args, **kwargs):
+            return kwargs
+
+        self.assertEqual({"a": {}}, fns({}))
+        with self.assertRaises(TypeError):
+            fns({"1": 2})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            TySig.compile(int, engine="jit")
@@ -0,0 +1,85 @@
+import unittest
+import threading
+import os
+import tempfile
+from tysig.tysig import TySig
+from tysig.tyruntime import RuntimePolicy
+from tysig.tystats import ThreadCounters, to_prometheus
+from typing import List
+
+
+@TySig.signature(a=List[int], b=(2, int))
+def total(a, b) -> int:
+    return sum(a) + b
+
+
+class TestTyStats(unittest.TestCase):
+    def setUp(self):
+        TySig.reset_stats()
+
+    def test_counters(self):
+        total([1, 2])
+        total([3], 4)
+        with TySig.checking(RuntimePolicy.off()):
+            total([5])
+        with self.assertRaises(TypeError):
+            total(["x"])
+
+        stats = TySig.stats()[f"{__name__}.total"]
+        self.assertEqual(3, stats["calls"])
+        self.assertEqual(2, stats["checked_calls"])
+        self.assertTrue(stats["check_args_ns"] > 0)
+        self.assertTrue(stats["bind_ns"] > 0)
+        self.assertTrue(stats["function_ns"] > 0)
+        self.assertEqual(stats, total.stats.as_dict())
+
+        TySig.reset_stats()
+        self.assertEqual(0, TySig.stats()[f"{__name__}.total"]["calls"])
+
+    def test_prometheus(self):
+        text = to_prometheus({'m.f"x': {"calls": 2, "checked_calls": 1,
+                                        "bind_ns": 0, "check_args_ns": 500,
+                                        "check_return_ns": 0,
+                                        "function_ns": 10 ** 9}})
+        self.assertIn("# TYPE tysig_calls_total counter\n", text)
+        self.assertIn('tysig_calls_total{function="m.f\\"x"} 2\n', text)
+        self.assertIn('tysig_function_seconds_total{function="m.f\\"x"} 1.0',
+                      text)
+
+        total([1])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tysig.prom")
+            TySig.write_stats(path)
+            with open(path) as fp:
+                text = fp.read()
+            self.assertEqual(["tysig.prom"], os.listdir(tmp))
+        self.assertIn(f'tysig_calls_total{{function="{__name__}.total"}} 1',
+                      text)
+
+    def test_threads(self):
+        def run(threads: int, target):
+            workers = [threading.Thread(target=target)
+                       for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        run(8, lambda: [total([1]) for _ in range(500)])
+        stats = TySig.stats()[f"{__name__}.total"]
+        self.assertEqual(4000, stats["calls"])
+        self.assertEqual(4000, stats["checked_calls"])
+
+        counters = ThreadCounters(2)
+        counters.local()[1] += 3
+
+        def count():
+            counts = counters.local()
+            for _ in range(1000):
+                counts[0] += 1
+        run(4, count)
+        # the counters of the exited threads are folded in
+        self.assertEqual([4000, 3], counters.totals())
+        counters.reset()
+        counters.local()[0] += 1
+        self.assertEqual([1, 0], counters.totals())
@@ -0,0 +1,94 @@
+import io
+import json
+import unittest
+from tysig.tysig import TySig
+from tysig.tystream import Reject
+from typing import List, Optional
+
+SCHEMA = dict(id=int, name=str, tags=([], List[str]),
+              score=(None, Optional[float]))
+
+
+class TestTyStream(unittest.TestCase):
+    def test_jsonl(self):
+        lines = [{"id": 1, "name": "a"},
+                 {"id": 2, "name": "b", "tags": ["x"], "score": 1.5},
+                 {"id": "3", "name": "c"},
+                 {"id": 4},
+                 {"id": 5, "name": "e", "extra": 1},
+                 {"id": 6, "name": "f", "tags": ["x", 2]},
+                 [1, 2]]
+        text = "\n".join(map(json.dumps, lines)) + "\n\n{bad\n"
+        stream = TySig.validate_stream(io.StringIO(text), SCHEMA)
+        results = list(stream)
+        self.assertEqual([{"id": 1, "name": "a", "tags": [], "score": None},
+                          lines[1]], results[:2])
+        rejects = results[2:]
+        self.assertTrue(all(isinstance(x, Reject) for x in rejects))
+        self.assertEqual([(3, "id"), (4, "name"), (5, "extra"),
+                          (6, "tags"), (7, None), (9, None)],
+                         [(x.line, x.field) for x in rejects])
+        self.assertTrue(rejects[3].error.endswith(
+            ". Failed at tags[1]: expected str, got int"))
+        self.assertEqual("{bad", rejects[-1].row)
+
+        report = stream.report
+        self.assertEqual((8, 2, 6), (report.rows, report.valid,
+                                     report.rejected))
+        self.assertGreater(report.rows_per_sec, 0)
+
+    def test_csv(self):
+        text = "id,name,tags,score\n" \
+               "1,a,,\n" \
+               "2,b,\"[\"\"x\"\"]\",1.5\n" \
+               "x,c,,\n" \
+               "4,\"multi\nline\",,2.5\n" \
+               "5,e\n"
+        rejects, reports = [], []
+        rows = list(TySig.validate_stream(
+            io.StringIO(text), SCHEMA, format="csv",
+            on_reject=rejects.append, on_report=reports.append,
+            report_every=2))
+        self.assertEqual([{"id": 1, "name": "a", "tags": [], "score": None},
+                          {"id": 2, "name": "b", "tags": ["x"],
+                           "score": 1.5},
+                          {"id": 4, "name": "multi\nline", "tags": [],
+                           "score": 2.5}],
+                         rows)
+        self.assertEqual([(4, "id"), (7, None)],
+                         [(x.line, x.field) for x in rejects])
+        self.assertEqual(3, len(reports))
+        self.assertEqual(5, reports[-1].rows)
+
+    def test_large_stream(self):
+        def lines():
+            for i in range(50000):
+                yield json.dumps({"id": i, "name": str(i),
+                                  "tags": ["a"] * (i % 3)}) + "\n"
+
+        class Source(object):
+            def __init__(self):
+                self.lines = lines()
+                self.max_read = 0
+
+            def readlines(self, hint):
+                chunk = []
+                size = 0
+                for line in self.lines:
+                    chunk.append(line)
+                    size += len(line)
+                    if size >= hint:
+                        break
+                self.max_read = max(self.max_read, len(chunk))
+                return chunk
+
+        source = Source()
+        count = sum(1 for _ in TySig.validate_stream(
+            source, dict(id=int, name=str, tags=List[str])))
+        self.assertEqual(50000, count)
+        # the file is read a bounded chunk at a time
+        self.assertLess(source.max_read, 5000)
+
+    def test_bad_format(self):
+        with self.assertRaises(ValueError):
+            TySig.validate_stream(io.StringIO(""), SCHEMA, format="xml")
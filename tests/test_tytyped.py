@@ -0,0 +1,79 @@
+import copy
+import pickle
+import unittest
+from tysig.tysig import TySig
+from tysig.tystack import ENGINE_STACK
+from tysig.tytyped import CheckedList, CheckedDict
+from typing import Union, Tuple, List, Dict
+
+
+class TestTyTyped(unittest.TestCase):
+    def test_list(self):
+        data = TySig.typed(List[int], [1, 2])
+        self.assertIsInstance(data, CheckedList)
+        data.append(3)
+        data.extend([4, 5])
+        data.insert(0, 0)
+        data[1] = 6
+        data[2:4] = [7, 8]
+        data += [9]
+        self.assertEqual([0, 6, 7, 8, 4, 5, 9], data)
+        for mutate in (lambda: data.append("x"),
+                       lambda: data.extend([1, "x"]),
+                       lambda: data.insert(0, 1.),
+                       lambda: data.__setitem__(0, None),
+                       lambda: data.__setitem__(slice(0, 1), ["x"])):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual([0, 6, 7, 8, 4, 5, 9], data)
+
+        with self.assertRaises(TypeError) as ctx:
+            TySig.typed(List[Tuple[int, str]], [(1, "a"), (1, 2)])
+        self.assertIn("Failed at data[1][1]", str(ctx.exception))
+        with self.assertRaises(TypeError):
+            TySig.typed(Tuple[int], [1])
+
+    def test_dict(self):
+        data = TySig.typed(Dict[str, List[int]], {"a": [1]})
+        self.assertIsInstance(data, CheckedDict)
+        data["b"] = [2]
+        data.update({"c": []}, d=[3])
+        data.setdefault("e", [])
+        data |= {"f": [4]}
+        self.assertEqual({"a": [1], "b": [2], "c": [], "d": [3], "e": [],
+                          "f": [4]}, data)
+        for mutate in (lambda: data.__setitem__(1, [1]),
+                       lambda: data.__setitem__("g", [1.]),
+                       lambda: data.update(g=1),
+                       lambda: data.setdefault("g")):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertNotIn("g", data)
+
+    def test_is_type(self):
+        check_type = List[Dict[str, Union[int, str]]]
+        data = TySig.typed(check_type, [{"a": 1}])
+        self.assertTrue(TySig.is_type(data, check_type))
+        self.assertTrue(TySig.is_type(data, check_type, engine=ENGINE_STACK))
+        # checked as a plain list against other types
+        self.assertTrue(TySig.is_type(data, List[Dict[str, int]]))
+        self.assertFalse(TySig.is_type(data, List[int]))
+
+        # accepted without walking the elements: a nested value mutated in
+        # place is not seen
+        data[0]["b"] = 1.
+        self.assertTrue(TySig.is_type(data, check_type))
+
+        @TySig.signature(a=check_type)
+        def fn(a):
+            return a
+
+        self.assertIs(data, fn(data))
+
+    def test_copy(self):
+        data = TySig.typed(Dict[str, int], {"a": 1})
+        for clone in (copy.copy(data), pickle.loads(pickle.dumps(data))):
+            self.assertIsInstance(clone, CheckedDict)
+            self.assertEqual(data, clone)
+            with self.assertRaises(TypeError):
+                clone["b"] = "x"